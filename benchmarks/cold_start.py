@@ -0,0 +1,112 @@
+"""
+Compare the application import time on a new instance with and without precompiled bytecode.
+
+Each package is extracted in a new folder, as on a new Azure WebApp instance, and the
+application is imported by an interpreter of the runtime version.
+
+Weblodge must be installed or in the Python path.
+
+Usage:
+    python benchmarks/cold_start.py --modules 300 --functions 50
+"""
+import os
+import sys
+import argparse
+import tempfile
+import zipfile
+import statistics
+import subprocess
+from pathlib import Path
+
+from weblodge.web_app import bytecode
+from weblodge.web_app.build import BuildConfig, build
+
+
+# Print the import time of the application.
+_IMPORT_SCRIPT = '''\
+import time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+'''
+
+
+def generate(src: str, modules: int, functions: int) -> None:
+    """
+    Generate an application importing `modules` modules of `functions` functions.
+    """
+    Path(src, 'requirements.txt').write_text('', encoding='utf-8')
+    folder = Path(src, 'package')
+    folder.mkdir()
+    Path(folder, '__init__.py').write_text('', encoding='utf-8')
+
+    for i in range(modules):
+        content = ''.join(
+            f'def function_{j}(values):\n'
+            f'    """Function {j}."""\n'
+            f'    return [value * {j} for value in values if value % {j + 1}] + [{i}, {j}]\n\n'
+            for j in range(functions)
+        )
+        Path(folder, f'module_{i}.py').write_text(content, encoding='utf-8')
+
+    imports = ''.join(f'import package.module_{i}\n' for i in range(modules))
+    Path(src, 'app.py').write_text(f'{imports}app = object()\n', encoding='utf-8')
+
+
+def package(src: str, precompile: bool) -> str:
+    """
+    Build the application and return the package path.
+    """
+    # Options are given as on the command line, from their defaults.
+    config = BuildConfig(**{
+        **{item.name: item.default for item in BuildConfig.items},
+        'src': src,
+        'dist': os.path.join(src, 'dist-compiled' if precompile else 'dist'),
+        'precompile': 'true' if precompile else 'false',
+    })
+    build(config)
+    return config.package_path
+
+
+def run(executable: str, package_path: str) -> float:
+    """
+    Extract the package in a new folder and return the import time of the application.
+    """
+    with tempfile.TemporaryDirectory() as site:
+        with zipfile.ZipFile(package_path) as zipf:
+            zipf.extractall(site)
+        # As on Azure, the bytecode compiled on the first import is not reused.
+        env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+        output = subprocess.run(
+            [executable, '-c', _IMPORT_SCRIPT], cwd=site, env=env, capture_output=True, text=True, check=True
+        )
+        return float(output.stdout)
+
+
+def main():
+    """
+    Run the benchmark and print the import time with and without bytecode.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', type=int, default=300, help='Number of modules imported by the application.')
+    parser.add_argument('--functions', type=int, default=50, help='Number of functions by module.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of imports by measure, the median is kept.')
+    args = parser.parse_args()
+
+    executable = bytecode.interpreter()
+    if executable is None:
+        sys.exit(f'A Python {bytecode.PYTHON_VERSION} interpreter is required.')
+
+    with tempfile.TemporaryDirectory() as src:
+        generate(src, args.modules, args.functions)
+        print(f'{args.modules} modules of {args.functions} functions, Python {bytecode.PYTHON_VERSION}.')
+
+        sources_package, compiled_package = package(src, False), package(src, True)
+        sources = statistics.median(run(executable, sources_package) for _ in range(args.repeat))
+        compiled = statistics.median(run(executable, compiled_package) for _ in range(args.repeat))
+        print(f'Sources only: {sources:.3f}s')
+        print(f'Precompiled:  {compiled:.3f}s (x{sources / compiled:.2f})')
+
+
+if __name__ == '__main__':
+    main()
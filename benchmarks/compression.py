@@ -0,0 +1,76 @@
+"""
+Compare the package build time with serial and parallel compression.
+
+Weblodge must be installed or in the Python path.
+
+Usage:
+    python benchmarks/compression.py --files 2000 --size 65536 --workers 1 2 4 8
+"""
+import os
+import time
+import shutil
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+from weblodge.web_app.build import BuildConfig, build
+
+
+def generate(src: str, files: int, size: int) -> None:
+    """
+    Generate an application with `files` text files of `size` bytes.
+    """
+    Path(src, 'app.py').write_text('app = Flask(__name__)\n', encoding='utf-8')
+    Path(src, 'requirements.txt').write_text('flask\n', encoding='utf-8')
+
+    words = [''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=random.randint(2, 10))) for _ in range(500)]
+    for i in range(files):
+        folder = Path(src, 'package', f'module_{i % 20}')
+        folder.mkdir(parents=True, exist_ok=True)
+        content = ' '.join(random.choices(words, k=size // 6))
+        (folder / f'file_{i}.py').write_text(content[:size], encoding='utf-8')
+
+
+def run(src: str, workers: int) -> float:
+    """
+    Build the application from scratch and return the duration in seconds.
+    """
+    dist = os.path.join(src, 'dist')
+    shutil.rmtree(dist, ignore_errors=True)
+    # Options are given as on the command line, from their defaults.
+    config = BuildConfig(**{
+        **{item.name: item.default for item in BuildConfig.items},
+        'src': src,
+        'dist': dist,
+        'compression_workers': str(workers),
+    })
+    start = time.perf_counter()
+    build(config)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Run the benchmark and print the speedup of each number of workers.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000, help='Number of files in the application.')
+    parser.add_argument('--size', type=int, default=64 * 1024, help='Size of each file in bytes.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--repeat', type=int, default=3, help='Number of builds by measure, the best is kept.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as src:
+        generate(src, args.files, args.size)
+        print(f'{args.files} files of {args.size} bytes, {os.cpu_count()} CPU cores.')
+
+        serial = None
+        for workers in args.workers:
+            duration = min(run(src, workers) for _ in range(args.repeat))
+            serial = serial or duration
+            print(f'{workers:>3} workers: {duration:.3f}s (x{serial / duration:.2f})')
+
+
+if __name__ == '__main__':
+    main()
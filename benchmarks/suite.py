@@ -0,0 +1,266 @@
+"""
+Measure the package build over synthetic applications.
+
+Each scenario generates an application stressing a part of the build, then builds it from
+scratch and again without change. Each build runs in its own process to measure its wall
+time, CPU time and peak memory. The peak memory is not available on Windows. Results are
+written in a JSON file, to compare them with the results of another version:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+
+Weblodge must be installed or in the Python path.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+def many_small_files(src: Path, scale: int) -> None:
+    """
+    Many small source files in a few folders.
+    """
+    for i in range(2000 * scale):
+        folder = src / 'package' / f'module_{i % 50}'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f'file_{i}.py').write_text(_text(2 * 1024), encoding='utf-8')
+
+
+def huge_binaries(src: Path, scale: int) -> None:
+    """
+    A few large files, compressible or not.
+    """
+    data = src / 'data'
+    data.mkdir()
+    for i in range(2 * scale):
+        (data / f'model_{i}.bin').write_bytes(os.urandom(50 * 1024 * 1024))
+        (data / f'export_{i}.csv').write_text(_text(50 * 1024 * 1024), encoding='utf-8')
+
+
+def deep_tree(src: Path, scale: int) -> None:
+    """
+    Files spread over deeply nested folders.
+    """
+    for i in range(20 * scale):
+        folder = src.joinpath(*(f'level_{i}_{depth}' for depth in range(25)))
+        folder.mkdir(parents=True)
+        for j in range(20):
+            (folder / f'file_{j}.py').write_text(_text(1024), encoding='utf-8')
+
+
+def large_ignored_folders(src: Path, scale: int) -> None:
+    """
+    An application next to large folders which are not packaged.
+    """
+    (src / 'app').mkdir()
+    for i in range(100):
+        (src / 'app' / f'view_{i}.py').write_text(_text(2 * 1024), encoding='utf-8')
+    (src / '.gitignore').write_text('node_modules/\nbuild/\n', encoding='utf-8')
+    venv = src / '.venv'
+    venv.mkdir()
+    for folder in ('node_modules', 'build', '.venv/lib'):
+        for i in range(5000 * scale):
+            path = src / folder / f'module_{i % 100}' / f'file_{i}.js'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text('ignored', encoding='utf-8')
+
+
+# Scenarios by name.
+SCENARIOS: Dict[str, Callable[[Path, int], None]] = {
+    'many_small_files': many_small_files,
+    'huge_binaries': huge_binaries,
+    'deep_tree': deep_tree,
+    'large_ignored_folders': large_ignored_folders,
+}
+
+# Measures of each build.
+MEASURES = ('wall_time', 'cpu_time', 'peak_rss', 'package_size')
+
+
+def generate(scenario: str, src: Path, scale: int) -> None:
+    """
+    Generate the application of a scenario.
+    """
+    (src / 'app.py').write_text('app = Flask(__name__)\n', encoding='utf-8')
+    (src / 'requirements.txt').write_text('flask\n', encoding='utf-8')
+    random.seed(scenario)
+    SCENARIOS[scenario](src, scale)
+
+
+def measure(src: str) -> Dict[str, float]:
+    """
+    Build the application in the current process and return the measures.
+    """
+    # pylint: disable=import-outside-toplevel
+    from weblodge.web_app.build import BuildConfig, build
+
+    config = BuildConfig(**{
+        **{item.name: item.default for item in BuildConfig.items},
+        'src': src,
+        'dist': os.path.join(src, 'dist'),
+    })
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    build(config)
+    wall_time, cpu_time = time.perf_counter() - start, time.process_time() - cpu_start
+
+    return {
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'peak_rss': _peak_rss(),
+        'package_size': os.path.getsize(config.package_path),
+    }
+
+
+def _peak_rss() -> Optional[int]:
+    """
+    Return the peak memory of the current process in bytes, None where it is not available.
+    """
+    try:
+        # POSIX only.
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    # Kilobytes on Linux, bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+def run(src: str) -> Dict[str, float]:
+    """
+    Build the application in a new process and return the measures.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', src],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def benchmark(scenarios: List[str], scale: int, repeat: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Return the best measures of the first build and of the rebuild of each scenario.
+    """
+    results = {}
+    for scenario in scenarios:
+        with tempfile.TemporaryDirectory() as src:
+            generate(scenario, Path(src), scale)
+            builds, rebuilds = [], []
+            for _ in range(repeat):
+                shutil.rmtree(os.path.join(src, 'dist'), ignore_errors=True)
+                builds.append(run(src))
+                rebuilds.append(run(src))
+        results[scenario] = {'build': _best(builds), 'rebuild': _best(rebuilds)}
+        _print(scenario, results[scenario])
+    return results
+
+
+def compare(results: Dict, previous: Dict) -> None:
+    """
+    Print the ratio of the measures with the previous results.
+    """
+    print(f"\nCompared to {previous['environment']['commit'] or 'previous results'}:")
+    for scenario, builds in results.items():
+        for kind, measures in builds.items():
+            before = previous['results'].get(scenario, {}).get(kind)
+            if not before:
+                continue
+            ratios = ', '.join(
+                f'{name} x{measures[name] / before[name]:.2f}'
+                for name in MEASURES if before.get(name) and measures[name] is not None
+            )
+            print(f'{scenario:<22} {kind:<8} {ratios}')
+
+
+def _best(measures: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Return the lowest value of each measure, the least disturbed by other processes.
+    Measures not available are None.
+    """
+    return {
+        name: None if any(m[name] is None for m in measures) else min(m[name] for m in measures)
+        for name in MEASURES
+    }
+
+
+def _print(scenario: str, builds: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print the measures of a scenario.
+    """
+    for kind, m in builds.items():
+        rss = 'n/a' if m['peak_rss'] is None else f"{m['peak_rss'] / 1024 / 1024:.1f}MB"
+        print(
+            f"{scenario:<22} {kind:<8} wall {m['wall_time']:7.2f}s  cpu {m['cpu_time']:7.2f}s  "
+            f"rss {rss:>9}  package {m['package_size'] / 1024 / 1024:7.1f}MB"
+        )
+
+
+def _text(size: int) -> str:
+    """
+    Return compressible text of `size` characters.
+    """
+    words = ['request', 'response', 'value', 'return', 'self', 'import', 'data', 'config', 'def', 'class']
+    return ' '.join(random.choices(words, k=size // 5))[:size]
+
+
+def _environment() -> Dict[str, str]:
+    """
+    Return the description of the machine and of the version measured.
+    """
+    commit = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return {
+        'commit': commit.stdout.strip(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    """
+    Run the scenarios, write and compare their results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--scale', type=int, default=1, help='Multiply the size of the applications.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of builds by measure, the best is kept.')
+    parser.add_argument('--output', help='JSON file of the results.')
+    parser.add_argument('--compare', help='JSON file of previous results to compare with.')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+
+    results = {
+        'environment': _environment(),
+        'scale': args.scale,
+        'results': benchmark(args.scenarios, args.scale, args.repeat),
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if args.compare:
+        compare(results['results'], json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 CLI Mock that will return waiting output or exception
 when a command is invoked.
 """
-from typing import Dict, Iterable, Union
+from typing import Dict, Iterable, Optional, Union
 
 
 class Cli:
@@ -14,8 +14,9 @@ class Cli:
     def __init__(self, output):
         self.output = output
         self.commands = []
+        self.tags = []
 
-    def invoke(self, command: str, *_args, **_kwargs) -> Union[str, Dict]:
+    def invoke(self, command: str, *_args, tags: Optional[Dict[str, str]] = None, **_kwargs) -> Union[str, Dict]:
         """
         Invoke the given command and return the expected output.
         """
@@ -23,6 +24,7 @@ class Cli:
         assert self.output, 'No expected output set.'
 
         self.commands.append(command)
+        self.tags.append(tags)
 
         if isinstance(self.output, list):
             expected_output = self.output.pop(0)
@@ -2,6 +2,8 @@
 App Service Plan Tests.
 """
 import json
+import shutil
+import tempfile
 from pathlib import Path
 import unittest
 from unittest.mock import MagicMock
@@ -26,8 +28,16 @@ class TestAppService(unittest.TestCase):
         self.skus = json.loads(
             Path('./tests/_azure/api_mocks/skus.json').read_text(encoding='utf-8')
         )
+        # Prices are cached aside, each test retrieves them.
+        self.cache_path = sku.CACHE_PATH
+        sku.CACHE_PATH = tempfile.mkdtemp()
         return super().setUp()
 
+    def tearDown(self) -> None:
+        shutil.rmtree(sku.CACHE_PATH)
+        sku.CACHE_PATH = self.cache_path
+        return super().tearDown()
+
     def test_create(self):
         """
         Test the create.
@@ -81,6 +91,7 @@ class TestAppService(unittest.TestCase):
         Set the SKU.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.REQUEST.return_value.json.return_value = self.skus
 
         resource_group = MagicMock(location='westeurope')
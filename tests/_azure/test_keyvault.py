@@ -1,7 +1,9 @@
 """
 KeyVault Tests.
 """
+import hmac
 import json
+import hashlib
 from pathlib import Path
 import unittest
 from unittest.mock import MagicMock
@@ -86,3 +88,87 @@ class TestKeyVault(unittest.TestCase):
                 )
             ]
         )
+
+    def test_sync_unchanged(self):
+        """
+        Ensure unchanged secrets are not written.
+        """
+        digest = hmac.new(b'key', b'foo_value', hashlib.sha256).hexdigest()
+        cli = Cli([
+            [{'name': 'foo', 'tags': {'weblodge-hmac-sha256': digest}}, {'name': 'weblodge-digest-key', 'tags': {}}],
+            {'id': 'https://develop_kv.vault.azure.net/secrets/weblodge-digest-key', 'name': 'key', 'value': 'key'},
+        ])
+
+        keyvault = KeyVault(name='develop_kv', resource_group=MagicMock())
+        keyvault.set_cli(cli)
+
+        self.assertEqual(keyvault.sync({'foo': 'foo_value'}), [])
+        cli.asserts_commands_not_called(['keyvault secret set'])
+
+    def test_sync_changed(self):
+        """
+        Ensure only new and changed secrets are written with their keyed hash.
+        """
+        digest = hmac.new(b'key', b'foo_value', hashlib.sha256).hexdigest()
+        cli = Cli([
+            [
+                {'name': 'foo', 'tags': {'weblodge-hmac-sha256': digest}},
+                {'name': 'bar', 'tags': {'weblodge-hmac-sha256': digest}},
+                {'name': 'baz', 'tags': None},
+                {'name': 'weblodge-digest-key', 'tags': {}},
+            ],
+            {'id': 'https://develop_kv.vault.azure.net/secrets/weblodge-digest-key', 'name': 'key', 'value': 'key'},
+            self.keyvaults_show_secrets[0][1],
+            self.keyvaults_show_secrets[0][1],
+        ])
+
+        keyvault = KeyVault(name='develop_kv', resource_group=MagicMock())
+        keyvault.set_cli(cli)
+
+        secrets = keyvault.sync({'foo': 'foo_value', 'bar': 'bar_value', 'baz': 'baz_value'})
+
+        self.assertEqual(len(secrets), 2)
+        self.assertEqual(
+            [c for c in cli.commands if 'secret set' in c],
+            [
+                'keyvault secret set --vault-name develop_kv --name bar',
+                'keyvault secret set --vault-name develop_kv --name baz',
+            ]
+        )
+        self.assertEqual(
+            cli.tags[-1],
+            {'weblodge-hmac-sha256': hmac.new(b'key', b'baz_value', hashlib.sha256).hexdigest()}
+        )
+
+    def test_sync_digest_key(self):
+        """
+        Ensure a random key is created for the hashes of a new KeyVault.
+        """
+        cli = Cli([
+            [],
+            {'id': 'https://develop_kv.vault.azure.net/secrets/weblodge-digest-key', 'name': 'key', 'value': 'key'},
+            self.keyvaults_show_secrets[0][1],
+        ])
+
+        keyvault = KeyVault(name='develop_kv', resource_group=MagicMock())
+        keyvault.set_cli(cli)
+
+        self.assertEqual(len(keyvault.sync({'foo': 'foo_value'})), 1)
+        self.assertEqual(cli.commands[1], 'keyvault secret set --vault-name develop_kv --name weblodge-digest-key')
+        self.assertIsNone(cli.tags[1])
+        self.assertNotEqual(cli.tags[2], {'weblodge-hmac-sha256': hashlib.sha256(b'foo_value').hexdigest()})
+
+    def test_secret_uri(self):
+        """
+        Ensure secret URIs do not contain a version.
+        """
+        keyvault = KeyVault(
+            name='develop_kv',
+            resource_group=MagicMock(),
+            from_az={'tags': {}, 'properties': {'vaultUri': 'https://develop_kv.vault.azure.net/'}}
+        )
+
+        self.assertEqual(
+            keyvault.secret_uri('foo'),
+            'https://develop_kv.vault.azure.net/secrets/foo'
+        )
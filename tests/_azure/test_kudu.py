@@ -0,0 +1,133 @@
+"""
+Kudu API Tests.
+"""
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from weblodge._azure import kudu
+from weblodge._azure.exceptions import KuduException
+
+
+class TestKudu(unittest.TestCase):
+    """
+    Kudu API Tests.
+    """
+    def setUp(self) -> None:
+        patcher = patch('weblodge._azure.kudu.HTTP')
+        self.http = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.get_token = MagicMock(return_value=('token', time.time() + 3600))
+        return super().setUp()
+
+    def test_log_stream(self):
+        """
+        Ensure the log stream is authenticated and decoded.
+        """
+        response = self.http.request.return_value
+        response.status = 200
+        response.__iter__.return_value = [b'line 1\n', b'line 2\r\n']
+
+        api = kudu.Kudu('app.scm.azurewebsites.net', self.get_token)
+
+        self.assertEqual(list(api.log_stream('application')), ['line 1', 'line 2'])
+        args, kwargs = self.http.request.call_args
+        self.assertEqual(args, ('GET', 'https://app.scm.azurewebsites.net/api/logstream/application'))
+        self.assertEqual(kwargs['headers'], {'Authorization': 'Bearer token'})
+        response.release_conn.assert_called_once()
+
+    def test_log_stream_all(self):
+        """
+        Ensure all logs are streamed without path.
+        """
+        self.http.request.return_value.status = 200
+
+        list(kudu.Kudu('app.scm.azurewebsites.net', self.get_token).log_stream())
+
+        args, _ = self.http.request.call_args
+        self.assertEqual(args, ('GET', 'https://app.scm.azurewebsites.net/api/logstream'))
+
+    def test_zip_deploy(self):
+        """
+        Ensure the package is uploaded by chunks and the deployment awaited.
+        """
+        upload, in_progress, done = MagicMock(status=202), MagicMock(status=200), MagicMock(status=200)
+        upload.headers = {'Location': 'https://app.scm.azurewebsites.net/api/deployments/latest?deployer=Push'}
+        in_progress.data = b'{"complete": false, "status": 1}'
+        done.data = b'{"complete": true, "status": 4}'
+        self.http.request.side_effect = [upload, in_progress, done]
+
+        api = kudu.Kudu('app.scm.azurewebsites.net', self.get_token)
+        api.deployment_polling_interval = 0
+        chunks = iter([b'PK', b'data'])
+        api.zip_deploy(chunks)
+
+        calls = self.http.request.call_args_list
+        self.assertEqual(calls[0][0], ('POST', 'https://app.scm.azurewebsites.net/api/zipdeploy?isAsync=true'))
+        self.assertIs(calls[0][1]['body'], chunks)
+        self.assertTrue(calls[0][1]['chunked'])
+        self.assertEqual(calls[2][0], ('GET', upload.headers['Location']))
+
+    def test_zip_deploy_failed(self):
+        """
+        Ensure a failed deployment raises.
+        """
+        self.http.request.return_value = MagicMock(status=200, headers={})
+        self.http.request.return_value.data = b'{"complete": true, "status": 3, "status_text": "Build failed"}'
+
+        with self.assertRaises(KuduException):
+            kudu.Kudu('app.scm.azurewebsites.net', self.get_token).zip_deploy([b'PK'])
+
+    def test_files(self):
+        """
+        Ensure files are read, written, deleted and extracted through the Kudu API.
+        """
+        api = kudu.Kudu('app.scm.azurewebsites.net', self.get_token)
+
+        self.http.request.return_value = MagicMock(status=404)
+        self.assertIsNone(api.get_file('site/wwwroot/weblodge.manifest'))
+        api.delete_file('site/wwwroot/my file.py')
+        self.http.request.return_value = MagicMock(status=200, data=b'{}')
+        self.assertEqual(api.get_file('site/wwwroot/weblodge.manifest'), b'{}')
+        api.extract_zip('site/wwwroot', b'PK')
+        api.put_file('site/weblodge/weblodge.manifest', b'{}')
+        api.delete_folder('site/weblodge')
+
+        calls = [c[0] for c in self.http.request.call_args_list]
+        self.assertEqual(calls, [
+            ('GET', 'https://app.scm.azurewebsites.net/api/vfs/site/wwwroot/weblodge.manifest'),
+            ('DELETE', 'https://app.scm.azurewebsites.net/api/vfs/site/wwwroot/my%20file.py'),
+            ('GET', 'https://app.scm.azurewebsites.net/api/vfs/site/wwwroot/weblodge.manifest'),
+            ('PUT', 'https://app.scm.azurewebsites.net/api/zip/site/wwwroot/'),
+            ('PUT', 'https://app.scm.azurewebsites.net/api/vfs/site/weblodge/weblodge.manifest'),
+            ('DELETE', 'https://app.scm.azurewebsites.net/api/vfs/site/weblodge/?recursive=true'),
+        ])
+        self.assertEqual(self.http.request.call_args_list[1][1]['headers']['If-Match'], '*')
+        self.assertEqual(self.http.request.call_args_list[4][1]['body'], b'{}')
+
+    def test_token(self):
+        """
+        Ensure the access token is retrieved again only when it is about to expire.
+        """
+        self.http.request.return_value = MagicMock(status=200, data=b'{}')
+        api = kudu.Kudu('app.scm.azurewebsites.net', self.get_token)
+
+        api.get_file('site/wwwroot/app.py')
+        api.get_file('site/wwwroot/app.py')
+        self.get_token.assert_called_once()
+
+        self.get_token.return_value = ('new token', time.time() + 3600)
+        with patch('weblodge._azure.kudu.time.time', return_value=time.time() + 3500):
+            api.get_file('site/wwwroot/app.py')
+
+        self.assertEqual(self.get_token.call_count, 2)
+        self.assertEqual(self.http.request.call_args[1]['headers'], {'Authorization': 'Bearer new token'})
+
+    def test_failed(self):
+        """
+        Ensure failed requests raise.
+        """
+        self.http.request.return_value.status = 401
+
+        with self.assertRaises(KuduException):
+            list(kudu.Kudu('app.scm.azurewebsites.net', self.get_token).log_stream())
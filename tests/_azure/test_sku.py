@@ -2,9 +2,11 @@
 Tests SKU internal API.
 """
 import json
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from weblodge._azure import sku, InvalidLocation
 from weblodge._azure.exceptions import InvalidSku
@@ -18,13 +20,22 @@ class TestSku(unittest.TestCase):
         self.skus = json.loads(
             Path('./tests/_azure/api_mocks/skus.json').read_text(encoding='utf-8')
         )
+        # Prices are cached aside, each test retrieves them.
+        self.cache_path = sku.CACHE_PATH
+        sku.CACHE_PATH = tempfile.mkdtemp()
         return super().setUp()
 
+    def tearDown(self) -> None:
+        shutil.rmtree(sku.CACHE_PATH)
+        sku.CACHE_PATH = self.cache_path
+        return super().tearDown()
+
     def test_default(self):
         """
         Ensure SKU is properly setted.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.REQUEST.return_value.json.return_value = self.skus
 
         sku.RETRY = MagicMock()
@@ -51,6 +62,7 @@ class TestSku(unittest.TestCase):
         Ensure location is properly updated.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.REQUEST.return_value.json.return_value = self.skus
 
         sku.RETRY = MagicMock()
@@ -79,7 +91,107 @@ class TestSku(unittest.TestCase):
         Properly raise an exception if the location is incorrect.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.REQUEST.return_value.json.return_value = {'Items': []}
 
         with self.assertRaises(InvalidLocation):
             list(sku.get_skus('bad'))
+
+    def test_cache(self):
+        """
+        Ensure the prices are cached by location until they expire.
+        """
+        sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {'ETag': '"v1"'}
+        sku.REQUEST.return_value.json.return_value = self.skus
+
+        self.assertEqual(len(list(sku.get_skus('northeurope'))), 13)
+        self.assertEqual(len(list(sku.get_skus('northeurope'))), 13)
+        self.assertEqual(len(list(sku.get_skus('northeurope', offline=True))), 13)
+        self.assertEqual(sku.REQUEST.call_count, 1)
+
+        list(sku.get_skus('westeurope'))
+        self.assertEqual(sku.REQUEST.call_count, 2)
+
+        # Expired or refreshed prices are retrieved if they changed.
+        sku.REQUEST.return_value.status = 304
+        list(sku.get_skus('northeurope', refresh=True))
+        self.assertEqual(sku.REQUEST.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+
+        with patch('weblodge._azure.sku.CACHE_TTL', 0):
+            list(sku.get_skus('northeurope'))
+        self.assertEqual(sku.REQUEST.call_count, 4)
+
+    def test_offline(self):
+        """
+        Ensure the network is not used offline, and expired prices are used without network.
+        """
+        sku.REQUEST = MagicMock(side_effect=Exception('No network'))
+
+        with self.assertRaises(InvalidSku):
+            list(sku.get_skus('northeurope', offline=True))
+        sku.REQUEST.assert_not_called()
+
+        Path(sku.CACHE_PATH, 'northeurope.json').write_text(
+            json.dumps({'fetched_at': 0, 'etag': None, 'items': self.skus['Items']}),
+            encoding='utf-8'
+        )
+        self.assertEqual(len(list(sku.get_skus('northeurope', offline=True))), 13)
+        sku.REQUEST.assert_not_called()
+
+        with self.assertLogs('weblodge', level='WARNING'):
+            self.assertEqual(len(list(sku.get_skus('northeurope'))), 13)
+
+    def test_pagination(self):
+        """
+        Ensure all the pages of prices are read.
+        """
+        first, second = MagicMock(headers={}), MagicMock(headers={})
+        first.json.return_value = {**self.skus, 'Items': self.skus['Items'][:20], 'NextPageLink': 'https://next'}
+        second.json.return_value = {**self.skus, 'Items': self.skus['Items'][20:], 'NextPageLink': None}
+        sku.REQUEST = MagicMock(side_effect=[first, second])
+
+        self.assertEqual(len(list(sku.get_skus('northeurope'))), 13)
+        self.assertEqual(sku.REQUEST.call_args.args, ('GET', 'https://next'))
+
+        # Only the fields used are cached.
+        cache = json.loads(Path(sku.CACHE_PATH, 'northeurope.json').read_text(encoding='utf-8'))
+        self.assertEqual(len(cache['items']), len(self.skus['Items']))
+        self.assertEqual(set(cache['items'][0]), {'skuName', 'armRegionName', 'retailPrice'})
+
+    def test_by_location(self):
+        """
+        Ensure the SKUs of several locations are retrieved.
+        """
+        sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
+        sku.REQUEST.return_value.json.return_value = self.skus
+
+        skus = sku.get_skus_by_location(['northeurope', 'westeurope', 'northeurope'])
+
+        self.assertEqual(list(skus), ['northeurope', 'westeurope'])
+        self.assertEqual([len(s) for s in skus.values()], [13, 13])
+        self.assertEqual(sku.REQUEST.call_count, 2)
+
+    def test_all_locations(self):
+        """
+        Ensure the SKUs of all the locations are retrieved with a single query.
+        """
+        items = self.skus['Items'] + [{**i, 'armRegionName': 'westeurope'} for i in self.skus['Items']]
+        sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
+        sku.REQUEST.return_value.json.return_value = {**self.skus, 'Items': items}
+
+        skus = sku.get_skus_by_location()
+
+        self.assertEqual({location: len(s) for location, s in skus.items()}, {'northeurope': 13, 'westeurope': 13})
+        self.assertNotIn('armRegionName', sku.REQUEST.call_args.args[1])
+        self.assertTrue(Path(sku.CACHE_PATH, 'all.json').exists())
+
+    def test_hardware(self):
+        """
+        Ensure the hardware is found whatever the case of the SKU name.
+        """
+        self.assertEqual(sku.get_hardware('b1'), sku.get_hardware('B1'))
+        self.assertEqual(sku.get_hardware('P1V3'), {'cores': 2, 'ram': 8, 'disk': 250, 'slots': 30})
+        self.assertIsNone(sku.get_hardware('X1'))
@@ -1,11 +1,14 @@
 """
 Web App Tests.
 """
+import io
 import json
+import zipfile
 from pathlib import Path
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+from weblodge._azure.exceptions import CLIException
 from weblodge._azure.web_app import WebApp, ResourceGroup, AppService, KeyVault
 
 from .cli import Cli
@@ -43,11 +46,41 @@ class TestWebApp(unittest.TestCase):
         Update Web App environment.
         """
         env = {'foo': 'bar', 'foo2': 'bar2'}
-        kv_list = []
-        kv_mock = MagicMock()
-        kv_mock.set = lambda n, v: kv_list.append((n, v)) or MagicMock()
+        kv_mock = self._keyvault_mock()
+
+        cli = Cli([
+            [{'name': 'other', 'value': 'value'}],
+            'invoke_app'
+        ])
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=MagicMock(),
+            keyvault=kv_mock,
+            from_az={'id': '/subscriptions/sub/webapp', 'tags': {}}
+        )
+        web_app.set_cli(cli)
+
+        self.assertTrue(web_app.update_environment(env))
+        kv_mock.sync.assert_called_once_with(env)
+        cli.asserts_commands_called([
+            'rest --method put --uri /subscriptions/sub/webapp/config/appsettings'
+        ])
+
+    def test_update_environment_unchanged(self):
+        """
+        Ensure settings are not sent and the Web App not restarted if nothing changed.
+        """
+        env = {'foo': 'bar'}
+        kv_mock = self._keyvault_mock()
+        kv_mock.sync.return_value = []
 
-        cli = Cli(['set_env_foo', 'set_env_bar', 'invoke_app'])
+        cli = Cli([
+            [
+                {'name': 'foo', 'value': '@Microsoft.KeyVault(SecretUri=https://kv.vault.azure.net/secrets/foo)'},
+                {'name': 'other', 'value': 'value'},
+            ],
+        ])
         web_app = WebApp(
             name='webapp',
             resource_group=MagicMock(),
@@ -56,11 +89,133 @@ class TestWebApp(unittest.TestCase):
         )
         web_app.set_cli(cli)
 
-        web_app.update_environment(env)
-        self.assertEqual(
-            kv_list,
-            [('foo', 'bar'), ('foo2', 'bar2')]
+        self.assertFalse(web_app.update_environment(env))
+        cli.asserts_commands_not_called(['rest', 'restart'])
+
+    def test_update_environment_secret_changed(self):
+        """
+        Ensure the Web App restarts if only secret values changed.
+        """
+        env = {'foo': 'bar'}
+        kv_mock = self._keyvault_mock()
+        kv_mock.sync.return_value = [MagicMock()]
+
+        cli = Cli([
+            [{'name': 'foo', 'value': '@Microsoft.KeyVault(SecretUri=https://kv.vault.azure.net/secrets/foo)'}],
+            'restart'
+        ])
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=MagicMock(),
+            keyvault=kv_mock
         )
+        web_app.set_cli(cli)
+
+        self.assertTrue(web_app.update_environment(env))
+        cli.asserts_commands_called(['webapp restart'])
+        cli.asserts_commands_not_called(['rest --method put'])
+
+    def test_update_environment_removed(self):
+        """
+        Ensure variables removed from the environment are removed from the settings.
+        """
+        kv_mock = self._keyvault_mock()
+        kv_mock.sync.return_value = []
+        settings_sent = []
+
+        cli = Cli([
+            [
+                {'name': 'foo', 'value': '@Microsoft.KeyVault(SecretUri=https://kv.vault.azure.net/secrets/foo)'},
+                {'name': 'other', 'value': 'value'},
+            ],
+            'invoke_app'
+        ])
+        invoke = cli.invoke
+
+        def _invoke(command, *args, **kwargs):
+            if command.startswith('rest'):
+                body = kwargs['command_args'][1][1:]
+                settings_sent.append(json.loads(Path(body).read_text(encoding='utf-8')))
+            return invoke(command, *args, **kwargs)
+        cli.invoke = _invoke
+
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=MagicMock(),
+            keyvault=kv_mock,
+            from_az={'id': '/subscriptions/sub/webapp', 'tags': {}}
+        )
+        web_app.set_cli(cli)
+
+        self.assertTrue(web_app.update_environment({}))
+        self.assertEqual(settings_sent, [{'properties': {'other': 'value'}}])
+
+    def test_update_environment_failed(self):
+        """
+        Ensure the file of the settings is removed when they can not be sent.
+        """
+        kv_mock = self._keyvault_mock()
+        kv_mock.sync.return_value = []
+        settings_paths = []
+
+        cli = Cli([[], CLIException('Forbidden')])
+        invoke = cli.invoke
+
+        def _invoke(command, *args, **kwargs):
+            if command.startswith('rest'):
+                settings_paths.append(kwargs['command_args'][1][1:])
+            return invoke(command, *args, **kwargs)
+        cli.invoke = _invoke
+
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=MagicMock(),
+            keyvault=kv_mock,
+            from_az={'id': '/subscriptions/sub/webapp', 'tags': {}}
+        )
+        web_app.set_cli(cli)
+
+        with self.assertRaises(CLIException):
+            web_app.update_environment({'foo': 'foo_value'})
+        self.assertEqual(len(settings_paths), 1)
+        self.assertFalse(Path(settings_paths[0]).exists())
+
+    def test_run_from_package_disabled(self):
+        """
+        Ensure the remote build is not disabled anymore when the package is not run.
+        """
+        settings_sent = []
+        cli = Cli([
+            [
+                {'name': 'WEBSITE_RUN_FROM_PACKAGE', 'value': '1'},
+                {'name': 'SCM_DO_BUILD_DURING_DEPLOYMENT', 'value': 'false'},
+                {'name': 'other', 'value': 'value'},
+            ],
+            'invoke_app'
+        ])
+        invoke = cli.invoke
+
+        def _invoke(command, *args, **kwargs):
+            if command.startswith('rest'):
+                body = kwargs['command_args'][1][1:]
+                settings_sent.append(json.loads(Path(body).read_text(encoding='utf-8')))
+            return invoke(command, *args, **kwargs)
+        cli.invoke = _invoke
+
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=MagicMock(),
+            keyvault=self._keyvault_mock(),
+            from_az={'id': '/subscriptions/sub/webapp', 'tags': {}}
+        )
+        web_app.set_cli(cli)
+
+        self.assertTrue(web_app.run_from_package(False))
+        self.assertEqual(settings_sent, [{'properties': {'other': 'value'}}])
 
     def test_deployment_in_progress(self):
         """
@@ -73,6 +228,75 @@ class TestWebApp(unittest.TestCase):
 
         self.assertTrue(web_app.deployment_in_progress())
 
+    def test_slot(self):
+        """
+        Ensure slot commands target the slot.
+        """
+        cli = Cli(['deployed'])
+        web_app = self._get_webapp(cli=cli)
+        slot = web_app.slot('staging')
+        slot._from_az['enabledHostNames'] = ['webapp-staging.scm.azurewebsites.net']  # pylint: disable=protected-access
+
+        with patch('weblodge._azure.web_app.Kudu') as kudu:
+            slot.deploy('dist/azwebapp.zip', b'{}')
+
+        self.assertEqual(slot.name, web_app.name)
+        cli.asserts_commands_called(['deployment source config-zip', '--slot staging'])
+        kudu.assert_called_once()
+        self.assertEqual(kudu.call_args[0][0], 'webapp-staging.scm.azurewebsites.net')
+        # Files kept from the previous deployments are removed, the new manifest is kept.
+        kudu.return_value.delete_folder.assert_called_once_with('site/weblodge')
+        kudu.return_value.put_file.assert_called_once_with('site/weblodge/weblodge.manifest', b'{}')
+
+    def test_deploy_files(self):
+        """
+        Ensure the updated files are kept outside of the application built remotely,
+        with the files removed since the last full deployment.
+        """
+        web_app = self._get_webapp()
+        package = io.BytesIO()
+        with zipfile.ZipFile(package, 'w') as zipf:
+            zipf.writestr('app.py', 'app')
+            zipf.writestr('restored.py', 'restored')
+
+        with patch.object(WebApp, 'kudu') as kudu:
+            kudu.get_file.return_value = b'old.py\nrestored.py'
+            web_app.deploy_files(package.getvalue(), ['removed.py'], b'{}')
+
+        kudu.get_file.assert_called_once_with('site/weblodge/removed')
+        kudu.extract_zip.assert_called_once_with('site/weblodge/files', package.getvalue())
+        self.assertEqual(kudu.put_file.call_args_list[0][0], ('site/weblodge/removed', b'old.py\nremoved.py'))
+        self.assertEqual(kudu.put_file.call_args_list[1][0], ('site/weblodge/weblodge.manifest', b'{}'))
+
+    def test_slot_exists(self):
+        """
+        Ensure the slot existence is checked on the WebApp slots.
+        """
+        web_app = self._get_webapp(cli=Cli([[{'name': 'staging'}], [{'name': 'other'}]]))
+
+        self.assertTrue(web_app.slot('staging').exists())
+        self.assertFalse(web_app.slot('staging').exists())
+
+    def test_swap(self):
+        """
+        Ensure the slot is swapped with the production.
+        """
+        cli = Cli(['swapped'])
+        web_app = self._get_webapp(cli=cli)
+
+        web_app.swap('staging')
+
+        cli.asserts_commands_called(['deployment slot swap', '--slot staging --target-slot production'])
+
+    @staticmethod
+    def _keyvault_mock() -> MagicMock:
+        """
+        Return a KeyVault mock.
+        """
+        kv_mock = MagicMock()
+        kv_mock.secret_uri = lambda n: f'https://kv.vault.azure.net/secrets/{n}'
+        return kv_mock
+
     def _get_webapp(self, idx: int = 0, cli: Cli = None) -> WebApp:
         """
         Return a pre defined WebApp.
@@ -0,0 +1,71 @@
+"""
+Test the low level operations on the package archive.
+"""
+import io
+import os
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from weblodge.web_app import archive
+
+
+class TestArchive(unittest.TestCase):
+    """
+    Test raw copy of archive members.
+    """
+    def test_copy_raw(self):
+        """
+        Ensure a member copied raw is readable in the new archive.
+        """
+        source = io.BytesIO()
+        with zipfile.ZipFile(source, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('a.txt', 'a' * 1000)
+            zipf.writestr('dir/b.txt', 'b' * 1000)
+
+        destination = io.BytesIO()
+        with zipfile.ZipFile(source) as previous, \
+             zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('new.txt', 'new')
+            for info in previous.infolist():
+                archive.write_raw(zipf, archive.copy_info(info), archive.read_raw(previous, info))
+
+        with zipfile.ZipFile(destination) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(zipf.namelist(), ['new.txt', 'a.txt', 'dir/b.txt'])
+            self.assertEqual(zipf.read('dir/b.txt').decode(), 'b' * 1000)
+            self.assertEqual(zipf.getinfo('a.txt').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_writer(self):
+        """
+        Ensure members compressed in parallel are written in the order they are added.
+        """
+        with tempfile.TemporaryDirectory() as src:
+            names = [f'file_{i}.txt' for i in range(50)]
+            for i, name in enumerate(names):
+                Path(src, name).write_text(str(i) * 1000, encoding='utf-8')
+            Path(src, 'stored.png').write_bytes(os.urandom(100))
+
+            destination = io.BytesIO()
+            with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+                 archive.Writer(zipf, workers=4, policy=_policy) as writer:
+                for name in names:
+                    writer.write(os.path.join(src, name), name)
+                writer.write(os.path.join(src, 'stored.png'), 'stored.png')
+                writer.writestr('generated.txt', 'generated')
+
+        with zipfile.ZipFile(destination) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(zipf.namelist(), names + ['stored.png', 'generated.txt'])
+            self.assertEqual(zipf.read('file_7.txt').decode(), '7' * 1000)
+            self.assertEqual(zipf.getinfo('stored.png').compress_type, zipfile.ZIP_STORED)
+
+
+def _policy(_path: str, arcname: str):
+    """
+    Store PNG files, compress the others.
+    """
+    if arcname.endswith('.png'):
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, 9
@@ -0,0 +1,48 @@
+"""
+Test the validation of ASGI applications.
+"""
+import unittest
+
+from weblodge.web_app.asgi import check_requirements, validate
+from weblodge.web_app.exceptions import FlaskAppNotFound, NotAnAsgiApplication
+
+
+class TestAsgi(unittest.TestCase):
+    """
+    Test the ASGI application of the entry point.
+    """
+    def test_valid(self):
+        """
+        Ensure the usual ASGI applications are accepted.
+        """
+        validate('from fastapi import FastAPI\n\napp = FastAPI()\n', 'app')
+        validate('import quart\napp: quart.Quart = quart.Quart(__name__)\n', 'app')
+        validate('async def app(scope, receive, send):\n    pass\n', 'app')
+        validate('from .main import app\n', 'app')
+        validate('application = Flask(__name__)\napplication = WsgiToAsgi(application)\n', 'application')
+
+    def test_not_asgi(self):
+        """
+        Ensure WSGI applications and synchronous functions are refused.
+        """
+        with self.assertRaises(NotAnAsgiApplication):
+            validate('import flask\napp = flask.Flask(__name__)\n', 'app')
+        with self.assertRaises(NotAnAsgiApplication):
+            validate('def app(environ, start_response):\n    pass\n', 'app')
+
+    def test_not_found(self):
+        """
+        Ensure a missing application is reported.
+        """
+        for source in ('application = FastAPI()\n', 'def f():\n    app = FastAPI()\n', 'app = ('):
+            with self.assertRaises(FlaskAppNotFound):
+                validate(source, 'app')
+
+    def test_check_requirements(self):
+        """
+        Ensure missing uvicorn and WebSockets support are reported.
+        """
+        self.assertEqual(check_requirements({'fastapi': set(), 'uvicorn': {'standard'}}), [])
+        self.assertEqual(check_requirements({'uvicorn': set(), 'websockets': set()}), [])
+        self.assertEqual(len(check_requirements({'uvicorn': set()})), 1)
+        self.assertIn('uvicorn', check_requirements({'fastapi': set()})[0])
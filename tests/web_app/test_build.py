@@ -0,0 +1,523 @@
+"""
+Test the build function.
+"""
+import io
+import os
+import sys
+import json
+import hashlib
+import shutil
+import zipfile
+import subprocess
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from weblodge.web_app import archive
+from weblodge.web_app.build import BuildConfig, build
+from weblodge.web_app.manifest import Manifest
+from weblodge.web_app.exceptions import DependenciesInstallationFailed, BytecodeCompilationFailed, \
+    PackageSizeBudgetExceeded, NotAnAsgiApplication, InvalidCompressionWorkers
+
+
+# Bytecode is compiled by the running interpreter during the tests.
+_PYTHON_VERSION = '.'.join(map(str, sys.version_info[:2]))
+
+
+class TestBuild(unittest.TestCase):  # pylint: disable=too-many-public-methods
+    """
+    Test build function.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.mkdtemp()
+        self.dist = os.path.join(self.src, 'dist')
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n', encoding='utf-8')
+        Path(self.src, 'requirements.txt').write_text('flask\n', encoding='utf-8')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.src)
+        return super().tearDown()
+
+    def test_default(self):
+        """
+        Ensure the package contains the application and the generated files.
+        """
+        Path(self.src, 'templates').mkdir()
+        Path(self.src, 'templates', 'index.html').write_text('<p>Hello</p>', encoding='utf-8')
+
+        build(self._config())
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertEqual(
+                sorted(zipf.namelist()),
+                [
+                    '.deployment', 'app.py', 'requirements.txt', 'templates/index.html',
+                    'weblodge.manifest', 'weblodge.startup'
+                ]
+            )
+            self.assertIn('SCM_DO_BUILD_DURING_DEPLOYMENT = true', zipf.read('.deployment').decode())
+            self.assertEqual(
+                zipf.read('weblodge.startup').decode(),
+                'gunicorn --bind=0.0.0.0 --workers 3 --worker-class gthread --threads 4 '
+                '--worker-tmp-dir /dev/shm --timeout 120 --graceful-timeout 30 --keep-alive 75 '
+                '--max-requests 500 --max-requests-jitter 50 --backlog 64 --limit-request-line 4094 app:app'
+            )
+            site_manifest = json.loads(zipf.read('weblodge.manifest'))
+            app = hashlib.sha256(Path(self.src, 'app.py').read_bytes()).hexdigest()
+            self.assertEqual(site_manifest['app.py'], f'sha256:{app}')
+            info = zipf.getinfo('weblodge.startup')
+            self.assertEqual(site_manifest['weblodge.startup'], f'{info.CRC:08x}:{info.file_size}')
+            self.assertNotIn('weblodge.manifest', site_manifest)
+
+    @patch('weblodge.web_app.build.subprocess.run')
+    def test_local_dependencies(self, run: MagicMock):
+        """
+        Ensure dependencies are installed for the Azure runtime and added to the package.
+        """
+        def _install(cmd, **_kwargs):
+            target = Path(cmd[cmd.index('--target') + 1])
+            (target / 'flask').mkdir()
+            (target / 'flask' / '__init__.py').write_text('', encoding='utf-8')
+            return MagicMock(returncode=0)
+        run.side_effect = _install
+
+        build(self._config(dependencies='local'))
+
+        cmd = run.call_args[0][0]
+        self.assertIn('--only-binary=:all:', cmd)
+        self.assertEqual(cmd[cmd.index('--platform') + 1], BuildConfig.platform)
+        self.assertEqual(cmd[cmd.index('--python-version') + 1], '3.10')
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertIn('.python_packages/lib/site-packages/flask/__init__.py', zipf.namelist())
+            self.assertIn('SCM_DO_BUILD_DURING_DEPLOYMENT = false', zipf.read('.deployment').decode())
+            self.assertIn(
+                '--pythonpath .python_packages/lib/site-packages',
+                zipf.read('weblodge.startup').decode()
+            )
+
+    @patch('weblodge.web_app.build.subprocess.run')
+    def test_local_dependencies_failed(self, run: MagicMock):
+        """
+        Ensure an installation failure is raised.
+        """
+        run.return_value = MagicMock(returncode=1, stderr='No matching distribution')
+
+        with self.assertRaises(DependenciesInstallationFailed):
+            build(self._config(dependencies='local'))
+
+    @patch('weblodge.web_app.build.subprocess.run')
+    def test_wheelhouse(self, run: MagicMock):
+        """
+        Ensure wheels are downloaded once, added to the package and installed offline.
+        """
+        def _download(cmd, **_kwargs):
+            dest = Path(cmd[cmd.index('--dest') + 1])
+            (dest / 'flask-3.0.0-py3-none-any.whl').write_bytes(b'wheel')
+            return MagicMock(returncode=0)
+        run.side_effect = _download
+
+        config = self._config(dependencies='wheelhouse')
+        config.wheelhouse_cache = os.path.join(self.src, 'cache')
+        build(config)
+        build(config)
+
+        run.assert_called_once()
+        cmd = run.call_args[0][0]
+        self.assertEqual(cmd[3], 'download')
+        self.assertIn('--only-binary=:all:', cmd)
+        self.assertEqual(len(os.listdir(config.wheelhouse_cache)), 1)
+        with zipfile.ZipFile(config.package_path) as zipf:
+            self.assertEqual(zipf.read('wheelhouse/flask-3.0.0-py3-none-any.whl'), b'wheel')
+            self.assertEqual(
+                zipf.read('requirements.txt').decode(),
+                '--no-index\n--find-links wheelhouse\nflask\n'
+            )
+            self.assertIn('SCM_DO_BUILD_DURING_DEPLOYMENT = true', zipf.read('.deployment').decode())
+
+        # New requirements are downloaded in another wheelhouse.
+        Path(self.src, 'requirements.txt').write_text('flask\nrequests\n', encoding='utf-8')
+        build(config)
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual(len(os.listdir(config.wheelhouse_cache)), 2)
+
+        # Included requirements and constraints are part of the cache key.
+        Path(self.src, 'requirements.txt').write_text('flask\n-r base.txt\n', encoding='utf-8')
+        Path(self.src, 'base.txt').write_text('--constraint=constraints.txt\nrequests\n', encoding='utf-8')
+        Path(self.src, 'constraints.txt').write_text('requests==2.31.0\n', encoding='utf-8')
+        build(config)
+        build(config)
+        self.assertEqual(run.call_count, 3)
+        Path(self.src, 'constraints.txt').write_text('requests==2.32.0\n', encoding='utf-8')
+        build(config)
+        self.assertEqual(run.call_count, 4)
+        self.assertEqual(len(os.listdir(config.wheelhouse_cache)), 4)
+
+    @patch('weblodge.web_app.build.subprocess.run')
+    def test_wheelhouse_failed(self, run: MagicMock):
+        """
+        Ensure a failed download is not cached.
+        """
+        run.return_value = MagicMock(returncode=1, stderr='No matching distribution')
+        config = self._config(dependencies='wheelhouse')
+        config.wheelhouse_cache = os.path.join(self.src, 'cache')
+
+        with self.assertRaises(DependenciesInstallationFailed):
+            build(config)
+        self.assertEqual(os.listdir(config.wheelhouse_cache), [])
+
+    def test_tier_sizing(self):
+        """
+        Ensure gunicorn is sized for the tier and uses the asynchronous library required.
+        """
+        Path(self.src, 'requirements.txt').write_text('flask\ngevent>=23.9  # Async.\n', encoding='utf-8')
+
+        build(self._config(tier='P3v3'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertEqual(
+                zipf.read('weblodge.startup').decode(),
+                'gunicorn --bind=0.0.0.0 --workers 17 --worker-class gevent '
+                '--worker-tmp-dir /dev/shm --timeout 120 --graceful-timeout 30 --keep-alive 75 '
+                '--max-requests 1882 --max-requests-jitter 188 --backlog 512 --limit-request-line 4094 app:app'
+            )
+
+    def test_tier_case(self):
+        """
+        Ensure the tier upper-cased by the deployment is known.
+        """
+        with self.assertNoLogs('weblodge', level='WARNING'):
+            build(self._config(tier='P3V3'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertIn('--workers 17 ', zipf.read('weblodge.startup').decode())
+        self.assertEqual(Path(self.dist, BuildConfig.tier_file).read_text(encoding='utf-8'), 'P3V3')
+
+    def test_invalid_compression_workers(self):
+        """
+        Ensure the number of compression workers is validated.
+        """
+        for workers in ('many', '-1'):
+            with self.assertRaises(InvalidCompressionWorkers):
+                build(self._config(compression_workers=workers))
+
+    def test_asgi(self):
+        """
+        Ensure ASGI applications are validated and served by uvicorn workers.
+        """
+        Path(self.src, 'app.py').write_text('from fastapi import FastAPI\napp = FastAPI()\n', encoding='utf-8')
+        Path(self.src, 'requirements.txt').write_text('fastapi\nuvicorn[standard]\n', encoding='utf-8')
+
+        with self.assertNoLogs('weblodge', level='WARNING'):
+            build(self._config(app_type='asgi'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertEqual(
+                zipf.read('weblodge.startup').decode(),
+                'gunicorn --bind=0.0.0.0 --workers 3 --worker-class uvicorn.workers.UvicornWorker '
+                '--worker-tmp-dir /dev/shm --timeout 120 --graceful-timeout 30 --keep-alive 75 '
+                '--max-requests 500 --max-requests-jitter 50 --backlog 64 --limit-request-line 4094 app:app'
+            )
+
+        Path(self.src, 'app.py').write_text('from flask import Flask\napp = Flask(__name__)\n', encoding='utf-8')
+        with self.assertRaises(NotAnAsgiApplication):
+            build(self._config(app_type='asgi'))
+
+    def test_preload(self):
+        """
+        Ensure the gunicorn configuration file is added with the preload or the warm-ups.
+        """
+        build(self._config())
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertNotIn(BuildConfig.gunicorn_config, zipf.namelist())
+
+        build(self._config(preload='true', warm_up='app:warm_up,/'))
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertTrue(
+                zipf.read('weblodge.startup').decode().endswith(
+                    '--config weblodge.gunicorn.py --preload app:app'
+                )
+            )
+            config = zipf.read(BuildConfig.gunicorn_config).decode()
+        compile(config, BuildConfig.gunicorn_config, 'exec')
+        self.assertIn('PRELOAD = True', config)
+        self.assertIn("WARM_UP = ['app:warm_up', '/']", config)
+
+    def test_serial_compression(self):
+        """
+        Ensure the package is the same with one or several compression workers.
+        """
+        for i in range(20):
+            Path(self.src, f'module_{i}.py').write_text(f'value = {i}\n' * 100, encoding='utf-8')
+
+        build(self._config(compression_workers='1'))
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            serial = [(i.filename, i.CRC, i.compress_size) for i in zipf.infolist()]
+
+        shutil.rmtree(self.dist)
+        build(self._config(compression_workers='4'))
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual([(i.filename, i.CRC, i.compress_size) for i in zipf.infolist()], serial)
+
+    def test_compression_policy(self):
+        """
+        Ensure already compressed files are stored and levels are set by pattern.
+        """
+        Path(self.src, 'logo.png').write_bytes(b'png' * 100)
+        Path(self.src, 'data.csv').write_text('a,b\n' * 100, encoding='utf-8')
+
+        with self.assertLogs('weblodge', level='INFO') as logs:
+            build(self._config(compression_levels='*.csv=0'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertEqual(zipf.getinfo('logo.png').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zipf.getinfo('data.csv').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zipf.getinfo('app.py').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertTrue(any('2 already compressed files' in line for line in logs.output))
+
+    def test_rebuild_other_policy(self):
+        """
+        Ensure files are compressed again when the compression policy changed.
+        """
+        build(self._config())
+        with patch('weblodge.web_app.archive.read_raw', wraps=archive.read_raw) as read_raw:
+            build(self._config(compression_level='1'))
+        read_raw.assert_not_called()
+
+    def test_reproducible(self):
+        """
+        Ensure two builds of the same content give the same package and digest.
+        """
+        Path(self.src, 'templates').mkdir()
+        Path(self.src, 'templates', 'index.html').write_text('<p>Hello</p>', encoding='utf-8')
+        Path(self.src, 'run.sh').write_text('#!/bin/sh\n', encoding='utf-8')
+        os.chmod(Path(self.src, 'run.sh'), 0o700)
+        config = self._config(compression_workers='4')
+
+        build(config)
+        package = Path(config.package_path).read_bytes()
+        digest = Path(config.digest_path).read_text(encoding='utf-8')
+
+        shutil.rmtree(self.dist)
+        for path in Path(self.src).rglob('*'):
+            os.utime(path, (0, 1234567890))
+        build(self._config(compression_workers='1'))
+
+        self.assertEqual(Path(config.package_path).read_bytes(), package)
+        self.assertEqual(Path(config.digest_path).read_text(encoding='utf-8'), digest)
+        with zipfile.ZipFile(config.package_path) as zipf:
+            self.assertEqual({i.date_time for i in zipf.infolist()}, {(1980, 1, 1, 0, 0, 0)})
+            self.assertEqual(zipf.getinfo('run.sh').external_attr >> 16, 0o100755)
+            self.assertEqual(zipf.getinfo('app.py').external_attr >> 16, 0o100644)
+
+    def test_output(self):
+        """
+        Ensure the package can be written in a stream, with or without the package file.
+        """
+        config = self._config()
+
+        output = _Output()
+        build(config, output)
+        self.assertFalse(os.path.exists(config.package_path))
+        self.assertFalse(os.path.exists(config.manifest_path))
+        with zipfile.ZipFile(io.BytesIO(output.data)) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertIn('app.py', zipf.namelist())
+
+        output = _Output()
+        build(config, output, tee=True)
+        self.assertEqual(Path(config.package_path).read_bytes(), output.data)
+        self.assertTrue(os.path.exists(config.manifest_path))
+
+    def test_rebuild_reuses_unchanged_files(self):
+        """
+        Ensure unchanged files are copied from the previous package and changed ones compressed.
+        """
+        Path(self.src, 'static.txt').write_text('static' * 100, encoding='utf-8')
+        config = self._config()
+        build(config)
+        self.assertTrue(os.path.exists(config.manifest_path))
+
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n# Changed\n', encoding='utf-8')
+        with patch('weblodge.web_app.archive.read_raw', wraps=archive.read_raw) as read_raw:
+            build(config)
+
+        self.assertEqual([c[0][1].filename for c in read_raw.call_args_list], ['static.txt'])
+        self.assertFalse(os.path.exists(f'{config.package_path}.tmp'))
+        with zipfile.ZipFile(config.package_path) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(zipf.read('static.txt').decode(), 'static' * 100)
+            self.assertIn('# Changed', zipf.read('app.py').decode())
+
+    @patch('weblodge.web_app.bytecode.PYTHON_VERSION', _PYTHON_VERSION)
+    def test_precompile(self):
+        """
+        Ensure the sources are compiled in unchecked hash-based bytecode, reused on the next build.
+        """
+        Path(self.src, 'package').mkdir()
+        Path(self.src, 'package', 'module.py').write_text('VALUE = 1\n', encoding='utf-8')
+        Path(self.src, 'broken.py').write_text('def broken(:\n', encoding='utf-8')
+        config = self._config(precompile='true')
+        build(config)
+
+        tag = f"cpython-{_PYTHON_VERSION.replace('.', '')}"
+        with zipfile.ZipFile(config.package_path) as zipf:
+            names = zipf.namelist()
+            self.assertIn(f'__pycache__/app.{tag}.pyc', names)
+            self.assertIn(f'package/__pycache__/module.{tag}.pyc', names)
+            self.assertNotIn(f'__pycache__/broken.{tag}.pyc', names)
+            pyc = zipf.read(f'package/__pycache__/module.{tag}.pyc')
+            self.assertEqual(pyc[:4], importlib.util.MAGIC_NUMBER)
+            # Hash-based and not checked.
+            self.assertEqual(int.from_bytes(pyc[4:8], 'little'), 0b01)
+
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n# Changed\n', encoding='utf-8')
+        with patch('weblodge.web_app.bytecode.subprocess.run', wraps=subprocess.run) as run:
+            build(config)
+        self.assertEqual(
+            [name for _, _, name in json.loads(run.call_args[1]['input'])],
+            ['app.py', 'broken.py']
+        )
+
+    def test_tree_shaking(self):
+        """
+        Ensure only the files the application can load and the kept files are packaged.
+        """
+        Path(self.src, 'app.py').write_text('from views import index\napp = Flask(__name__)\n', encoding='utf-8')
+        Path(self.src, 'views.py').write_text('def index(): pass\n', encoding='utf-8')
+        Path(self.src, 'tests').mkdir()
+        Path(self.src, 'tests', 'test_views.py').write_text('import views\n', encoding='utf-8')
+        Path(self.src, 'templates').mkdir()
+        Path(self.src, 'templates', 'index.html').write_text('<p>Hello</p>', encoding='utf-8')
+
+        build(self._config(tree_shaking='true'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertIn('views.py', zipf.namelist())
+            self.assertIn('templates/index.html', zipf.namelist())
+            self.assertNotIn('tests/test_views.py', zipf.namelist())
+
+    def test_tree_shaking_warm_up(self):
+        """
+        Ensure the modules of the warm-up callables, and the modules they import, are packaged.
+        """
+        Path(self.src, 'warm').mkdir()
+        Path(self.src, 'warm', '__init__.py').write_text('', encoding='utf-8')
+        Path(self.src, 'warm', 'cache.py').write_text('import data\ndef load(): pass\n', encoding='utf-8')
+        Path(self.src, 'data.py').write_text('', encoding='utf-8')
+        Path(self.src, 'unused.py').write_text('', encoding='utf-8')
+
+        build(self._config(tree_shaking='true', warm_up='warm.cache:load,/'))
+
+        with zipfile.ZipFile(os.path.join(self.dist, BuildConfig.package)) as zipf:
+            self.assertIn('warm/__init__.py', zipf.namelist())
+            self.assertIn('warm/cache.py', zipf.namelist())
+            self.assertIn('data.py', zipf.namelist())
+            self.assertNotIn('unused.py', zipf.namelist())
+
+    @patch('weblodge.web_app.bytecode.interpreter', MagicMock(return_value=None))
+    def test_precompile_no_interpreter(self):
+        """
+        Ensure the build fails if no interpreter of the runtime version is available.
+        """
+        with self.assertRaises(BytecodeCompilationFailed):
+            build(self._config(precompile='true'))
+
+    def test_size_budgets(self):
+        """
+        Ensure the composition is stored and the build fails above the size budgets, keeping the previous package.
+        """
+        config = self._config(size_budgets='package=1MB')
+        build(config)
+        composition = json.loads(Path(config.composition_path).read_text(encoding='utf-8'))
+        self.assertIn('app.py', composition['files'])
+        previous_package = Path(config.package_path).read_bytes()
+
+        Path(self.src, 'large.bin').write_bytes(os.urandom(2 * 1024 * 1024))
+        with self.assertRaises(PackageSizeBudgetExceeded):
+            build(self._config(size_budgets='package=1MB', size_budgets_exceeded='fail'))
+
+        self.assertEqual(Path(config.package_path).read_bytes(), previous_package)
+        self.assertFalse(os.path.exists(f'{config.package_path}.tmp'))
+
+        with self.assertLogs('weblodge', level='WARNING') as logs:
+            build(config)
+        self.assertIn("Size budget exceeded: 'package'", logs.output[0])
+
+    def test_rebuild_same_content(self):
+        """
+        Ensure a file touched without change is copied from the previous package.
+        """
+        config = self._config()
+        build(config)
+
+        app = Path(self.src, 'app.py')
+        os.utime(app, ns=(app.stat().st_atime_ns, app.stat().st_mtime_ns + 10**9))
+        with patch('weblodge.web_app.archive.read_raw', wraps=archive.read_raw) as read_raw:
+            build(config)
+
+        self.assertEqual([c[0][1].filename for c in read_raw.call_args_list], ['app.py'])
+        self.assertEqual(
+            Manifest.load(config.manifest_path).files['app.py'].mtime,
+            app.stat().st_mtime_ns
+        )
+
+    def _config(self, **kwargs) -> BuildConfig:
+        """
+        Return a build configuration of the temporary application.
+        """
+        return BuildConfig(**{
+            'src': self.src,
+            'dist': self.dist,
+            'entry_point': 'app.py',
+            'flask_app': 'app',
+            'requirements': 'requirements.txt',
+            'dependencies': 'remote',
+            'compression_workers': '0',
+            'compression_level': '9',
+            'compression_levels': '',
+            'precompile': 'false',
+            'tree_shaking': 'false',
+            'keep': 'templates,static',
+            'size_budgets': '',
+            'size_budgets_exceeded': 'warn',
+            'tier': 'F1',
+            'gunicorn_workers': 'auto',
+            'gunicorn_threads': 'auto',
+            'gunicorn_worker_class': 'auto',
+            'app_type': 'wsgi',
+            'preload': 'false',
+            'warm_up': '',
+            'gunicorn_timeout': 'auto',
+            'gunicorn_graceful_timeout': 'auto',
+            'gunicorn_keepalive': 'auto',
+            'gunicorn_max_requests': 'auto',
+            'gunicorn_max_requests_jitter': 'auto',
+            'gunicorn_backlog': 'auto',
+            'gunicorn_limit_request_line': 'auto',
+            **kwargs
+        })
+
+
+class _Output:
+    """
+    Stream that can not be seeked.
+    """
+    def __init__(self) -> None:
+        self.data = b''
+
+    def write(self, data: bytes) -> int:
+        """
+        Keep the data written.
+        """
+        self.data += data
+        return len(data)
+
+    def flush(self) -> None:
+        """
+        Nothing to flush.
+        """
@@ -0,0 +1,76 @@
+"""
+Test the package composition and the size budgets.
+"""
+import unittest
+
+from weblodge.web_app.composition import Composition, SizeBudgets, to_bytes
+from weblodge.web_app.exceptions import InvalidSizeBudget
+
+
+class TestComposition(unittest.TestCase):
+    """
+    Test the package composition.
+    """
+    def setUp(self) -> None:
+        self.composition = Composition({
+            'app.py': (1000, 400),
+            'static/logo.png': (5000, 5000),
+            'static/style.css': (2000, 500),
+            '.python_packages/lib/site-packages/flask/app.py': (3000, 1000),
+            '.python_packages/lib/site-packages/jinja2/nodes.py': (4000, 1500),
+            'LICENSE': (100, 60),
+        })
+        return super().setUp()
+
+    def test_groups(self):
+        """
+        Ensure sizes are grouped by folder, nested folders included, and by extension.
+        """
+        folders = self.composition.by_folder(['.python_packages/lib/site-packages'])
+        self.assertEqual(
+            sorted(folders),
+            ['.', '.python_packages/lib/site-packages/flask', '.python_packages/lib/site-packages/jinja2', 'static']
+        )
+        static = folders['static']
+        self.assertEqual((static.size, static.compressed, static.files), (7000, 5500, 2))
+        self.assertEqual(self.composition.by_extension()['.py'].compressed, 2900)
+        self.assertEqual(self.composition.by_extension()['(none)'].files, 1)
+        self.assertEqual(self.composition.total.compressed, 8460)
+
+    def test_report(self):
+        """
+        Ensure the report lists the largest groups and the changes since the previous package.
+        """
+        previous = Composition({'app.py': (1000, 300), 'old.py': (8000, 2000), 'static/logo.png': (5000, 5000)})
+
+        report = self.composition.report(previous)
+
+        self.assertEqual(report[0], 'Folders:')
+        self.assertTrue(report[1].startswith('  static '))
+        self.assertIn('Largest files:', report)
+        changes = report[report.index(next(line for line in report if line.startswith('Since'))) + 1:]
+        self.assertEqual(len(changes), Composition.shown)
+        self.assertTrue(any(line.split()[0] == 'old.py' and line.endswith('(removed)') for line in changes))
+        self.assertFalse(any(line.split()[0] == 'static/logo.png' for line in changes))
+
+    def test_budgets(self):
+        """
+        Ensure the exceeded budgets are reported.
+        """
+        budgets = SizeBudgets('package=8KB, static/*=1KB, *.py=10KB')
+
+        exceeded = budgets.exceeded(self.composition)
+
+        self.assertEqual(len(exceeded), 2)
+        self.assertTrue(exceeded[0].startswith("'package'"))
+        self.assertTrue(exceeded[1].startswith("'static/*'"))
+
+    def test_invalid_budgets(self):
+        """
+        Ensure invalid budgets are refused.
+        """
+        self.assertEqual(to_bytes('1.5MB'), 1572864)
+        self.assertEqual(to_bytes('100'), 100)
+        for budgets in ('10MB', 'package=ten', 'package=-1KB'):
+            with self.assertRaises(InvalidSizeBudget):
+                SizeBudgets(budgets)
@@ -0,0 +1,77 @@
+"""
+Test the compression policy.
+"""
+import os
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from weblodge.web_app.compression import CompressionPolicy
+from weblodge.web_app.exceptions import InvalidCompressionLevel
+
+
+class TestCompressionPolicy(unittest.TestCase):
+    """
+    Test the choice of the compression of the files.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.src.cleanup()
+        return super().tearDown()
+
+    def test_text(self):
+        """
+        Ensure text files are compressed at the default level.
+        """
+        path = self._file('app.py', b'print("hello")\n' * 10000)
+        self.assertEqual(CompressionPolicy('9').choose(path, 'app.py'), (zipfile.ZIP_DEFLATED, 9))
+
+    def test_incompressible_extension(self):
+        """
+        Ensure already compressed files are stored.
+        """
+        policy = CompressionPolicy('9')
+        path = self._file('font.WOFF2', b'a' * 100)
+        self.assertEqual(policy.choose(path, 'static/font.WOFF2'), (zipfile.ZIP_STORED, None))
+        self.assertEqual(policy.stored_files, 1)
+        self.assertEqual(policy.stored_bytes, 100)
+        self.assertGreater(policy.time_saved(), 0)
+
+    def test_trial(self):
+        """
+        Ensure random content is stored after a trial.
+        """
+        policy = CompressionPolicy('9')
+        path = self._file('data.bin', os.urandom(CompressionPolicy.trial_min_size))
+        self.assertEqual(policy.choose(path, 'data.bin'), (zipfile.ZIP_STORED, None))
+
+    def test_levels(self):
+        """
+        Ensure the first matching pattern sets the level.
+        """
+        policy = CompressionPolicy('6', 'data/*.csv=0, *.csv=1')
+        path = self._file('data.csv', b'a,b\n' * 100)
+        self.assertEqual(policy.choose(path, 'data/data.csv'), (zipfile.ZIP_STORED, None))
+        self.assertEqual(policy.choose(path, 'other.csv'), (zipfile.ZIP_DEFLATED, 1))
+        self.assertEqual(policy.choose(path, 'other.txt'), (zipfile.ZIP_DEFLATED, 6))
+        self.assertEqual(policy.digest, '6,data/*.csv=0,*.csv=1')
+
+    def test_invalid_levels(self):
+        """
+        Ensure invalid levels are rejected.
+        """
+        for level, levels in [('10', ''), ('high', ''), ('9', '*.csv'), ('9', '*.csv=fast')]:
+            with self.assertRaises(InvalidCompressionLevel):
+                CompressionPolicy(level, levels)
+
+    def _file(self, name: str, content: bytes) -> str:
+        """
+        Create a file and return its path.
+        """
+        path = Path(self.src.name, name)
+        path.write_bytes(content)
+        return str(path)
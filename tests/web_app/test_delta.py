@@ -0,0 +1,196 @@
+"""
+Test the delta between a package and the deployed application.
+"""
+import io
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from weblodge._azure.web_app import WebApp
+from weblodge.web_app.build import BuildConfig, build
+from weblodge.web_app.delta import delta
+from weblodge.web_app.deploy import DeploymentConfig, deploy
+
+
+class _Kudu:
+    """
+    Files of a WebApp kept in memory.
+    """
+    def __init__(self) -> None:
+        self.files = {}
+
+    def get_file(self, path):
+        """
+        Return the content of a file, None if it does not exist.
+        """
+        return self.files.get(path)
+
+    def put_file(self, path, data):
+        """
+        Write a file.
+        """
+        self.files[path] = data
+
+    def delete_folder(self, path):
+        """
+        Delete a folder and its content.
+        """
+        self.files = {name: data for name, data in self.files.items() if not name.startswith(f'{path}/')}
+
+    def extract_zip(self, path, data):
+        """
+        Extract a zip in a folder.
+        """
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            for name in zipf.namelist():
+                self.files[f'{path}/{name}'] = zipf.read(name)
+
+
+class TestDelta(unittest.TestCase):
+    """
+    Test the files to upload and to remove.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.mkdtemp()
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n', encoding='utf-8')
+        Path(self.src, 'requirements.txt').write_text('flask\n', encoding='utf-8')
+        Path(self.src, 'old.py').write_text('old\n', encoding='utf-8')
+        Path(self.src, 'static.css').write_text('body {}\n', encoding='utf-8')
+        self.config = BuildConfig(
+            src=self.src,
+            dist=os.path.join(self.src, 'dist'),
+            entry_point='app.py',
+            flask_app='app',
+            requirements='requirements.txt',
+            dependencies='remote',
+            compression_workers='1',
+            compression_level='9',
+            compression_levels='',
+            precompile='false',
+            tree_shaking='false',
+            keep='',
+            size_budgets='',
+            size_budgets_exceeded='warn',
+            tier='F1',
+            gunicorn_workers='auto',
+            gunicorn_threads='auto',
+            gunicorn_worker_class='auto',
+            app_type='wsgi',
+            preload='false',
+            warm_up='',
+            gunicorn_timeout='auto',
+            gunicorn_graceful_timeout='auto',
+            gunicorn_keepalive='auto',
+            gunicorn_max_requests='auto',
+            gunicorn_max_requests_jitter='auto',
+            gunicorn_backlog='auto',
+            gunicorn_limit_request_line='auto'
+        )
+        build(self.config)
+        with zipfile.ZipFile(self.config.package_path) as zipf:
+            self.deployed = zipf.read(BuildConfig.site_manifest)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.src)
+        return super().tearDown()
+
+    def test_changes(self):
+        """
+        Ensure only changed and added files are in the delta package.
+        """
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n# Changed\n', encoding='utf-8')
+        Path(self.src, 'new.py').write_text('new\n', encoding='utf-8')
+        os.remove(Path(self.src, 'old.py'))
+        build(self.config)
+
+        changes = delta(self.config.package_path, self.deployed)
+
+        self.assertEqual(changes.changed, ['app.py', 'new.py'])
+        self.assertEqual(changes.removed, ['old.py'])
+        with zipfile.ZipFile(io.BytesIO(changes.package)) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(zipf.namelist(), ['app.py', 'new.py', BuildConfig.site_manifest])
+
+    def test_unchanged(self):
+        """
+        Ensure an unchanged application has an empty delta.
+        """
+        changes = delta(self.config.package_path, self.deployed)
+
+        self.assertEqual(changes.changed, [])
+        self.assertEqual(changes.removed, [])
+
+    def test_full_deployment(self):
+        """
+        Ensure a full deployment is required without deployed manifest or with new requirements.
+        """
+        self.assertIsNone(delta(self.config.package_path, None))
+        self.assertIsNone(delta(self.config.package_path, b'not json'))
+
+        Path(self.src, 'requirements.txt').write_text('flask\nrequests\n', encoding='utf-8')
+        build(self.config)
+        self.assertIsNone(delta(self.config.package_path, self.deployed))
+
+    def test_upload_remote(self):
+        """
+        Ensure a remotely built application is updated with the changed files only.
+        The application built remotely is compressed: deployed files are never read from it.
+        """
+        kudu = _Kudu()
+        app_service = MagicMock()
+        app_service.sku.name = 'F1'
+        web_app = WebApp(
+            name='webapp',
+            resource_group=MagicMock(),
+            app_service=app_service,
+            keyvault=MagicMock(),
+            from_az={}
+        )
+        azure_service = MagicMock()
+        azure_service.get_web_app.return_value = web_app
+        deployment_config = DeploymentConfig(
+            subdomain='webapp',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist=self.config.dist,
+            env_file='.donotexist',
+            log_level='info',
+        )
+
+        # Only the application upload is exercised.
+        infrastructure = patch.multiple(
+            WebApp, exists=MagicMock(return_value=True), update=MagicMock(), set_log_level=MagicMock(),
+            run_from_package=MagicMock()
+        )
+        with infrastructure, patch.object(WebApp, 'kudu', kudu), patch.object(WebApp, '_invoke') as invoke:
+            # First deployment: the whole package is uploaded.
+            deploy(azure_service, deployment_config)
+            commands = [c[0][0] for c in invoke.call_args_list]
+            self.assertEqual(len(commands), 1)
+            self.assertIn('deployment source config-zip', commands[0])
+            self.assertEqual(kudu.files, {'site/weblodge/weblodge.manifest': self.deployed})
+
+            # Second deployment: only the changes are uploaded, then the WebApp restarts.
+            Path(self.src, 'app.py').write_text('app = Flask(__name__)\n# Changed\n', encoding='utf-8')
+            os.remove(Path(self.src, 'old.py'))
+            build(self.config)
+            invoke.reset_mock()
+            deploy(azure_service, deployment_config)
+            commands = [c[0][0] for c in invoke.call_args_list]
+            self.assertEqual(len(commands), 1)
+            self.assertIn('restart', commands[0])
+            self.assertEqual(kudu.files['site/weblodge/files/app.py'], b'app = Flask(__name__)\n# Changed\n')
+            self.assertEqual(kudu.files['site/weblodge/removed'], b'old.py')
+            with zipfile.ZipFile(self.config.package_path) as zipf:
+                self.assertEqual(kudu.files['site/weblodge/weblodge.manifest'], zipf.read(BuildConfig.site_manifest))
+
+            # Third deployment: the package is already deployed.
+            invoke.reset_mock()
+            deploy(azure_service, deployment_config)
+            invoke.assert_not_called()
@@ -2,17 +2,28 @@
 Test the deploy fonction.
 """
 import os
+import shutil
+import hashlib
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from weblodge.web_app import NoMoreFreeApplicationAvailable
-from weblodge.web_app.deploy import DeploymentConfig, deploy
+from weblodge.web_app import NoMoreFreeApplicationAvailable, WarmUpFailed
+from weblodge.web_app.delta import Delta
+from weblodge.web_app.deploy import DeploymentConfig, deploy, update
 
 
 class TestDeploy(unittest.TestCase):
     """
     Test deploy function.
     """
+    def setUp(self) -> None:
+        # Packages are not built.
+        package_manifest = patch('weblodge.web_app.deploy.package_manifest', return_value=b'manifest')
+        package_manifest.start()
+        self.addCleanup(package_manifest.stop)
+
     def test_web_app_exists(self):
         """
         Ensure no infrastructure is created if WebApp exists and correctly configured.
@@ -24,6 +35,7 @@ class TestDeploy(unittest.TestCase):
         azure_service.get_web_app.return_value = web_app
         web_app.tier.name = tier
         web_app.tags = {'managedby': 'weblodge', 'environment': 'test'}
+        web_app.deployed_manifest.return_value = None
 
         log_level = MagicMock()
         azure_service.log_levels.return_value = log_level
@@ -43,10 +55,224 @@ class TestDeploy(unittest.TestCase):
 
         web_app.create.assert_not_called()
         web_app.deploy.assert_called_once_with(
-            os.path.join(deployment_config.dist, deployment_config.package)
+            os.path.join(deployment_config.dist, deployment_config.package),
+            b'manifest'
         )
         log_level.information.assert_called_once()
         web_app.update_environment.assert_not_called()
+        web_app.run_from_package.assert_called_once_with(False, '')
+
+    def test_run_from_package_url(self):
+        """
+        Ensure the package is not uploaded when the WebApp runs a package from an URL.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'F1'
+        azure_service.get_web_app.return_value = web_app
+
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+            dependencies='local',
+            package_url='https://storage/azwebapp.zip',
+        )
+
+        deploy(azure_service, deployment_config)
+
+        web_app.run_from_package.assert_called_once_with(True, 'https://storage/azwebapp.zip')
+        web_app.deploy.assert_not_called()
+
+    def test_stream(self):
+        """
+        Ensure the package built is streamed to the WebApp without the package file.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'F1'
+        azure_service.get_web_app.return_value = web_app
+        uploaded = []
+        web_app.deploy_stream.side_effect = uploaded.extend
+
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+            stream=True,
+        )
+
+        deploy(azure_service, deployment_config, lambda output: output.write(b'package'))
+
+        self.assertEqual(b''.join(uploaded), b'package')
+        web_app.deploy.assert_not_called()
+
+    @patch('weblodge.web_app.deploy.package_digest', MagicMock(return_value='local'))
+    @patch('weblodge.web_app.deploy.delta')
+    def test_delta(self, delta: MagicMock):
+        """
+        Ensure only the changed files are uploaded when the application is deployed.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'F1'
+        azure_service.get_web_app.return_value = web_app
+        web_app.deployed_manifest.return_value = b'deployed'
+        delta.return_value = Delta(b'PK', ['app.py'], ['old.py'], b'manifest')
+
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+        )
+        deploy(azure_service, deployment_config)
+
+        delta.assert_called_once_with(os.path.join('dist', 'azwebapp.zip'), b'deployed')
+        web_app.deployed_manifest.assert_called_once_with()
+        web_app.deploy_files.assert_called_once_with(b'PK', ['old.py'], b'manifest')
+        web_app.restart.assert_called_once()
+        web_app.deploy.assert_not_called()
+
+    @patch('weblodge.web_app.deploy.package_digest')
+    def test_already_deployed(self, package_digest: MagicMock):
+        """
+        Ensure nothing is uploaded when the package is already deployed.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'F1'
+        azure_service.get_web_app.return_value = web_app
+        web_app.deployed_manifest.return_value = b'{"app.py": "0a1b2c3d:10"}'
+        package_digest.return_value = hashlib.sha256(web_app.deployed_manifest.return_value).hexdigest()
+
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+            dependencies='local',
+        )
+        with self.assertLogs('weblodge', level='INFO') as logs:
+            deploy(azure_service, deployment_config)
+
+        self.assertTrue(any('already deployed' in line and '--full-deploy' in line for line in logs.output))
+        package_digest.assert_called_once_with(os.path.join('dist', 'azwebapp.zip'))
+        web_app.deploy.assert_not_called()
+        web_app.deploy_files.assert_not_called()
+
+    def test_built_for_another_tier(self):
+        """
+        Ensure a warning is logged when the package is sized for another tier.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        azure_service.get_web_app.return_value = web_app
+        web_app.deployed_manifest.return_value = None
+        dist = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dist)
+        Path(dist, 'azwebapp.tier').write_text('F1', encoding='utf-8')
+
+        for tier, warned in (('f1', False), ('P1v3', True)):
+            deployment_config = DeploymentConfig(
+                subdomain='test',
+                tier=tier,
+                location='westeurope',
+                environment='test',
+                dist=dist,
+                env_file='.donotexist',
+                log_level='info',
+            )
+            with self.assertLogs('weblodge', level='INFO') as logs:
+                update(azure_service, deployment_config)
+            self.assertEqual(
+                any("sized for the tier 'F1'" in line for line in logs.output),
+                warned
+            )
+
+    def test_update(self):
+        """
+        Ensure only the application is uploaded on update, the infrastructure is unchanged.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        azure_service.get_web_app.return_value = web_app
+        web_app.deployed_manifest.return_value = None
+
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='F1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+        )
+        update(azure_service, deployment_config)
+
+        web_app.deploy.assert_called_once_with(os.path.join('dist', 'azwebapp.zip'), b'manifest')
+        web_app.update.assert_not_called()
+        web_app.create.assert_not_called()
+        web_app.update_environment.assert_not_called()
+        web_app.set_log_level.assert_not_called()
+
+    def test_slot(self):
+        """
+        Ensure the application is deployed on the slot, warmed up then swapped.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'S1'
+        azure_service.get_web_app.return_value = web_app
+        slot = web_app.slot.return_value
+        slot.exists.return_value = False
+        slot.deployed_manifest.return_value = None
+        slot.warm_up.return_value = True
+
+        deploy(azure_service, self._slot_config())
+
+        web_app.slot.assert_called_once_with('staging')
+        slot.create.assert_called_once()
+        slot.deploy.assert_called_once()
+        web_app.deploy.assert_not_called()
+        slot.warm_up.assert_called_once_with(['/', '/health'], 60)
+        web_app.swap.assert_called_once_with('staging')
+
+    def test_slot_warm_up_failed(self):
+        """
+        Ensure the slot is not swapped if it does not respond.
+        """
+        azure_service = self._default_asp()
+        web_app = MagicMock()
+        web_app.exists.return_value = True
+        web_app.tier.name = 'S1'
+        azure_service.get_web_app.return_value = web_app
+        web_app.slot.return_value.warm_up.return_value = False
+        web_app.slot.return_value.deployed_manifest.return_value = None
+
+        with self.assertRaises(WarmUpFailed):
+            deploy(azure_service, self._slot_config())
+
+        web_app.swap.assert_not_called()
 
     def test_no_more_free_app(self):
         """
@@ -72,6 +298,25 @@ class TestDeploy(unittest.TestCase):
         with self.assertRaises(NoMoreFreeApplicationAvailable):
             deploy(azure_service, deployment_config)
 
+    @staticmethod
+    def _slot_config() -> DeploymentConfig:
+        """
+        Return a deployment configuration with a slot.
+        """
+        deployment_config = DeploymentConfig(
+            subdomain='test',
+            tier='S1',
+            location='westeurope',
+            environment='test',
+            dist='dist',
+            env_file='.donotexist',
+            log_level='info',
+            slot='staging',
+            warm_up_paths='/, /health',
+            warm_up_timeout='60',
+        )
+        return deployment_config
+
     def _default_asp(self):
         """
         Return a AppServicePlan mock.
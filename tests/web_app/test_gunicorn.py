@@ -0,0 +1,161 @@
+"""
+Test the gunicorn settings.
+"""
+import gc
+import unittest
+from unittest.mock import MagicMock
+
+from weblodge._azure import get_hardware
+from weblodge.web_app.gunicorn import GunicornSettings, GunicornTuning, config_file, detect_worker_class, required, \
+    warm_up_targets, warm_up_modules
+from weblodge.web_app.exceptions import InvalidGunicornSetting, InvalidWarmUp
+
+
+class TestGunicornSettings(unittest.TestCase):
+    """
+    Test the gunicorn settings computed from the tier.
+    """
+    def test_workers_by_tier(self):
+        """
+        Ensure the workers follow the cores, bounded by the memory.
+        """
+        workers = {
+            tier: GunicornSettings.for_tier(get_hardware(tier), 'flask').workers
+            for tier in ('F1', 'B1', 'B3', 'P3v3', 'P5mv3')
+        }
+        self.assertEqual(workers, {'F1': 3, 'B1': 3, 'B3': 9, 'P3v3': 17, 'P5mv3': 65})
+
+        settings = GunicornSettings.for_tier({'cores': 4, 'ram': 0.5}, 'flask')
+        self.assertEqual(settings.workers, 2)
+
+    def test_unknown_tier(self):
+        """
+        Ensure an unknown tier is sized as the smallest one.
+        """
+        self.assertEqual(GunicornSettings.for_tier(None, 'flask').workers, 3)
+
+    def test_worker_class(self):
+        """
+        Ensure asynchronous libraries are detected in the requirements.
+        """
+        self.assertEqual(detect_worker_class('flask==3.0\n# gevent\n'), 'gthread')
+        self.assertEqual(detect_worker_class('flask\nGevent[recommended]>=23; python_version>"3"\n'), 'gevent')
+        self.assertEqual(detect_worker_class('eventlet\n'), 'eventlet')
+        self.assertEqual(detect_worker_class('gevent-websocket\n'), 'gthread')
+
+        settings = GunicornSettings.for_tier(get_hardware('B1'), 'gevent')
+        self.assertEqual(settings.threads, 1)
+        self.assertNotIn('--threads 1', settings.options())
+
+    def test_user_settings(self):
+        """
+        Ensure the user settings replace the computed ones.
+        """
+        settings = GunicornSettings.for_tier(get_hardware('P3v3'), 'flask', '2', '8', 'sync')
+
+        self.assertEqual(
+            settings.options(),
+            ['--workers 2', '--worker-class sync', '--threads 8', '--worker-tmp-dir /dev/shm']
+        )
+        for workers in ('0', 'many'):
+            with self.assertRaises(InvalidGunicornSetting):
+                GunicornSettings.for_tier(None, 'flask', workers)
+
+    def test_asgi(self):
+        """
+        Ensure ASGI applications are served by uvicorn workers without threads.
+        """
+        settings = GunicornSettings.for_tier(get_hardware('B1'), 'fastapi\nuvicorn[standard]\n', asgi=True)
+        self.assertEqual(
+            settings.options(),
+            ['--workers 3', '--worker-class uvicorn.workers.UvicornWorker', '--worker-tmp-dir /dev/shm']
+        )
+
+        settings = GunicornSettings.for_tier(None, 'fastapi', worker_class='uvicorn-h11', asgi=True)
+        self.assertIn('--worker-class uvicorn.workers.UvicornH11Worker', settings.options())
+
+        with self.assertRaises(InvalidGunicornSetting):
+            GunicornSettings.for_tier(None, 'fastapi', worker_class='gevent', asgi=True)
+        with self.assertRaises(InvalidGunicornSetting):
+            GunicornSettings.for_tier(None, 'flask', worker_class='uvicorn')
+
+    def test_required(self):
+        """
+        Ensure the distributions and their extras are read from the requirements.
+        """
+        self.assertEqual(
+            required('FastAPI==0.110\nuvicorn[standard, Gunicorn]>=0.29  # Server.\n-r other.txt\n'),
+            {'fastapi': set(), 'uvicorn': {'standard', 'gunicorn'}}
+        )
+
+    def test_warm_up_targets(self):
+        """
+        Ensure the warm-ups are URL paths or callables.
+        """
+        self.assertEqual(warm_up_targets(' app.cache:load, /health?full=1,'), ['app.cache:load', '/health?full=1'])
+        self.assertEqual(warm_up_targets(''), [])
+        for warm_up in ('app.cache', 'app:load()', 'http://localhost/'):
+            with self.assertRaises(InvalidWarmUp):
+                warm_up_targets(warm_up)
+        with self.assertRaises(InvalidWarmUp):
+            warm_up_targets('/health', asgi=True)
+        self.assertEqual(warm_up_modules(['app.cache:load', '/health', 'app:warm_up']), ['app.cache', 'app'])
+
+    def test_config_file(self):
+        """
+        Ensure the configuration file freezes the master objects and warms up the workers.
+        """
+        namespace = {}
+        try:
+            exec(config_file(True, ['gc:collect', '/health?full=1', 'gc:missing']), namespace)  # pylint: disable=exec-used
+            self.assertFalse(gc.isenabled())
+            namespace['pre_fork'](None, None)
+            self.assertGreater(gc.get_freeze_count(), 0)
+            namespace['post_fork'](None, None)
+            self.assertTrue(gc.isenabled())
+        finally:
+            gc.unfreeze()
+            gc.enable()
+
+        requests = []
+        def app(environ, start_response):
+            requests.append((environ['REQUEST_METHOD'], environ['PATH_INFO'], environ['QUERY_STRING']))
+            start_response('200 OK', [])
+            return [b'ok']
+        worker = MagicMock(wsgi=app)
+        namespace['post_worker_init'](worker)
+
+        self.assertEqual(requests, [('GET', '/health', 'full=1')])
+        worker.log.warning.assert_called_once()
+        self.assertIn('gc:missing', worker.log.warning.call_args.args[0])
+
+    def test_tuning_by_tier(self):
+        """
+        Ensure workers with less memory are recycled sooner and the backlog follows the cores.
+        """
+        tuning = {
+            tier: GunicornTuning.for_tier(get_hardware(tier), 3, {})
+            for tier in ('F1', 'P1mv3', 'P5mv3')
+        }
+        self.assertEqual({t: v.max_requests for t, v in tuning.items()}, {'F1': 500, 'P1mv3': 5333, 'P5mv3': 10000})
+        self.assertEqual({t: v.backlog for t, v in tuning.items()}, {'F1': 64, 'P1mv3': 128, 'P5mv3': 2048})
+        self.assertEqual(tuning['F1'].max_requests_jitter, 50)
+        self.assertEqual(tuning['F1'].timeout, 120)
+
+    def test_user_tuning(self):
+        """
+        Ensure the user tuning replaces the computed one.
+        """
+        tuning = GunicornTuning.for_tier(None, 3, {'timeout': '30', 'max_requests': '0', 'keepalive': 'auto'})
+
+        self.assertEqual(
+            tuning.options(),
+            [
+                '--timeout 30', '--graceful-timeout 30', '--keep-alive 75',
+                '--backlog 64', '--limit-request-line 4094'
+            ]
+        )
+        self.assertEqual(GunicornTuning.for_tier(None, 3, {'max_requests': '2000'}).max_requests_jitter, 200)
+        for settings in ({'timeout': '0'}, {'backlog': 'large'}, {'keepalive': '-1'}):
+            with self.assertRaises(InvalidGunicornSetting):
+                GunicornTuning.for_tier(None, 3, settings)
@@ -0,0 +1,213 @@
+"""
+Test the logs streaming.
+"""
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from weblodge._azure.exceptions import KuduException
+from weblodge.web_app.logs import LogsConfig, LogBuffer, logs, accept, _new_lines
+
+
+class TestLogs(unittest.TestCase):
+    """
+    Test the logs streaming.
+    """
+    def setUp(self) -> None:
+        for name in ('reconnect_delay', 'max_reconnect_delay'):
+            patcher = patch.object(LogsConfig, name, 0)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        # The streams are stopped when the logs function returns.
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('logs-')])
+        return super().tearDown()
+
+    def test_accept_filter(self):
+        """
+        Ensure lines are filtered by regular expression.
+        """
+        config = self._config(log_filter='GET /api')
+
+        self.assertTrue(accept(config, '127.0.0.1 GET /api/users'))
+        self.assertFalse(accept(config, '127.0.0.1 GET /static/app.js'))
+
+    def test_accept_level(self):
+        """
+        Ensure lines are filtered by level and lines without level are kept.
+        """
+        config = self._config(log_min_level='warning')
+
+        self.assertTrue(accept(config, 'ERROR: database unreachable'))
+        self.assertTrue(accept(config, '[WARNING] slow request'))
+        self.assertFalse(accept(config, 'INFO:root:request received'))
+        self.assertFalse(accept(config, 'DEBUG:root:payload'))
+        self.assertTrue(accept(config, 'Starting gunicorn 21.2.0'))
+
+    def test_accept_since(self):
+        """
+        Ensure old lines are dropped.
+        """
+        config = self._config(since='10m')
+        recent = datetime.now(timezone.utc) - timedelta(minutes=1)
+        old = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        self.assertTrue(accept(config, f"{recent.strftime('%Y-%m-%dT%H:%M:%S')} recent"))
+        self.assertFalse(accept(config, f"{old.strftime('%Y-%m-%dT%H:%M:%S')} old"))
+        self.assertTrue(accept(config, 'no timestamp'))
+
+    def test_invalid_since(self):
+        """
+        Ensure invalid durations are refused.
+        """
+        with self.assertRaises(ValueError):
+            self._config(since='yesterday')
+
+    def test_buffer(self):
+        """
+        Ensure the buffer is bounded and dates the lines without timestamp.
+        """
+        buffer = LogBuffer(2)
+        self.assertIsNone(buffer.append('a'))
+        timestamp = buffer.append('2024-01-01T10:00:00 Traceback (most recent call last):')
+        self.assertEqual(buffer.append('  File "app.py", line 1'), timestamp)
+
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.lines[1], '  File "app.py", line 1')
+
+    def test_since_traceback(self):
+        """
+        Ensure the lines of an old record are dropped with it.
+        """
+        config = self._config(since='10m')
+        buffer = LogBuffer(10)
+        stream = ['2000-01-01T10:00:00 ERROR Traceback:', '  File "app.py"', 'no timestamp yet']
+
+        self.assertEqual(
+            [line for line, timestamp in _new_lines(stream, buffer, 60) if accept(config, line, timestamp)],
+            []
+        )
+        self.assertTrue(accept(config, 'no timestamp yet'))
+
+    def test_repeated_lines(self):
+        """
+        Ensure repeated lines are printed and only the replayed lines are skipped on reconnection.
+        """
+        buffer = LogBuffer(10)
+        first = ['GET /', 'heartbeat', 'heartbeat', 'GET /']
+        self.assertEqual([line for line, _ in _new_lines(first, buffer, 60)], first)
+
+        # The server replays its last lines.
+        replay = ['heartbeat', 'GET /', 'GET /', 'heartbeat']
+        self.assertEqual([line for line, _ in _new_lines(replay, buffer, 60)], ['GET /', 'heartbeat'])
+
+        self.assertEqual([line for line, _ in _new_lines(['GET /', 'heartbeat', 'x'], buffer, 60)], ['x'])
+
+        # Lines matching the buffer but not its end are new.
+        self.assertEqual(
+            [line for line, _ in _new_lines(['heartbeat', 'heartbeat', 'new'], buffer, 60)],
+            ['heartbeat', 'heartbeat', 'new']
+        )
+        self.assertEqual(buffer.lines[-3:], ['heartbeat', 'heartbeat', 'new'])
+
+    def test_replay_window(self):
+        """
+        Ensure the lines received after the replay are not held.
+        """
+        buffer = LogBuffer(10)
+        list(_new_lines(['start', 'heartbeat', 'heartbeat'], buffer, 60))
+
+        # A quiet application repeating its last line.
+        with patch('weblodge.web_app.logs.time.monotonic', side_effect=[0, 10]):
+            self.assertEqual(
+                [line for line, _ in _new_lines(['heartbeat', 'heartbeat'], buffer, 2)],
+                ['heartbeat', 'heartbeat']
+            )
+
+        # Held lines are flushed when the window is over.
+        with patch('weblodge.web_app.logs.time.monotonic', side_effect=[0, 1, 10]):
+            self.assertEqual(
+                [line for line, _ in _new_lines(['start', 'heartbeat'], buffer, 2)],
+                ['start', 'heartbeat']
+            )
+
+    def test_logs_multiplexed(self):
+        """
+        Ensure several applications are followed, prefixed and not duplicated on reconnection.
+        """
+        streams = {
+            'app1': [['line 1', 'line 2'], ['line 2', 'line 3', 'line 3']],
+            'app2': [KuduException('unreachable'), ['line A']],
+        }
+
+        def _get_web_app(subdomain):
+            web_app = MagicMock()
+
+            def _logs(_path):
+                if not streams[subdomain]:
+                    return iter(())
+                stream = streams[subdomain].pop(0)
+                if isinstance(stream, Exception):
+                    raise stream
+                return iter(stream)
+            web_app.logs = _logs
+            return web_app
+
+        azure_service = MagicMock()
+        azure_service.get_web_app = _get_web_app
+
+        output = []
+
+        def _output(line):
+            output.append(line)
+            if len(output) == 5:
+                raise KeyboardInterrupt()
+
+        logs(azure_service, self._config(subdomain='app1,app2'), output=_output)
+
+        self.assertEqual(
+            sorted(output),
+            ['[app1] line 1', '[app1] line 2', '[app1] line 3', '[app1] line 3', '[app2] line A']
+        )
+
+    def test_unexpected_error(self):
+        """
+        Ensure an unexpected error of a stream is raised to the reader.
+        """
+        azure_service = MagicMock()
+        azure_service.get_web_app.side_effect = ValueError('unexpected')
+
+        with self.assertRaises(ValueError):
+            logs(azure_service, self._config(), output=MagicMock())
+
+    def test_lookup_retried(self):
+        """
+        Ensure the application lookup is retried with the stream.
+        """
+        web_app = MagicMock()
+        web_app.logs.return_value = iter(['line'])
+        azure_service = MagicMock()
+        azure_service.get_web_app.side_effect = [KuduException('unreachable'), OSError('reset'), web_app]
+
+        output = MagicMock(side_effect=KeyboardInterrupt())
+        logs(azure_service, self._config(), output=output)
+
+        output.assert_called_once_with('line')
+
+    @staticmethod
+    def _config(**kwargs) -> LogsConfig:
+        """
+        Return a logs configuration.
+        """
+        return LogsConfig(**{
+            'subdomain': 'app',
+            'log_path': '',
+            'log_filter': '',
+            'log_min_level': 'verbose',
+            'since': '',
+            'buffer_size': '100',
+            **kwargs
+        })
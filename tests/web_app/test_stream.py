@@ -0,0 +1,62 @@
+"""
+Test the streaming of a package during its build.
+"""
+import unittest
+
+from weblodge.web_app.stream import PackageStream, Pipe
+
+
+class TestStream(unittest.TestCase):
+    """
+    Test the package stream.
+    """
+    def test_chunks(self):
+        """
+        Ensure the package is read by chunks as it is written.
+        """
+        def _build(output):
+            for _ in range(5):
+                output.write(b'a' * (Pipe.chunk_size // 2 + 1))
+
+        with PackageStream(_build) as chunks:
+            sizes = [len(chunk) for chunk in chunks]
+
+        total = 5 * (Pipe.chunk_size // 2 + 1)
+        self.assertEqual(sizes, [Pipe.chunk_size, Pipe.chunk_size, total - 2 * Pipe.chunk_size])
+
+    def test_build_error(self):
+        """
+        Ensure the build error is raised in place of the reading error.
+        """
+        def _build(output):
+            output.write(b'partial')
+            raise ValueError('Build failed.')
+
+        def _upload(chunks):
+            try:
+                list(chunks)
+            except ValueError as exception:
+                raise ConnectionError('Upload interrupted.') from exception
+
+        with self.assertRaises(ValueError):
+            with PackageStream(_build) as chunks:
+                _upload(chunks)
+
+    def test_reader_stopped(self):
+        """
+        Ensure the build stops when the reader stops.
+        """
+        written = []
+
+        def _build(output):
+            while True:
+                output.write(b'a' * Pipe.chunk_size)
+                written.append(1)
+
+        with self.assertRaises(ConnectionError):
+            with PackageStream(_build) as chunks:
+                next(chunks)
+                raise ConnectionError('Upload failed.')
+
+        # The build is blocked by the bounded pipe then stopped.
+        self.assertLessEqual(len(written), Pipe.max_chunks + 2)
@@ -0,0 +1,94 @@
+"""
+Test the tree shaking of the application files.
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from weblodge.web_app.tree_shaking import shake, imports
+
+
+class TestTreeShaking(unittest.TestCase):
+    """
+    Test the files kept by the tree shaking.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.mkdtemp()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.src)
+        return super().tearDown()
+
+    def test_reachable_modules(self):
+        """
+        Ensure the modules imported directly or not, and their packages, are kept.
+        """
+        files = self._files({
+            'app.py': 'from shop import views\nimport importlib\nimportlib.import_module("plugins.pay")\n',
+            'shop/__init__.py': '',
+            'shop/views.py': 'from .models import Product\nfrom . import utils\n',
+            'shop/models.py': '',
+            'shop/utils.py': 'from ..config import settings\n',
+            'shop/unused.py': '',
+            'shop/templates/cart.html': '',
+            'config/__init__.py': '',
+            'config/settings.py': '',
+            'plugins/pay.py': '',
+            'plugins/other.py': '',
+            'tests/test_shop.py': 'import shop.unused\n',
+            'tests/fixtures/products.json': '',
+            'notebooks/analysis.ipynb': '',
+            'templates/index.html': '',
+            'README.md': '',
+        })
+
+        kept = shake(files, 'app.py', ['templates', 'static'])
+
+        self.assertEqual(
+            sorted(kept),
+            [
+                'README.md', 'app.py',
+                'config/__init__.py', 'config/settings.py',
+                'plugins/pay.py',
+                'shop/__init__.py', 'shop/models.py', 'shop/templates/cart.html', 'shop/utils.py', 'shop/views.py',
+                'templates/index.html',
+            ]
+        )
+
+    def test_keep(self):
+        """
+        Ensure the kept folders and files are packaged, modules included.
+        """
+        files = self._files({
+            'app.py': '',
+            'data/cities.csv': '',
+            'jobs/cleanup.py': '',
+            'jobs/other.py': '',
+        })
+
+        kept = shake(files, 'app.py', ['data/', 'jobs/cleanup.py'])
+
+        self.assertEqual(sorted(kept), ['app.py', 'data/cities.csv', 'jobs/cleanup.py'])
+
+    def test_invalid_module(self):
+        """
+        Ensure a module that can not be parsed has no imports.
+        """
+        path = Path(self.src, 'broken.py')
+        path.write_text('def broken(:\n', encoding='utf-8')
+
+        self.assertEqual(list(imports(path, '')), [])
+
+    def _files(self, contents):
+        """
+        Create the files and return their path by name.
+        """
+        files = {}
+        for name, content in contents.items():
+            path = Path(self.src, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding='utf-8')
+            files[name] = path
+        return files
@@ -0,0 +1,98 @@
+"""
+Test the walk of the application files.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from weblodge.web_app.walker import IgnoreRules, walk
+
+
+class TestWalker(unittest.TestCase):
+    """
+    Test the files selected to be packaged.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.src.cleanup()
+        return super().tearDown()
+
+    def test_always_ignored(self):
+        """
+        Ensure hidden directories, caches, virtual environments and packages are pruned.
+        """
+        self._files(
+            'app.py',
+            '.env',
+            '.git/config',
+            '.git/objects/ab/cdef',
+            'pkg/__pycache__/mod.cpython-310.pyc',
+            'pkg/mod.py',
+            'venv/pyvenv.cfg',
+            'venv/lib/python3.10/site-packages/flask/__init__.py',
+            'lib/site-packages/requests/__init__.py',
+            'dist/azwebapp.zip',
+        )
+        self.assertEqual(self._walk(excluded=[f'{self.src.name}/dist']), ['.env', 'app.py', 'pkg/mod.py'])
+
+    def test_ignore_files(self):
+        """
+        Ensure `.gitignore` and `.weblodgeignore` patterns are applied in their folder.
+        """
+        self._files(
+            'app.py',
+            'debug.log',
+            'node_modules/lib/index.js',
+            'static/app.js',
+            'static/keep.log',
+            'static/build/bundle.js',
+            'tests/test_app.py',
+            'docs/index.md',
+            'docs/build/index.html',
+        )
+        Path(self.src.name, '.gitignore').write_text(
+            '*.log\n!keep.log\nnode_modules/\n# Comment\n\n/docs/build\n',
+            encoding='utf-8'
+        )
+        Path(self.src.name, '.weblodgeignore').write_text('tests\n', encoding='utf-8')
+        Path(self.src.name, 'static', '.gitignore').write_text('build/\n', encoding='utf-8')
+
+        self.assertEqual(
+            self._walk(),
+            ['.gitignore', '.weblodgeignore', 'app.py', 'docs/index.md', 'static/.gitignore', 'static/app.js', 'static/keep.log']  # pylint: disable=line-too-long
+        )
+
+    def test_patterns(self):
+        """
+        Ensure the `.gitignore` syntax is supported.
+        """
+        rules = IgnoreRules().extend('', ['**/data/*.csv', 'a/**', 'file?.txt', '[!b]ar', '\\#hash', 'only_dir/'])
+        self.assertTrue(rules.ignored('data/x.csv', is_dir=False))
+        self.assertTrue(rules.ignored('deep/data/x.csv', is_dir=False))
+        self.assertFalse(rules.ignored('data/sub/x.csv', is_dir=False))
+        self.assertTrue(rules.ignored('a/b/c', is_dir=False))
+        self.assertTrue(rules.ignored('sub/file1.txt', is_dir=False))
+        self.assertFalse(rules.ignored('file10.txt', is_dir=False))
+        self.assertTrue(rules.ignored('car', is_dir=False))
+        self.assertFalse(rules.ignored('bar', is_dir=False))
+        self.assertTrue(rules.ignored('#hash', is_dir=False))
+        self.assertTrue(rules.ignored('only_dir', is_dir=True))
+        self.assertFalse(rules.ignored('only_dir', is_dir=False))
+
+    def _files(self, *paths: str):
+        """
+        Create empty files in the application folder.
+        """
+        for path in paths:
+            file = Path(self.src.name, path)
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text('', encoding='utf-8')
+
+    def _walk(self, **kwargs):
+        """
+        Return the names of the files to package.
+        """
+        return sorted(name for _, name in walk(self.src.name, **kwargs))
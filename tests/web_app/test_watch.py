@@ -0,0 +1,61 @@
+"""
+Test the watch of the application files.
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from weblodge.web_app.watch import Watcher, watch
+
+
+class TestWatch(unittest.TestCase):
+    """
+    Test the detection of the changes.
+    """
+    def setUp(self) -> None:
+        self.src = tempfile.mkdtemp()
+        Path(self.src, 'app.py').write_text('app = Flask(__name__)\n', encoding='utf-8')
+        Path(self.src, 'old.py').write_text('old\n', encoding='utf-8')
+        Path(self.src, '.gitignore').write_text('*.log\n', encoding='utf-8')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.src)
+        return super().tearDown()
+
+    def test_burst_of_changes(self):
+        """
+        Ensure a burst of changes is reported once, ignored files excluded.
+        """
+        actions = [
+            # Nothing changed.
+            lambda: None,
+            lambda: Path(self.src, 'app.py').write_text('app = Flask(__name__)\n# Changed\n', encoding='utf-8'),
+            # Changes during the debounce.
+            lambda: Path(self.src, 'new.py').write_text('new\n', encoding='utf-8'),
+            lambda: Path(self.src, 'old.py').unlink(),
+            lambda: Path(self.src, 'debug.log').write_text('ignored\n', encoding='utf-8'),
+        ]
+        watcher = Watcher(self.src)
+
+        # Only the module time is patched, other threads keep sleeping.
+        with patch('weblodge.web_app.watch.time') as time:
+            time.sleep.side_effect = lambda _: actions.pop(0)() if actions else None
+            changed = watcher.wait()
+
+        self.assertEqual(changed, ['app.py', 'new.py', 'old.py'])
+        self.assertEqual(actions, [])
+
+    @patch('weblodge.web_app.watch.Watcher.wait')
+    def test_watch(self, wait: MagicMock):
+        """
+        Ensure the action is called after each change until interrupted.
+        """
+        wait.side_effect = [['app.py'], ['app.py', 'new.py'], KeyboardInterrupt()]
+        on_change = MagicMock()
+
+        watch(self.src, [], on_change)
+
+        self.assertEqual([c[0][0] for c in on_change.call_args_list], [['app.py'], ['app.py', 'new.py']])
@@ -2,19 +2,24 @@
 Test the WebApp facade.
 """
 import json
+import shutil
+import tempfile
 from pathlib import Path
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+from urllib3.exceptions import ProtocolError
 
 from weblodge._azure import sku
 
 from weblodge._azure import Service
 from weblodge._azure.interfaces import AzureAppServiceSku
 from weblodge.parameters import Parser
-from weblodge._azure.exceptions import InvalidSku
-from weblodge.web_app import WebApp, CanNotFindTierLocation
+from weblodge._azure.exceptions import AzureException, InvalidSku
+from weblodge.web_app import WebApp, CanNotFindTierLocation, price_index
+from weblodge.web_app.tiers import WebAppTier
 from weblodge.web_app.deploy import DeploymentConfig
-from weblodge.web_app.exceptions import InvalidTier
+from weblodge.web_app.exceptions import InvalidTier, RequirementsFileNotFound, SlotsNotSupported
 
 
 class TestWebApp(unittest.TestCase):
@@ -23,6 +28,10 @@ class TestWebApp(unittest.TestCase):
     """
     def setUp(self) -> None:
         DeploymentConfig.env_update_waiting_time = 0
+        # Packages are not built.
+        package_manifest = patch('weblodge.web_app.deploy.package_manifest', return_value=None)
+        package_manifest.start()
+        self.addCleanup(package_manifest.stop)
 
         self.f1_tier = AzureAppServiceSku()
         self.f1_tier.name = 'F1'
@@ -42,13 +51,22 @@ class TestWebApp(unittest.TestCase):
         self.s1_tier.ram = 1
         self.s1_tier.disk = 1
 
+        # Prices are cached aside, each test retrieves them.
+        self.cache_path = sku.CACHE_PATH
+        sku.CACHE_PATH = tempfile.mkdtemp()
         return super().setUp()
 
+    def tearDown(self) -> None:
+        shutil.rmtree(sku.CACHE_PATH)
+        sku.CACHE_PATH = self.cache_path
+        return super().tearDown()
+
     def test_tiers_default(self):
         """
         Test the tiers command.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         skus = json.loads(
             Path('./tests/_azure/api_mocks/skus.json').read_text(encoding='utf-8')
         )
@@ -64,6 +82,7 @@ class TestWebApp(unittest.TestCase):
         Test the tiers command with a location.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.RETRY = MagicMock()
 
         skus = json.loads(
@@ -82,6 +101,40 @@ class TestWebApp(unittest.TestCase):
             retries=42
         )
 
+    def test_tiers_locations(self):
+        """
+        Test the tiers compared across locations.
+        """
+        sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
+        sku.REQUEST.return_value.json.return_value = json.loads(
+            Path('./tests/_azure/api_mocks/skus.json').read_text(encoding='utf-8')
+        )
+
+        web_app = WebApp(Parser().load, Service())
+        tiers = web_app.tiers({'locations': 'northeurope, westeurope'})
+
+        self.assertEqual(len(tiers), 26)
+        self.assertEqual({t.location for t in tiers}, {'northeurope', 'westeurope'})
+        self.assertEqual(sku.REQUEST.call_count, 2)
+
+    def test_price_index(self):
+        """
+        Test the paid tiers are sorted by price per core then per GB of RAM.
+        """
+        tiers = [
+            WebAppTier('F1', 'westeurope', 0.0, 'Free', 'Shared', 1, 1),
+            WebAppTier('P1v3', 'westeurope', 0.2, 'Premium', 2, 8, 250),
+            WebAppTier('P1mv3', 'westeurope', 0.2, 'Premium', 2, 16, 250),
+            WebAppTier('P1v3', 'northeurope', 0.18, 'Premium', 2, 8, 250),
+            WebAppTier('B1', 'northeurope', 0.02, 'Basic', 1, 1.75, 10),
+        ]
+
+        self.assertEqual(
+            list(price_index(tiers)),
+            [('B1', 'northeurope'), ('P1v3', 'northeurope'), ('P1mv3', 'westeurope'), ('P1v3', 'westeurope')]
+        )
+
     def test_tiers_raise(self):
         """
         Test the tiers command when API failed.
@@ -98,6 +151,7 @@ class TestWebApp(unittest.TestCase):
         Test the tiers command when API failed.
         """
         sku.REQUEST = MagicMock()
+        sku.REQUEST.return_value.headers = {}
         sku.REQUEST.return_value.json.return_value = {'Items': []}
 
         web_app = WebApp(Parser().load, Service())
@@ -115,6 +169,7 @@ class TestWebApp(unittest.TestCase):
         azure_service.get_skus.return_value = [self.s1_tier, self.f1_tier]
         azure_service.get_web_app.return_value = web_app_mc
         web_app_mc.exists.return_value = True
+        web_app_mc.deployed_manifest.return_value = None
         web_app_mc.is_free.return_value = True
         azure_service.get_free_web_app.return_value = []
 
@@ -141,6 +196,7 @@ class TestWebApp(unittest.TestCase):
         azure_service = MagicMock()
 
         web_app_mc.exists.return_value = True
+        web_app_mc.deployed_manifest.return_value = None
         web_app_mc.is_free.return_value = False
         azure_service.get_skus.return_value = [self.s1_tier, self.f1_tier]
         azure_service.get_web_app.return_value = web_app_mc
@@ -175,6 +231,82 @@ class TestWebApp(unittest.TestCase):
         with self.assertRaises(InvalidTier):
             web_app.deploy({'tier': 'invalid'})
 
+    def test_deploy_build_error(self):
+        """
+        Ensure a build error raised during a deployment without streaming is reported.
+        """
+        azure_service = MagicMock()
+        azure_service.get_skus.return_value = [self.s1_tier, self.f1_tier]
+        web_app = WebApp(Parser().load, azure_service)
+
+        with patch('weblodge.web_app.web_app._deploy', side_effect=RequirementsFileNotFound()):
+            with self.assertLogs('weblodge', level='CRITICAL') as logs:
+                success, _, _ = web_app.deploy({'tier': 'F1'})
+
+        self.assertFalse(success)
+        self.assertIn("Requirements file 'requirements.txt' not found.", logs.output[0])
+
+    def test_watch_deploy_error(self):
+        """
+        Ensure a failed update is logged and the watch continues.
+        """
+        web_app = WebApp(Parser().load, MagicMock())
+
+        with patch('weblodge.web_app.web_app._watch') as watch, \
+                patch('weblodge.web_app.web_app._build'), \
+                patch('weblodge.web_app.web_app._update') as update:
+            web_app.watch({}, deploy=True)
+            on_change = watch.call_args.args[2]
+
+            for error in (AzureException('Conflict'), ProtocolError('Connection aborted'), ConnectionResetError()):
+                update.side_effect = error
+                with self.assertLogs('weblodge', level='ERROR') as logs:
+                    on_change(['app.py'])
+                self.assertIn('The update failed', logs.output[0])
+
+            update.side_effect = None
+            on_change(['app.py'])
+            self.assertEqual(update.call_count, 4)
+
+    def test_deploy_slot_not_supported(self):
+        """
+        Ensure slots are refused on tiers without slots.
+        """
+        get_web_app = MagicMock()
+        azure_service = MagicMock(get_web_app=get_web_app)
+        azure_service.get_skus.return_value = [self.s1_tier, self.f1_tier]
+        web_app = WebApp(Parser().load, azure_service)
+
+        with self.assertRaises(SlotsNotSupported):
+            web_app.deploy({'tier': 'F1', 'slot': 'staging'})
+
+        get_web_app.assert_not_called()
+
+    def test_rollback(self):
+        """
+        Ensure the rollback swaps the slot with the production.
+        """
+        get_web_app = MagicMock()
+        web_app = WebApp(Parser().load, MagicMock(get_web_app=get_web_app))
+
+        success, _ = web_app.rollback({'subdomain': 'app', 'slot': 'staging'})
+
+        self.assertTrue(success)
+        get_web_app.assert_called_once_with('app')
+        get_web_app.return_value.swap.assert_called_once_with('staging')
+
+    def test_rollback_without_slot(self):
+        """
+        Ensure nothing is swapped if the application has no slot.
+        """
+        get_web_app = MagicMock()
+        web_app = WebApp(Parser().load, MagicMock(get_web_app=get_web_app))
+
+        success, _ = web_app.rollback({'subdomain': 'app', 'slot': ''})
+
+        self.assertFalse(success)
+        get_web_app.assert_not_called()
+
     def test_web_app_not_set(self):
         """
         Test the web_app_not_set exception.
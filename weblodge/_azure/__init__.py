@@ -5,6 +5,8 @@ This package is for internal use only and must not be use from a third package.
 """
 from .service import Service
 from .exceptions import InvalidLocation
+from .web_app import PYTHON_VERSION
+from .sku import get_hardware
 from .interfaces import AzureService, AzureAppServiceSku, \
     AzureWebApp, \
     AzureLogLevel, MicrosoftEntraApplication
@@ -3,6 +3,7 @@ Interface to the Azure CLI.
 """
 import json
 import logging
+import threading
 from io import StringIO
 import time
 from typing import Dict, List, Optional, Union
@@ -15,9 +16,15 @@ from .exceptions import CLIException
 logger = logging.getLogger('weblodge')
 
 
+# The embedded Azure CLI relies on process-global state, as the logging handlers
+# and the output redirection, so commands are executed one at a time.
+_LOCK = threading.Lock()
+
+
 class Cli:
     """
     Azure CLI wrapper.
+    Commands invoked from several threads are executed one after the other.
     """
     def __init__(self):
         self._first_invoke = True
@@ -82,7 +89,9 @@ class Cli:
         for i in range(1, 15):
             try:
                 # Execute the Azure CLI command.
-                if self.cli.invoke(cmd, out_file=out_fd):
+                with _LOCK:
+                    failed = self.cli.invoke(cmd, out_file=out_fd)
+                if failed:
                     exception = CLIException(f"Error during execution of the command '{command}'.")  # pylint: disable=broad-exception-raised
                 else:
                     exception = None
@@ -56,3 +56,8 @@ class CanNotChangeTheResourceLocation(AzureException):
     """
     Raise when a resource location cannot be changed.
     """
+
+class KuduException(AzureException):
+    """
+    Raise when a call to the Kudu API of a WebApp fails.
+    """
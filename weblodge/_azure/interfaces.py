@@ -2,7 +2,7 @@
 Public interface of the Azure module.
 """
 from abc import abstractmethod
-from typing import Dict, Iterable, Iterator
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
 class AzureLogLevel:
@@ -72,6 +72,9 @@ class AzureAppServiceSku:
     # Disk size in GB.
     disk: int
 
+    # Number of deployment slots.
+    slots: int = 0
+
 
 class AzureWebApp:
     """
@@ -128,22 +131,73 @@ class AzureWebApp:
         """
 
     @abstractmethod
-    def deploy(self, src: str) -> None:
+    def deploy(self, src: str, manifest: Optional[bytes] = None) -> None:
         """
         Deploy an application zipped.
+        The `manifest` of the package is kept to update the files of the next deployments.
+        """
+
+    @abstractmethod
+    def deploy_stream(self, chunks: Iterable[bytes]) -> None:
+        """
+        Deploy an application zipped, uploaded by chunks as it is produced.
+        """
+
+    @abstractmethod
+    def deployed_manifest(self) -> Optional[bytes]:
+        """
+        Return the manifest of the deployed package, None if it is unknown.
         """
 
     @abstractmethod
-    def logs(self) -> None:
+    def deploy_files(self, package: bytes, removed: Iterable[str], manifest: bytes) -> None:
         """
-        Stream WebApp logs.
-        This is a blocking operation. User must run CTRL+C to stop the process.
+        Update the deployed files with a zipped package and remove the `removed` files.
+        Files not in the package are kept.
         """
 
     @abstractmethod
-    def update_environment(self, env: Dict) -> None:
+    def logs(self, path: str = '') -> Iterator[str]:
+        """
+        Stream WebApp log lines.
+        The `path` selects the logs on the server side. Ex: 'application', 'http'.
+        The iterator ends when the connection is closed.
+        """
+
+    @abstractmethod
+    def update_environment(self, env: Dict) -> bool:
         """
         Update the WebApp environment variables.
+        Return True if the WebApp restarts to apply the changes.
+        """
+
+    @abstractmethod
+    def run_from_package(self, enabled: bool, url: str = '') -> bool:
+        """
+        Run the WebApp from its package instead of extracting it.
+        The package is the last one uploaded, or the one at `url` if provided.
+        Return True if the WebApp restarts to apply the changes.
+        """
+
+    @abstractmethod
+    def slot(self, name: str) -> 'AzureWebApp':
+        """
+        Return a deployment slot of the WebApp.
+        The slot is managed as a WebApp sharing the infrastructure of this one.
+        """
+
+    @abstractmethod
+    def swap(self, slot: str) -> None:
+        """
+        Swap the deployment slot with the production.
+        Swapping again restores the previous production.
+        """
+
+    @abstractmethod
+    def warm_up(self, paths: Iterable[str], timeout: int) -> bool:
+        """
+        Request the paths of the WebApp until they all respond or the timeout expires.
+        Return True if the WebApp responds.
         """
 
     @abstractmethod
@@ -234,9 +288,21 @@ class AzureService:
         """
 
     @abstractmethod
-    def get_skus(self, location: str) -> Iterable[AzureAppServiceSku]:
+    def get_skus(self, location: str, offline: bool = False, refresh: bool = False) -> Iterable[AzureAppServiceSku]:
         """
         Return all available tiers.
+        With `offline`, only the cached prices are used. With `refresh`, the cache is not used.
+        """
+
+    @abstractmethod
+    def get_skus_by_location(
+        self,
+        locations: Optional[Iterable[str]] = None,
+        offline: bool = False,
+        refresh: bool = False
+    ) -> Dict[str, List[AzureAppServiceSku]]:
+        """
+        Return the available tiers by location, of all the locations when `locations` is None.
         """
 
     @abstractmethod
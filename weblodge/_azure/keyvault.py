@@ -1,8 +1,11 @@
 """
 Azure Keyvault interface.
 """
+import os
+import hmac
+import hashlib
 from dataclasses import dataclass
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List, Optional
 
 from weblodge._azure.resource_group import ResourceGroup
 
@@ -10,6 +13,14 @@ from .resource import Resource
 from .exceptions import CLIException, SecretNotFound
 
 
+# Tag containing the keyed hash of the secret value.
+# Allow to know if a secret changed without reading its value.
+_DIGEST_TAG = 'weblodge-hmac-sha256'
+# Secret containing the key of the hashes, random by KeyVault.
+# Tags are readable with the list permission only, a hash without key could be brute-forced.
+_DIGEST_KEY_SECRET = 'weblodge-digest-key'
+
+
 @dataclass(frozen=True)
 class KeyVaultSecret:
     """
@@ -78,9 +89,18 @@ class KeyVault(Resource):
             to_json=False
         )
 
-    def set(self, name: str, value: str) -> KeyVaultSecret:
+    @property
+    def uri(self) -> str:
+        """
+        Return the KeyVault URI.
+        Ex: https://myvault.vault.azure.net/
+        """
+        return self._from_az['properties']['vaultUri']
+
+    def set(self, name: str, value: str, digest_key: Optional[str] = None) -> KeyVaultSecret:
         """
         Create or update a secret and return its URI.
+        With `digest_key`, the keyed hash of the value is kept in the secret tags.
         """
         secret = self._invoke(
             ' '.join([
@@ -88,6 +108,7 @@ class KeyVault(Resource):
                 f'--vault-name {self.name}',
                 f'--name {name}'
             ]),
+            tags={_DIGEST_TAG: _digest(digest_key, value)} if digest_key else None,
             command_args=['--value', value]
         )
         return KeyVaultSecret(
@@ -96,12 +117,41 @@ class KeyVault(Resource):
             value=secret['value']
         )
 
+    def sync(self, secrets: Dict[str, str]) -> List[KeyVaultSecret]:
+        """
+        Create or update the secrets whose value changed and return them.
+
+        Current values are compared with the keyed hash kept in the secret tags, so
+        unchanged secrets are neither read nor written and keep their version.
+        """
+        digests = {
+            s['name']: (s.get('tags') or {}).get(_DIGEST_TAG)
+            for s in self._invoke(f'{self._cli_prefix} secret list --vault-name {self.name}')
+        }
+        if _DIGEST_KEY_SECRET in digests:
+            digest_key = self._get_secret(_DIGEST_KEY_SECRET).value
+        else:
+            digest_key = self.set(_DIGEST_KEY_SECRET, os.urandom(32).hex()).value
+
+        return [
+            self.set(name, value, digest_key)
+            for name, value in secrets.items()
+            if digests.get(name) != _digest(digest_key, value)
+        ]
+
+    def secret_uri(self, name: str) -> str:
+        """
+        Return the URI of a secret without version.
+        This URI always targets the latest version of the secret.
+        """
+        return f"{self.uri.rstrip('/')}/secrets/{name}"
+
     def get_all(self) -> Iterable[KeyVaultSecret]:
         """
         Return the KeyVault secrets.
         """
         secrets = self._invoke(f'{self._cli_prefix} secret list --vault-name {self.name}')
-        yield from (self._get_secret(s['name']) for s in secrets)
+        yield from (self._get_secret(s['name']) for s in secrets if s['name'] != _DIGEST_KEY_SECRET)
 
     def can_read_secrets(self, identity: str) -> None:
         """
@@ -153,3 +203,10 @@ class KeyVault(Resource):
             self._invoke(f'{self._cli_prefix} show --name {self.name}')
         )
         return self
+
+
+def _digest(key: str, value: str) -> str:
+    """
+    Return the keyed hash of a secret value.
+    """
+    return hmac.new(key.encode('utf-8'), (value or '').encode('utf-8'), hashlib.sha256).hexdigest()
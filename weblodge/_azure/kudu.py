@@ -0,0 +1,186 @@
+"""
+Kudu API of an Azure WebApp.
+
+Kudu is the engine behind the WebApp deployments, it is exposed on the SCM site of the WebApp.
+https://github.com/projectkudu/kudu/wiki/REST-API
+"""
+import json
+import time
+from urllib.parse import quote
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from urllib3 import PoolManager, Timeout
+
+from .exceptions import KuduException
+
+
+# HTTP connections to use for calls and mocks.
+HTTP = PoolManager()
+
+# Time to wait for the connection to the SCM site.
+_CONNECT_TIMEOUT = 30
+
+# Kudu deployment statuses.
+# https://github.com/projectkudu/kudu/blob/master/Kudu.Core/Deployment/DeployStatus.cs
+_DEPLOYMENT_FAILED = 3
+
+# Time before the expiration of the access token to refresh it in seconds.
+_TOKEN_REFRESH_MARGIN = 300
+
+
+class Kudu:
+    """
+    Kudu API of a WebApp.
+    Requests are authenticated with an Azure access token.
+    """
+    # Maximum time to wait for a deployment in seconds.
+    deployment_timeout: int = 1800
+    # Waiting time between two deployment status checks in seconds.
+    deployment_polling_interval: int = 5
+
+    def __init__(self, host: str, get_token: Callable[[], Tuple[str, float]]) -> None:
+        # SCM site of the WebApp.
+        # Ex: myapp.scm.azurewebsites.net
+        self.host = host
+        # Return an Azure access token and its expiration as a POSIX timestamp.
+        self._get_token = get_token
+        self._token: Optional[str] = None
+        self._token_expires_on = 0.0
+
+    @property
+    def url(self) -> str:
+        """
+        Return the URL of the Kudu API.
+        """
+        return f'https://{self.host}/api'
+
+    def log_stream(self, path: str = '') -> Iterator[str]:
+        """
+        Stream the WebApp log lines.
+        The `path` selects the logs on the server side. Ex: 'application', 'http'.
+        The iterator ends when the server closes the connection.
+        """
+        url = f"{self.url}/logstream/{path.strip('/')}".rstrip('/')
+        response = self._request(
+            'GET',
+            url,
+            preload_content=False,
+            # The stream can stay quiet for a long time.
+            timeout=Timeout(connect=_CONNECT_TIMEOUT, read=None)
+        )
+        try:
+            for line in response:
+                yield line.decode('utf-8', errors='replace').rstrip('\r\n')
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            raise KuduException(f"Log stream of '{self.host}' interrupted.") from exception
+        finally:
+            response.release_conn()
+
+    def zip_deploy(self, chunks: Iterable[bytes]) -> None:
+        """
+        Deploy a zip package sent by chunks, as it is produced.
+        Wait for the end of the deployment.
+        """
+        response = self._request(
+            'POST',
+            f'{self.url}/zipdeploy?isAsync=true',
+            headers={'Content-Type': 'application/zip'},
+            body=chunks,
+            chunked=True,
+            # The upload lasts as long as the package production.
+            timeout=Timeout(connect=_CONNECT_TIMEOUT, read=None)
+        )
+        self.wait_deployment(response.headers.get('Location', f'{self.url}/deployments/latest'))
+
+    def wait_deployment(self, url: str) -> None:
+        """
+        Wait for a deployment to complete, raise if it failed.
+        """
+        deadline = time.monotonic() + self.deployment_timeout
+        while time.monotonic() < deadline:
+            deployment = json.loads(self._request('GET', url).data)
+            if deployment.get('complete'):
+                if deployment.get('status') == _DEPLOYMENT_FAILED:
+                    raise KuduException(f"Deployment failed: {deployment.get('status_text') or 'see the deployment logs'}.")  # pylint: disable=line-too-long
+                return
+            time.sleep(self.deployment_polling_interval)
+        raise KuduException(f'Deployment not completed after {self.deployment_timeout}s.')
+
+    def get_file(self, path: str) -> Optional[bytes]:
+        """
+        Return the content of a file of the WebApp, None if it does not exist.
+        The `path` is relative to the home folder. Ex: 'site/wwwroot/app.py'.
+        """
+        response = self._request('GET', self._vfs_url(path), not_found_ok=True)
+        return None if response.status == 404 else response.data
+
+    def delete_file(self, path: str) -> None:
+        """
+        Delete a file of the WebApp, if it exists.
+        """
+        self._request('DELETE', self._vfs_url(path), headers={'If-Match': '*'}, not_found_ok=True)
+
+    def put_file(self, path: str, data: bytes) -> None:
+        """
+        Create or overwrite a file of the WebApp.
+        """
+        self._request('PUT', self._vfs_url(path), headers={'If-Match': '*'}, body=data)
+
+    def delete_folder(self, path: str) -> None:
+        """
+        Delete a folder of the WebApp and its content, if it exists.
+        """
+        self._request(
+            'DELETE',
+            f'{self._vfs_url(path)}/?recursive=true',
+            headers={'If-Match': '*'},
+            not_found_ok=True
+        )
+
+    def extract_zip(self, path: str, data: bytes) -> None:
+        """
+        Extract a zip in a folder of the WebApp.
+        Existing files are overwritten, other files are kept.
+        """
+        self._request(
+            'PUT',
+            f"{self.url}/zip/{quote(path.strip('/'))}/",
+            headers={'Content-Type': 'application/zip'},
+            body=data
+        )
+
+    def _vfs_url(self, path: str) -> str:
+        """
+        Return the Virtual File System URL of a file.
+        """
+        return f"{self.url}/vfs/{quote(path.strip('/'))}"
+
+    def _headers(self) -> Dict[str, str]:
+        """
+        Return the headers of an authenticated request.
+        The access token is retrieved again only when it is about to expire.
+        """
+        if self._token is None or time.time() > self._token_expires_on - _TOKEN_REFRESH_MARGIN:
+            self._token, self._token_expires_on = self._get_token()
+        return {'Authorization': f'Bearer {self._token}'}
+
+    def _request(self, method: str, url: str, headers: Dict[str, str] = None, not_found_ok: bool = False, **kwargs):
+        """
+        Execute an authenticated request on the Kudu API.
+        With `not_found_ok`, a missing resource is not an error.
+        """
+        try:
+            response = HTTP.request(
+                method,
+                url,
+                headers={**self._headers(), **(headers or {})},
+                **kwargs
+            )
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            raise KuduException(f"Can not reach '{url}'.") from exception
+
+        if response.status == 404 and not_found_ok:
+            return response
+        if response.status >= 400:
+            raise KuduException(f"Request '{method} {url}' failed with status {response.status}.")
+        return response
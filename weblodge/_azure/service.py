@@ -1,7 +1,7 @@
 """
 Azure Service for Azure instanciation.
 """
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional
 
 from .cli import Cli
 from .entra import Entra
@@ -9,7 +9,7 @@ from .web_app import WebApp
 from .keyvault import KeyVault
 from .log_level import LogLevel
 from .appservice import AppService
-from .sku import get_skus as _get_skus
+from .sku import get_skus as _get_skus, get_skus_by_location as _get_skus_by_location
 from .resource_group import ResourceGroup
 from .interfaces import AzureWebApp, AzureService, AzureLogLevel, MicrosoftEntraApplication, AzureAppServiceSku
 
@@ -102,11 +102,22 @@ class Service(AzureService):
             app_service = AppService(subdomain, resource_group)
             yield WebApp(subdomain, resource_group, app_service, keyvault)
 
-    def get_skus(self, location: str) -> Iterable[AzureAppServiceSku]:
+    def get_skus(self, location: str, offline: bool = False, refresh: bool = False) -> Iterable[AzureAppServiceSku]:
         """
         Return all available tiers.
         """
-        return _get_skus(location)
+        return _get_skus(location, offline, refresh)
+
+    def get_skus_by_location(
+        self,
+        locations: Optional[Iterable[str]] = None,
+        offline: bool = False,
+        refresh: bool = False
+    ) -> Dict[str, List[AzureAppServiceSku]]:
+        """
+        Return the available tiers by location, of all the locations when `locations` is None.
+        """
+        return _get_skus_by_location(locations, offline, refresh)
 
     def log_levels(self) -> AzureLogLevel:
         """
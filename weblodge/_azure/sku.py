@@ -1,18 +1,48 @@
 """
 SKU class for Azure resources.
+
+Prices are retrieved from the Azure retail prices API and cached on disk by location. The
+cache is used until it expires, and with the offline mode whatever its age. Expired prices
+are revalidated with their ETag, and used if the API can not be reached.
+
+The API is called through a pool of kept alive connections. All the pages of a query are
+read, each page is reduced to the prices as soon as it is received, and the locations are
+retrieved concurrently. The prices of all the locations are retrieved with a single query.
 """
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
 from dataclasses import dataclass
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from urllib3 import Retry as urllib_retry, request as urllib_request
+from urllib3 import PoolManager, Retry as urllib_retry
 
 from .interfaces import AzureAppServiceSku
 from .exceptions import InvalidSku, InvalidLocation
 
 
+# Number of locations retrieved at the same time, and of connections kept alive.
+MAX_WORKERS = 8
+
 # Function to use for HTTP calls and mocks.
+# Connections to the prices API are kept alive between the requests.
 RETRY = urllib_retry
-REQUEST = urllib_request
+REQUEST = PoolManager(num_pools=1, maxsize=MAX_WORKERS).request
+
+# Folder of the prices cached by location.
+CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache'),
+    'weblodge',
+    'prices'
+)
+# Seconds the cached prices are used before being retrieved again.
+CACHE_TTL = 24 * 60 * 60
+
+logger = logging.getLogger('weblodge')
 
 # Tier description of SKU families.
 _F_TIER = 'Free tier - limited to 60 minutes per day.'
@@ -22,25 +52,25 @@ _PV3_TIER = 'Designed to provide enhanced performance for production apps and wo
 
 # Hard coded hardware capabilities for each SKU.
 _SKU_INFOS = {
-    'F1': {'cores': 1, 'ram': 1, 'disk': 1, 'description': _F_TIER},
-
-    'B1': {'cores': 1, 'ram': 1.75, 'disk': 10, 'description': _B_TIER},
-    'B2': {'cores': 2, 'ram': 3.50, 'disk': 10, 'description': _B_TIER},
-    'B3': {'cores': 4, 'ram': 7, 'disk': 10, 'description': _B_TIER},
-
-    'S1': {'cores': 1, 'ram': 1.75, 'disk': 50, 'description': _S_TIER},
-    'S2': {'cores': 2, 'ram': 3.50, 'disk': 50, 'description': _S_TIER},
-    'S3': {'cores': 4, 'ram': 7, 'disk': 50, 'description': _S_TIER},
-
-    'P0v3': {'cores': 1, 'ram': 4, 'disk': 250, 'description': _PV3_TIER},
-    'P1v3': {'cores': 2, 'ram': 8, 'disk': 250, 'description': _PV3_TIER},
-    'P1mv3': {'cores': 2, 'ram': 16, 'disk': 250, 'description': _PV3_TIER},
-    'P2v3': {'cores': 4, 'ram': 16, 'disk': 250, 'description': _PV3_TIER},
-    'P2mv3': {'cores': 4, 'ram': 32, 'disk': 250, 'description': _PV3_TIER},
-    'P3v3': {'cores': 8, 'ram': 32, 'disk': 250, 'description': _PV3_TIER},
-    'P3mv3': {'cores': 8, 'ram': 64, 'disk': 250, 'description': _PV3_TIER},
-    'P4mv3': {'cores': 16, 'ram': 128, 'disk': 250, 'description': _PV3_TIER},
-    'P5mv3': {'cores': 32, 'ram': 256, 'disk': 250, 'description': _PV3_TIER},
+    'F1': {'cores': 1, 'ram': 1, 'disk': 1, 'slots': 0, 'description': _F_TIER},
+
+    'B1': {'cores': 1, 'ram': 1.75, 'disk': 10, 'slots': 0, 'description': _B_TIER},
+    'B2': {'cores': 2, 'ram': 3.50, 'disk': 10, 'slots': 0, 'description': _B_TIER},
+    'B3': {'cores': 4, 'ram': 7, 'disk': 10, 'slots': 0, 'description': _B_TIER},
+
+    'S1': {'cores': 1, 'ram': 1.75, 'disk': 50, 'slots': 5, 'description': _S_TIER},
+    'S2': {'cores': 2, 'ram': 3.50, 'disk': 50, 'slots': 5, 'description': _S_TIER},
+    'S3': {'cores': 4, 'ram': 7, 'disk': 50, 'slots': 5, 'description': _S_TIER},
+
+    'P0v3': {'cores': 1, 'ram': 4, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P1v3': {'cores': 2, 'ram': 8, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P1mv3': {'cores': 2, 'ram': 16, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P2v3': {'cores': 4, 'ram': 16, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P2mv3': {'cores': 4, 'ram': 32, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P3v3': {'cores': 8, 'ram': 32, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P3mv3': {'cores': 8, 'ram': 64, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P4mv3': {'cores': 16, 'ram': 128, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
+    'P5mv3': {'cores': 32, 'ram': 256, 'disk': 250, 'slots': 30, 'description': _PV3_TIER},
 }
 
 # List of available SKU names.
@@ -48,7 +78,7 @@ AVAILABLE_SKUS = list(_SKU_INFOS.keys())
 
 
 @dataclass(frozen=True)
-class AppServiceSku(AzureAppServiceSku):
+class AppServiceSku(AzureAppServiceSku):  # pylint: disable=too-many-instance-attributes
     """
     User representation of the SKU.
     """
@@ -73,24 +103,55 @@ class AppServiceSku(AzureAppServiceSku):
     # Disk size in GB.
     disk: int
 
+    # Number of deployment slots.
+    slots: int = 0
+
 
-def get_skus(location: str) -> Iterable[AzureAppServiceSku]:
+def get_hardware(name: str) -> Optional[Dict]:
+    """
+    Return the hardware capabilities of a SKU, None if the SKU is unknown.
+    The name is case-insensitive as the tier given by the user, e.g. 'P1V3' for 'P1v3'.
+    """
+    sku_info = next((info for sku, info in _SKU_INFOS.items() if sku.upper() == name.upper()), None)
+    return {k: sku_info[k] for k in ('cores', 'ram', 'disk', 'slots')} if sku_info else None
+
+
+def get_skus(location: str, offline: bool = False, refresh: bool = False) -> Iterable[AzureAppServiceSku]:
     """
     Return availables SKUs for the given location.
+    With `offline`, only the cached prices are used. With `refresh`, the cache is not used.
     """
-    try:
-        # Retrieve SKUs from the Azure API.
-        skus = REQUEST(
-            'GET',
-            f"https://prices.azure.com/api/retail/prices?$filter=serviceName eq 'Azure App Service' and contains(productName, 'Linux') and armRegionName eq '{location}' and unitOfMeasure eq '1 Hour' and type eq 'Consumption' and isPrimaryMeterRegion eq true and currencyCode eq 'USD'",  # pylint: disable=line-too-long
-            retries=RETRY(total=10, backoff_factor=5, status=5, status_forcelist=[500, 502, 503, 504])
-        )
-        items = skus.json()['Items']
-    except Exception as exception:  # pylint: disable=bare-except
-        raise InvalidSku("""Unable to retrieve the list of SKUs.
-Please check your internet connection."""
-        ) from exception
+    yield from _to_skus(location, _items(location, offline, refresh))
+
+
+def get_skus_by_location(
+    locations: Optional[Iterable[str]] = None,
+    offline: bool = False,
+    refresh: bool = False
+) -> Dict[str, List[AzureAppServiceSku]]:
+    """
+    Return availables SKUs by location, retrieved concurrently.
+    All the locations are retrieved with a single query when `locations` is None.
+    """
+    if locations is None:
+        items_by_location: Dict[str, List[Dict]] = {}
+        for item in _items(None, offline, refresh):
+            items_by_location.setdefault(item['armRegionName'], []).append(item)
+        return {
+            location: list(_to_skus(location, items_by_location[location]))
+            for location in sorted(items_by_location)
+        }
+
+    locations = list(dict.fromkeys(locations))
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(locations)))) as executor:
+        skus = executor.map(lambda location: list(get_skus(location, offline, refresh)), locations)
+        return dict(zip(locations, skus))
+
 
+def _to_skus(location: str, items: List[Dict]) -> Iterable[AzureAppServiceSku]:
+    """
+    Return the SKUs of the prices of a location.
+    """
     # The 'Items' key is empty when the location does not exist.
     if len(items) == 0:
         raise InvalidLocation(f"Can not find any SKU for the location '{location}'.")
@@ -107,7 +168,8 @@ Please check your internet connection."""
                 description=sku_info['description'],
                 cores=sku_info['cores'],
                 ram=sku_info['ram'],
-                disk=sku_info['disk']
+                disk=sku_info['disk'],
+                slots=sku_info['slots']
             )
 
     # Return the free SKU.
@@ -118,5 +180,118 @@ Please check your internet connection."""
         description=_SKU_INFOS['F1']['description'],
         cores=_SKU_INFOS['F1']['cores'],
         ram=_SKU_INFOS['F1']['ram'],
-        disk=_SKU_INFOS['F1']['disk']
+        disk=_SKU_INFOS['F1']['disk'],
+        slots=_SKU_INFOS['F1']['slots']
     )
+
+
+def _items(location: Optional[str], offline: bool, refresh: bool) -> List[Dict]:
+    """
+    Return the prices of the location, or of all the locations when it is None, from the cache
+    when it is not expired.
+    """
+    cache = _load_cache(location)
+    if cache is not None:
+        age = time.time() - cache['fetched_at']
+        if offline or (not refresh and age < CACHE_TTL):
+            return cache['items']
+    elif offline:
+        raise InvalidSku(f"No prices cached for the location '{location or 'all'}', they can not be retrieved offline.")  # pylint: disable=line-too-long
+
+    try:
+        # Retrieve SKUs from the Azure API, only if they changed when they are cached.
+        region = f" and armRegionName eq '{location}'" if location else ''
+        items, etag = _fetch(
+            f"https://prices.azure.com/api/retail/prices?$filter=serviceName eq 'Azure App Service' and contains(productName, 'Linux'){region} and unitOfMeasure eq '1 Hour' and type eq 'Consumption' and isPrimaryMeterRegion eq true and currencyCode eq 'USD'",  # pylint: disable=line-too-long
+            cache.get('etag') if cache else None
+        )
+        if items is None:
+            items = cache['items']
+    except Exception as exception:  # pylint: disable=bare-except
+        if cache is not None:
+            logger.warning(f"Unable to retrieve the prices, using the ones cached {_age(age)} ago.")
+            return cache['items']
+        raise InvalidSku("""Unable to retrieve the list of SKUs.
+Please check your internet connection."""
+        ) from exception
+
+    # Unknown locations are not cached.
+    if items:
+        _dump_cache(location, items, etag)
+    return items
+
+
+def _fetch(url: str, etag: Optional[str] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """
+    Return the prices of all the pages of a query, and the ETag of the first page.
+    The prices are None if they did not change since the `etag`.
+    """
+    retries = RETRY(total=10, backoff_factor=5, status=5, status_forcelist=[500, 502, 503, 504])
+    headers = {'If-None-Match': etag} if etag else {}
+    response = REQUEST('GET', url, retries=retries, **({'headers': headers} if headers else {}))
+    if etag and response.status == 304:
+        return None, etag
+    etag = response.headers.get('ETag')
+
+    # Each page links to the next one, they are read in sequence.
+    items = []
+    while True:
+        page = response.json()
+        items.extend(_price(item) for item in page['Items'])
+        url = page.get('NextPageLink')
+        if not url:
+            return items, etag
+        response = REQUEST('GET', url, retries=retries)
+
+
+def _price(item: Dict) -> Dict:
+    """
+    Return the fields of a price used by the SKUs.
+    """
+    return {k: item[k] for k in ('skuName', 'armRegionName', 'retailPrice')}
+
+
+def _cache_file(location: Optional[str]) -> Path:
+    """
+    Return the cache file of a location, or of all the locations.
+    """
+    return Path(CACHE_PATH, f"{location or 'all'}.json")
+
+
+def _load_cache(location: Optional[str]) -> Optional[Dict]:
+    """
+    Return the cached prices of a location with their ETag and retrieval time.
+    None if they are not cached or the cache is not readable.
+    """
+    try:
+        cache = json.loads(_cache_file(location).read_text(encoding='utf-8'))
+        if isinstance(cache['items'], list) and isinstance(cache['fetched_at'], (int, float)):
+            return cache
+    except (OSError, ValueError, TypeError, KeyError):
+        pass
+    return None
+
+
+def _dump_cache(location: Optional[str], items: List[Dict], etag: Optional[str]) -> None:
+    """
+    Cache the prices of a location.
+    The cache is an optimization, it is not written if the folder is not writable.
+    """
+    path = _cache_file(location)
+    content = json.dumps({'fetched_at': time.time(), 'etag': etag, 'items': items})
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside then moved, so a concurrent read never sees a partial file.
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.debug(f"Unable to cache the prices in '{path}'.")
+
+
+def _age(seconds: float) -> str:
+    """
+    Return a duration in hours or in days.
+    """
+    hours = int(seconds // 3600)
+    return f'{hours // 24} days' if hours >= 48 else f'{hours} hours'
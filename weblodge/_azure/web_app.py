@@ -1,8 +1,18 @@
 """
 Azure Web App representation.
 """
-from typing import Dict, Optional
+import io
+import os
+import json
+import time
+import zipfile
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
+from urllib3 import PoolManager
+
+from .kudu import Kudu
 from .resource import Resource
 from .appservice import AppService
 from .resource_group import ResourceGroup
@@ -11,11 +21,40 @@ from .interfaces import AzureWebApp, AzureLogLevel
 from .exceptions import CanNotChangeTheResourceLocation
 
 
-class WebApp(Resource, AzureWebApp):
+# Python version of the WebApp runtime.
+PYTHON_VERSION = '3.10'
+
+# HTTP connections to use for calls and mocks.
+HTTP = PoolManager()
+
+# Folder of the WebApp files kept between deployments.
+# The remote build may compress the application, so the updated files are not written
+# in the application folder but in this folder, and applied on the application at startup.
+_DEPLOYMENT_ROOT = 'site/weblodge'
+# Manifest of the last deployed package.
+_MANIFEST = f'{_DEPLOYMENT_ROOT}/weblodge.manifest'
+# Files updated since the last full deployment.
+_UPDATED_FILES = f'{_DEPLOYMENT_ROOT}/files'
+# Names of the files removed since the last full deployment, one per line.
+_REMOVED_FILES = f'{_DEPLOYMENT_ROOT}/removed'
+
+# Startup command of the WebApp, run from the application folder.
+# Files updated and removed since the last full deployment are applied before the
+# startup file of the package is run.
+_STARTUP_COMMAND = '; '.join((
+    f'cp -a /home/{_UPDATED_FILES}/. . 2>/dev/null',
+    f"xargs -a /home/{_REMOVED_FILES} -d '\\n' rm -f 2>/dev/null",
+    'sh weblodge.startup'
+))
+
+
+class WebApp(Resource, AzureWebApp):  # pylint: disable=too-many-public-methods
     """
     Azure Web App representation.
     """
     _cli_prefix: str = 'webapp'
+    # Azure Resource Manager API version used for direct calls.
+    _api_version: str = '2022-03-01'
 
     # pylint: disable=too-many-arguments
     def __init__(
@@ -27,10 +66,11 @@ class WebApp(Resource, AzureWebApp):
             from_az: Optional[Dict] = None
         ) -> None:
         super().__init__(name=name, from_az=from_az)
-        self.python_version = '3.10'
+        self.python_version = PYTHON_VERSION
         self._app_service = app_service
         self._resource_group = resource_group
         self._keyvault = keyvault
+        self._kudu: Optional[Kudu] = None
 
     @property
     def tier(self) -> AzureWebApp:
@@ -66,6 +106,26 @@ class WebApp(Resource, AzureWebApp):
         self._resource_group.location = location
         return self
 
+    @property
+    def _target(self) -> str:
+        """
+        Arguments targeting the WebApp in the Azure CLI.
+        """
+        return f'--resource-group {self._resource_group.name} --name {self.name}'
+
+    @property
+    def kudu(self) -> Kudu:
+        """
+        Kudu API of the WebApp.
+        """
+        if self._kudu is None:
+            scm_host = next(
+                (h for h in self._from_az['enabledHostNames'] if '.scm.' in h),
+                f'{self.name}.scm.azurewebsites.net'
+            )
+            self._kudu = Kudu(scm_host, self._access_token)
+        return self._kudu
+
     @property
     def domain(self) -> str:
         """
@@ -139,51 +199,150 @@ class WebApp(Resource, AzureWebApp):
             ))
         )
 
-    def deploy(self, src: str) -> None:
+    def deploy(self, src: str, manifest: Optional[bytes] = None) -> None:
         """
         Deploy an application zipped.
+        The `manifest` of the package is kept to update the files of the next deployments.
         """
+        self._reset_files()
         self._invoke(
             ' '.join((
                 f'{self._cli_prefix} deployment source config-zip',
-                f'-g {self._resource_group.name} -n {self.name}',
+                self._target,
                 f'--src {src}'
             ))
         )
+        if manifest is not None:
+            self.kudu.put_file(_MANIFEST, manifest)
 
-    def logs(self) -> None:
+    def deploy_stream(self, chunks: Iterable[bytes]) -> None:
         """
-        Stream WebApp logs.
-        This is a blocking operation. User must run CTRL+C to stop the process.
+        Deploy an application zipped, uploaded by chunks as it is produced.
         """
-        self._invoke(
-            f'{self._cli_prefix} log tail -g {self._resource_group.name} -n {self.name}',
-            log_outputs=True
+        self._reset_files()
+        self.kudu.zip_deploy(chunks)
+
+    def deployed_manifest(self) -> Optional[bytes]:
+        """
+        Return the manifest of the deployed package, None if it is unknown.
+        """
+        return self.kudu.get_file(_MANIFEST)
+
+    def deploy_files(self, package: bytes, removed: Iterable[str], manifest: bytes) -> None:
+        """
+        Update the deployed files with a zipped package and remove the `removed` files.
+        Files not in the package are kept.
+        Files are applied on the application when the WebApp starts.
+        """
+        kudu = self.kudu
+        with zipfile.ZipFile(io.BytesIO(package)) as zipf:
+            updated = set(zipf.namelist())
+        previously_removed = (kudu.get_file(_REMOVED_FILES) or b'').decode('utf-8').splitlines()
+
+        kudu.extract_zip(_UPDATED_FILES, package)
+        kudu.put_file(
+            _REMOVED_FILES,
+            '\n'.join(sorted(set(previously_removed).union(removed) - updated)).encode('utf-8')
         )
+        kudu.put_file(_MANIFEST, manifest)
+
+    def logs(self, path: str = '') -> Iterator[str]:
+        """
+        Stream WebApp log lines.
+        The `path` selects the logs on the server side. Ex: 'application', 'http'.
+        The iterator ends when the connection is closed.
+        """
+        yield from self.kudu.log_stream(path)
 
-    def update_environment(self, env: Dict) -> None:
+    def update_environment(self, env: Dict) -> bool:
         """
         Update the WebApp environment variables.
+        Return True if the WebApp restarts to apply the changes.
         """
-        env_formatted = []
+        # Insert new and updated secrets in KeyVault.
+        updated_secrets = self._keyvault.sync(env)
+
+        # References without version always resolve to the latest secret value.
+        references = {
+            name: f'@Microsoft.KeyVault(SecretUri={self._keyvault.secret_uri(name)})'
+            for name in env
+        }
+        # Variables previously set from the KeyVault but no longer in the environment.
+        keyvault_prefix = f'@Microsoft.KeyVault(SecretUri={self._keyvault.secret_uri("")}'
+        current = self._get_settings()
+        removed = [
+            name
+            for name, value in current.items()
+            if name not in env and (value or '').startswith(keyvault_prefix)
+        ]
+
+        if self._set_settings(references, removed, current):
+            return True
+
+        if updated_secrets:
+            # Settings are the same but secrets have new values.
+            # A restart forces the WebApp to resolve them again.
+            self.restart()
+            return True
+
+        return False
+
+    def run_from_package(self, enabled: bool, url: str = '') -> bool:
+        """
+        Run the WebApp from its package instead of extracting it.
+        The package is the last one uploaded, or the one at `url` if provided.
+        Packages run are pre-built, so the remote build is disabled, and enabled again by
+        the package deployment config when it is not run anymore.
+        Return True if the WebApp restarts to apply the changes.
+        """
+        if enabled:
+            return self._set_settings({
+                'WEBSITE_RUN_FROM_PACKAGE': url or '1',
+                'SCM_DO_BUILD_DURING_DEPLOYMENT': 'false'
+            })
+        return self._set_settings({}, removed=['WEBSITE_RUN_FROM_PACKAGE', 'SCM_DO_BUILD_DURING_DEPLOYMENT'])
 
-        # Insert secret in KeyVault.
-        for name, value in env.items():
-            secret = self._keyvault.set(name, value)
-            env_formatted.append(f'{name}=@Microsoft.KeyVault(SecretUri={secret.uri})')
+    def slot(self, name: str) -> 'WebAppSlot':
+        """
+        Return a deployment slot of the WebApp.
+        """
+        return WebAppSlot(self, name)
 
-        # Update the WebApp environment variables.
+    def swap(self, slot: str) -> None:
+        """
+        Swap the deployment slot with the production.
+        Swapping again restores the previous production.
+        """
         self._invoke(
             ' '.join((
-                f'{self._cli_prefix} config appsettings set',
-                f'--name {self.name}',
-                f'--resource-group {self._resource_group.name}'
+                f'{self._cli_prefix} deployment slot swap',
+                self._target,
+                f'--slot {slot}',
+                '--target-slot production'
             )),
-            to_json=False,
-            # Provide as independent arguments to avoid shell escaping issues.
-            command_args=['--settings', *env_formatted]
+            to_json=False
         )
 
+    def warm_up(self, paths: Iterable[str], timeout: int) -> bool:
+        """
+        Request the paths of the WebApp until they all respond or the timeout expires.
+        Return True if the WebApp responds.
+        """
+        deadline = time.monotonic() + timeout
+        for path in paths:
+            url = f"https://{self.domain}/{path.lstrip('/')}"
+            while True:
+                try:
+                    # Server errors are returned while the application is starting.
+                    if HTTP.request('GET', url, retries=False, timeout=30).status < 500:
+                        break
+                except Exception:  # pylint: disable=broad-exception-caught
+                    pass
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(5)
+        return True
+
     def deployment_in_progress(self) -> bool:
         """
         True if the WebApp is deploying.
@@ -191,8 +350,7 @@ class WebApp(Resource, AzureWebApp):
         deployments = self._invoke(
             ' '.join((
                 f'{self._cli_prefix} log deployment show',
-                f'--name {self.name}',
-                f'--resource-group {self._resource_group.name}'
+                self._target
             ))
         )
         return any(
@@ -205,7 +363,7 @@ class WebApp(Resource, AzureWebApp):
         Restart the WebApp.
         """
         self._invoke(
-            f'{self._cli_prefix} restart -g {self._resource_group.name} -n {self.name}',
+            f'{self._cli_prefix} restart {self._target}',
             to_json=False
         )
 
@@ -243,11 +401,78 @@ class WebApp(Resource, AzureWebApp):
         """
         self._from_az.update(
             self._invoke(
-                f'{self._cli_prefix} show --resource-group {self._resource_group.name} --name {self.name}'
+                f'{self._cli_prefix} show {self._target}'
             )
         )
         return self
 
+    def _access_token(self) -> Tuple[str, float]:
+        """
+        Return an access token of the current user and its expiration as a POSIX timestamp.
+        """
+        token = self._invoke('account get-access-token')
+        # Older Azure CLI only provide the expiration in local time.
+        expires_on = token.get('expires_on') or datetime.fromisoformat(token['expiresOn']).timestamp()
+        return token['accessToken'], float(expires_on)
+
+    def _reset_files(self) -> None:
+        """
+        Remove the files kept from the previous deployments.
+        """
+        self.kudu.delete_folder(_DEPLOYMENT_ROOT)
+
+    def _get_settings(self) -> Dict[str, str]:
+        """
+        Return the current WebApp application settings.
+        """
+        settings = self._invoke(
+            ' '.join((
+                f'{self._cli_prefix} config appsettings list',
+                self._target
+            ))
+        )
+        return {s['name']: s['value'] for s in settings}
+
+    def _set_settings(
+            self,
+            settings: Dict[str, str],
+            removed: Iterable[str] = (),
+            current: Optional[Dict[str, str]] = None
+        ) -> bool:
+        """
+        Add, update and remove WebApp application settings in one call.
+        Nothing is sent if the settings are unchanged, so the WebApp does not restart.
+        Return True if the settings have been updated.
+        """
+        if current is None:
+            current = self._get_settings()
+        new = {
+            **{k: v for k, v in current.items() if k not in removed},
+            **settings
+        }
+        if new == current:
+            return False
+
+        # Settings are provided in a file to avoid command line length limits.
+        # The file contains the KeyVault references, it is always removed.
+        settings_fd, settings_path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(settings_fd, 'w') as settings_file:
+                json.dump({'properties': new}, settings_file)
+
+            # Replace all the settings at once.
+            self._invoke(
+                ' '.join((
+                    'rest --method put',
+                    f'--uri {self.id_}/config/appsettings?api-version={self._api_version}',
+                )),
+                to_json=False,
+                command_args=['--body', f'@{settings_path}']
+            )
+        finally:
+            os.unlink(settings_path)
+        return True
+
     def _update_settings(self) -> None:
         """
         Update the WebApp settings.
@@ -260,7 +485,61 @@ class WebApp(Resource, AzureWebApp):
                 f'{self._cli_prefix} config set --resource-group {rg_name} --name {name}',
                 '--web-sockets-enabled true',
                 '--http20-enabled',
-                '--startup-file weblodge.startup',
                 f'--always-on {self._app_service.always_on_supported}',
+            )),
+            command_args=['--startup-file', _STARTUP_COMMAND]
+        )
+
+
+class WebAppSlot(WebApp):
+    """
+    Deployment slot of an Azure WebApp.
+    The slot shares the infrastructure of its WebApp.
+    """
+    def __init__(self, web_app: WebApp, slot: str) -> None:
+        # pylint: disable=protected-access
+        super().__init__(
+            name=web_app.name,
+            resource_group=web_app._resource_group,
+            app_service=web_app._app_service,
+            keyvault=web_app._keyvault
+        )
+        self.slot_name = slot
+        self._web_app = web_app
+
+    @property
+    def id_(self) -> str:
+        """
+        Return the slot ID.
+        """
+        return f'{self._web_app.id_}/slots/{self.slot_name}'
+
+    @property
+    def _target(self) -> str:
+        """
+        Arguments targeting the slot in the Azure CLI.
+        """
+        return f'{super()._target} --slot {self.slot_name}'
+
+    def exists(self) -> bool:
+        """
+        Return True if the slot exists.
+        """
+        slots = self._invoke(f'{self._cli_prefix} deployment slot list {super()._target}')
+        return any(s['name'].split('/')[-1] == self.slot_name for s in slots)
+
+    def create(self) -> 'WebAppSlot':
+        """
+        Create the slot with the configuration of its WebApp.
+        """
+        self._invoke(
+            ' '.join((
+                f'{self._cli_prefix} deployment slot create',
+                self._target,
+                f'--configuration-source {self.name}'
             ))
         )
+        # The slot has its own identity to read the KeyVault secrets.
+        identity = self._invoke(f'{self._cli_prefix} identity assign {self._target}')
+        self._keyvault.can_read_secrets(identity['principalId'])
+        return self
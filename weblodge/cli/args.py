@@ -30,7 +30,7 @@ def get_cli_args() -> Tuple[str, str]:
         'action',
         type=str,
         help='Action to perform.',
-        choices=['build', 'clean', 'deploy', 'delete', 'github', 'list', 'logs', 'app-tiers']
+        choices=['build', 'clean', 'deploy', 'delete', 'github', 'list', 'logs', 'app-tiers', 'rollback']
     )
     _parser.add_argument(
         '--config-file',
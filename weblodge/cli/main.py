@@ -16,7 +16,8 @@ from collections import defaultdict
 import weblodge.state as state
 from weblodge._azure import Service
 from weblodge.parameters import Parser, ConfigIsNotDefined, ConfigIsDefined, ConfigTrigger
-from weblodge.web_app import WebApp, NoMoreFreeApplicationAvailable, CanNotFindTierLocation, InvalidTier
+from weblodge.web_app import WebApp, NoMoreFreeApplicationAvailable, CanNotFindTierLocation, InvalidTier, \
+    SlotsNotSupported, WarmUpFailed, price_index
 
 from .args import get_cli_args, CLI_NAME
 
@@ -38,7 +39,7 @@ def main(return_web_app=False):
     try:
         config = state.load(config_file)
         if action == 'build':
-            success, config = web_app.build(config)
+            success, config = build(config, web_app, parameters)
         elif action == 'clean':
             success = clean(parameters, web_app)
         elif action == 'deploy':
@@ -55,6 +56,8 @@ def main(return_web_app=False):
             web_app.print_logs(config)
         elif action == 'app-tiers':
             success = list_app_tiers(config, web_app)
+        elif action == 'rollback':
+            success, config = web_app.rollback(config)
     except Exception as exception: # pylint: disable=broad-exception-caught
         print('Command failed with the following error:', exception, file=sys.stderr, flush=True)
 
@@ -67,12 +70,28 @@ def main(return_web_app=False):
     sys.exit(1)
 
 
+def build(config: Dict[str, str], web_app: WebApp, parameters: Parser):
+    """
+    Build the application, then again on each change if watched.
+    """
+    watch = _watch_trigger()
+    parameters.trigger_once(watch)
+    success, config = web_app.build(config)
+
+    if success and watch.trigger.watching:
+        web_app.watch(config)
+    return success, config
+
+
 def deploy(config: Dict[str, str], web_app: WebApp, parameters: Parser):
     """
     Deploy the application.
     """
     # The application can be built before being deployed.
     def _build(config):
+        # A streamed package is built during the upload.
+        if config.get('stream'):
+            return config
         success, config = web_app.build(config)
 
         if not success:
@@ -87,7 +106,9 @@ def deploy(config: Dict[str, str], web_app: WebApp, parameters: Parser):
         trigger=_build
     )
 
+    watch = _watch_trigger()
     parameters.trigger_once(build_too)
+    parameters.trigger_once(watch)
     try:
         success, config, tier = web_app.deploy(config)
     except NoMoreFreeApplicationAvailable as free_app_name:
@@ -107,11 +128,23 @@ def deploy(config: Dict[str, str], web_app: WebApp, parameters: Parser):
         )
         list_app_tiers(config, web_app)
         return False, config
+    except SlotsNotSupported as slots_not_supported:
+        print(
+            f'{slots_not_supported} Please, choose a Standard or Premium tier or deploy without slot.',
+            file=sys.stderr,
+            flush=True
+        )
+        return False, config
+    except WarmUpFailed as warm_up_failed:
+        print(warm_up_failed, file=sys.stderr, flush=True)
+        return False, config
 
     print(f'Estimated cost: ${tier.price_by_hour * 730:.2f}/month')
 
     if success:
         print(f"The application will soon be available at: {web_app.url()}", flush=True)
+        if watch.trigger.watching:
+            web_app.watch(config, deploy=True)
     else:
         print(
             'The application may not be deployed, but the infrastructure may be' \
@@ -203,6 +236,15 @@ def list_app_tiers(config, web_app) -> bool:
 
     print('Warning: There is no guarantee of the estimated price.')
 
+    # Tiers of several locations are compared by price.
+    if len({tier.location for tier in tiers}) > 1:
+        print('\nPaid tiers from the cheapest by core then by GB of RAM:')
+        print(' Name | Location             |    Price    | Price/core | Price/GB')
+        print('-------------------------------------------------------------------')
+        for (name, location), tier in price_index(tiers).items():
+            print(f'{name:>5} | {location:<20} |  ${tier.price_by_hour:.2f}/hour |    ${tier.price_by_core:.3f} |   ${tier.price_by_gb:.3f}')  # pylint: disable=line-too-long
+        return True
+
     # Group the tiers by description to print them by blocks.
     tiers_by_description = defaultdict(list)
     for tier in tiers:
@@ -248,6 +290,27 @@ def list_(web_app: WebApp):
             print(f"Application '{name}', can be deleted by running: `{CLI_NAME} delete --subdomain {name}`")
 
 
+class _Watching:
+    """
+    Trigger recording that the user asked to watch the application files.
+    """
+    def __init__(self) -> None:
+        self.watching = False
+
+    def __call__(self, config):
+        self.watching = True
+        return config
+
+
+def _watch_trigger() -> ConfigIsDefined:
+    return ConfigIsDefined(
+        name='watch',
+        description='Build again, and deploy again for the `deploy` command, when the application files change. Only the application code is updated.',  # pylint: disable=line-too-long
+        attending_value=False,
+        trigger=_Watching()
+    )
+
+
 def _validation_before_deletion(config):
     if input(f"Do you want to delete the application '{config['subdomain']}' (yes/no.)? ") != 'yes':
         print('Aborting.')
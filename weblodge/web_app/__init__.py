@@ -2,4 +2,6 @@
 Wrapper around Azure Web App components and settings.
 """
 from .web_app import WebApp
-from .exceptions import NoMoreFreeApplicationAvailable, CanNotFindTierLocation, InvalidTier
+from .tiers import price_index
+from .exceptions import NoMoreFreeApplicationAvailable, CanNotFindTierLocation, InvalidTier, \
+    SlotsNotSupported, WarmUpFailed
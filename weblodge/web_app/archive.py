@@ -0,0 +1,263 @@
+"""
+Low level operations on the package archive.
+
+The standard `zipfile` module compresses each member when it is written. These functions
+allow to copy members already compressed, from a previous archive or compressed elsewhere,
+without decompressing and compressing them again.
+
+The `Writer` relies on them to compress members in parallel: zlib releases the GIL, so
+members are compressed by a pool of threads and written in order by the calling thread.
+Members written by the `Writer` do not keep filesystem metadata, the same content always
+gives the same archive.
+"""
+import os
+import stat
+import zlib
+import shutil
+import struct
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Optional, Tuple
+
+
+# Size of the chunks read from the files.
+_CHUNK_SIZE = 1024 * 1024
+
+# Modification time of all the members, the oldest date supported by the zip format.
+EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def read_raw(zipf: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """
+    Return the compressed bytes of a member.
+    """
+    # pylint: disable=protected-access
+    with zipf._lock:
+        zipf.fp.seek(info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, zipf.fp.read(zipfile.sizeFileHeader))
+        # Skip the variable part of the local header.
+        zipf.fp.seek(
+            header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH],
+            1
+        )
+        return zipf.fp.read(info.compress_size)
+
+
+def copy_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """
+    Return the description of a member to write it in another archive.
+    """
+    new_info = zipfile.ZipInfo(info.filename, info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.create_system = info.create_system
+    new_info.external_attr = info.external_attr
+    new_info.file_size = info.file_size
+    new_info.compress_size = info.compress_size
+    new_info.CRC = info.CRC
+    return new_info
+
+
+def normalize(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """
+    Remove the filesystem metadata of a member description.
+    Only the executable permission is kept.
+    """
+    executable = (info.external_attr >> 16) & 0o111
+    info.date_time = EPOCH
+    info.create_system = 3  # Unix, whatever the building system.
+    info.external_attr = (stat.S_IFREG | (0o755 if executable else 0o644)) << 16
+    return info
+
+
+def write_raw(zipf: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes) -> None:
+    """
+    Write a member already compressed.
+    `info` must contain the compression method, the CRC and the sizes of the member.
+    """
+    zip64 = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+
+    # pylint: disable=protected-access
+    with zipf._lock:
+        if zipf._seekable:
+            zipf.fp.seek(zipf.start_dir)
+        info.header_offset = zipf.fp.tell()
+        zipf._writecheck(info)
+        zipf._didModify = True
+
+        zipf.fp.write(info.FileHeader(zip64))
+        zipf.fp.write(data)
+
+        zipf.filelist.append(info)
+        zipf.NameToInfo[info.filename] = info
+        zipf.start_dir = zipf.fp.tell()
+
+
+def compress(
+        path: str,
+        arcname: str,
+        compress_type: int = zipfile.ZIP_DEFLATED,
+        level: Optional[int] = None
+    ) -> Tuple[zipfile.ZipInfo, bytes]:
+    """
+    Compress a file and return its description and its compressed bytes.
+    The result can be written with `write_raw`.
+    """
+    info = zipfile.ZipInfo.from_file(path, arcname)
+    info.compress_type = compress_type
+
+    compressor = None
+    if compress_type == zipfile.ZIP_DEFLATED:
+        # Raw deflate stream, as expected in a zip archive.
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+            zlib.DEFLATED,
+            -15
+        )
+    elif compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f'Compression method {compress_type} is not supported.')
+
+    crc = 0
+    size = 0
+    chunks = []
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        chunks.append(compressor.flush())
+    data = b''.join(chunks)
+
+    info.CRC = crc
+    info.file_size = size
+    info.compress_size = len(data)
+    return info, data
+
+
+class Writer:
+    """
+    Write members in an archive, compressing them in parallel.
+
+    Members are written in the order they are added, so the archive is the same whatever
+    the number of workers. Only a limited number of members are compressed ahead of the
+    writing to bound the memory used.
+    """
+    # Files larger than this size are not loaded in memory.
+    # They are compressed by the writing thread.
+    large_file_size: int = 64 * 1024 * 1024
+
+    def __init__(
+            self,
+            zipf: zipfile.ZipFile,
+            workers: int = 0,
+            policy: Optional[Callable[[str, str], Tuple[int, Optional[int]]]] = None
+        ) -> None:
+        # Archive to write.
+        self.zipf = zipf
+        # Number of compression threads, all CPU cores by default.
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        # Return the compression method and level of a file.
+        # The archive compression is used by default.
+        self.policy = policy or (lambda path, arcname: (zipf.compression, zipf.compresslevel))
+        # Without parallelism, members are compressed while written.
+        self._executor = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+        # Members compressed or being compressed, in the writing order.
+        self._pending: Deque[Future] = deque()
+        # Maximum number of members compressed ahead of the writing.
+        self._window = self.workers * 2
+
+    def __enter__(self) -> 'Writer':
+        return self
+
+    def __exit__(self, exc_type, *_args) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.cancel()
+
+    def write(self, path: str, arcname: str):
+        """
+        Add a file to the archive.
+        """
+        if self._executor is None or os.path.getsize(path) > self.large_file_size:
+            self.flush()
+            self._write_file(path, arcname)
+        else:
+            self._submit(self._compress, path, arcname)
+
+    def copy(self, source: zipfile.ZipFile, info: zipfile.ZipInfo):
+        """
+        Add a member of another archive without compressing it again.
+        """
+        if self._executor is None:
+            write_raw(self.zipf, normalize(copy_info(info)), read_raw(source, info))
+        else:
+            self._submit(lambda: (normalize(copy_info(info)), read_raw(source, info)))
+
+    def writestr(self, arcname: str, data: str):
+        """
+        Add a generated file to the archive.
+        """
+        self.flush()
+        info = normalize(zipfile.ZipInfo(arcname))
+        info.compress_type = self.zipf.compression
+        info._compresslevel = self.zipf.compresslevel  # pylint: disable=protected-access
+        self.zipf.writestr(info, data)
+
+    def flush(self):
+        """
+        Write all the pending members.
+        """
+        while self._pending:
+            self._write_next()
+
+    def close(self):
+        """
+        Write all the pending members and stop the workers.
+        """
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def cancel(self):
+        """
+        Drop the pending members and stop the workers.
+        """
+        while self._pending:
+            self._pending.popleft().cancel()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def _submit(self, func: Callable[..., Tuple[zipfile.ZipInfo, bytes]], *args):
+        """
+        Compress a member in a worker, writing the oldest ones if the window is full.
+        """
+        while len(self._pending) >= self._window:
+            self._write_next()
+        self._pending.append(self._executor.submit(func, *args))
+
+    def _compress(self, path: str, arcname: str) -> Tuple[zipfile.ZipInfo, bytes]:
+        """
+        Compress a file as chosen by the policy.
+        """
+        info, data = compress(path, arcname, *self.policy(path, arcname))
+        return normalize(info), data
+
+    def _write_file(self, path: str, arcname: str):
+        """
+        Compress a file as chosen by the policy while writing it.
+        The file is not loaded in memory.
+        """
+        info = normalize(zipfile.ZipInfo.from_file(path, arcname))
+        info.compress_type, info._compresslevel = self.policy(path, arcname)  # pylint: disable=protected-access
+        with open(path, 'rb') as source, \
+             self.zipf.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as destination:
+            shutil.copyfileobj(source, destination, _CHUNK_SIZE)
+
+    def _write_next(self):
+        """
+        Write the oldest pending member, waiting for its compression.
+        """
+        info, data = self._pending.popleft().result()
+        write_raw(self.zipf, info, data)
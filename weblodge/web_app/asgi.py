@@ -0,0 +1,91 @@
+"""
+Validation of the ASGI application of the entry point.
+
+The entry point is read without being run: the application must be defined at its top
+level, by an assignment, an import or an asynchronous function. An object created by a
+WSGI framework or a synchronous function can not be served by uvicorn.
+"""
+import ast
+from typing import Dict, List, Optional, Set
+
+from .exceptions import FlaskAppNotFound, NotAnAsgiApplication
+
+
+# Factories of WSGI applications.
+WSGI_FACTORIES = {'Flask', 'Bottle', 'Pyramid', 'get_wsgi_application'}
+
+# Distributions providing the WebSocket protocol to uvicorn.
+WEBSOCKET_DISTRIBUTIONS = {'websockets', 'wsproto'}
+
+
+def validate(source: str, name: str) -> None:
+    """
+    Ensure the entry point source defines the ASGI application `name`.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as exception:
+        raise FlaskAppNotFound() from exception
+
+    definition = _definition(tree, name)
+    if definition is None:
+        raise FlaskAppNotFound()
+
+    if isinstance(definition, ast.FunctionDef):
+        raise NotAnAsgiApplication(f"'{name}' is a synchronous function, ASGI applications are asynchronous.")
+    if isinstance(definition, ast.Call):
+        factory = _name(definition.func)
+        if factory in WSGI_FACTORIES:
+            raise NotAnAsgiApplication(f"'{name}' is created by '{factory}', a WSGI application.")
+
+
+def check_requirements(distributions: Dict[str, Set[str]]) -> List[str]:
+    """
+    Return the warnings about the distributions required to serve an ASGI application.
+    """
+    if 'uvicorn' not in distributions:
+        return ["ASGI applications are served by uvicorn workers, 'uvicorn[standard]' must be in the requirements."]
+    if 'standard' not in distributions['uvicorn'] and not WEBSOCKET_DISTRIBUTIONS & distributions.keys():
+        return ["WebSockets are not supported without 'uvicorn[standard]' or 'websockets' in the requirements."]
+    return []
+
+
+def _definition(tree: ast.Module, name: str) -> Optional[ast.AST]:
+    """
+    Return the last top level definition of `name`: a function, a class, the value assigned
+    or the import. None if `name` is not defined.
+    """
+    definition = None
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == name:
+            definition = node
+        elif isinstance(node, ast.Assign) and any(_assigns(t, name) for t in node.targets):
+            definition = node.value
+        elif isinstance(node, ast.AnnAssign) and _assigns(node.target, name) and node.value is not None:
+            definition = node.value
+        elif isinstance(node, (ast.Import, ast.ImportFrom)) and \
+                any((a.asname or a.name.split('.')[0]) == name for a in node.names):
+            definition = node
+    return definition
+
+
+def _assigns(target: ast.AST, name: str) -> bool:
+    """
+    Return True if the assignment target binds `name`.
+    """
+    if isinstance(target, ast.Name):
+        return target.id == name
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return any(_assigns(t, name) for t in target.elts)
+    return False
+
+
+def _name(node: ast.AST) -> Optional[str]:
+    """
+    Return the name of a called object, as 'Flask' for `Flask` or `flask.Flask`.
+    """
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
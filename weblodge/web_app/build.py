@@ -2,22 +2,61 @@
 Based on Zip Deploy: https://learn.microsoft.com/en-us/azure/app-service/deploy-zip?tabs=cli
 
 The output generates a zip file containing
-- The user application code.
+- The user application code, or only the modules it can import with the tree shaking.
 - The user application requirements.
+- The user application dependencies if they are installed locally.
+- The wheels of the user application dependencies if they are installed from a wheelhouse.
 - A generated Kudu deployment configuration file.
-- A generated startup file.
+- A generated startup file, and a gunicorn configuration file with the preload or warm-up enabled.
+- A generated manifest of the package files, used by delta deployments.
+- The bytecode of the user application, if it is precompiled.
 
 This package is ready to be deployed on an Azure Web App.
+
+A manifest of the application files is stored next to the package. On the next build,
+unchanged files are copied already compressed from the previous package.
+
+The composition of the package is reported, stored next to the package and checked
+against the size budgets.
 """
 import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
 from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from contextlib import ExitStack
 import zipfile
 
 from weblodge.config import Item as ConfigItem
+from weblodge._azure import PYTHON_VERSION, get_hardware
+
+from . import archive, asgi, bytecode
+from .manifest import Manifest, content_digest
+from .compression import CompressionPolicy
+from .composition import Composition, SizeBudgets
+from .walker import walk
+from .tree_shaking import shake
+from .gunicorn import AUTO, ASGI_WORKER_CLASSES, ASYNC_WORKER_CLASSES, DEFAULT_WORKER_CLASS, GunicornSettings, \
+    GunicornTuning, config_file, required, warm_up_targets, warm_up_modules
+from .stream import Tee
+from .exceptions import RequirementsFileNotFound, EntryPointFileNotFound, FlaskAppNotFound, \
+    DependenciesInstallationFailed, PackageSizeBudgetExceeded, InvalidCompressionWorkers
 
-from .exceptions import RequirementsFileNotFound, EntryPointFileNotFound, FlaskAppNotFound
 
+logger = logging.getLogger('weblodge')
 
+# Number of files dropped by the tree shaking listed in the build report.
+_DROPPED_SHOWN = 20
+
+
+# pylint: disable=too-many-instance-attributes
 class BuildConfig:
     """
     Build configuration.
@@ -27,13 +66,38 @@ class BuildConfig:
     """
     # Zip file that contains the user application code.
     package: str = 'azwebapp.zip'
+    # Manifest of the application files in the package.
+    manifest: str = 'azwebapp.manifest.json'
+    # Digest of the package content.
+    digest: str = 'azwebapp.digest'
+    # Composition of the package.
+    composition: str = 'azwebapp.composition.json'
+    # Tier the gunicorn workers of the package are sized for.
+    tier_file: str = 'azwebapp.tier'
     # Kudu deployment config file.
     kudu_config: str = '.deployment'
     # Startup file.
     # Set in the deployment config too.
     startup_file: str = 'weblodge.startup'
+    # Gunicorn configuration file, with the preload and warm-up hooks.
+    gunicorn_config: str = 'weblodge.gunicorn.py'
+    # Manifest of the package files, deployed with the application.
+    site_manifest: str = 'weblodge.manifest'
     # Kudu needs a requirements file at the root of the zip.
     kudu_requirements_path = 'requirements.txt'
+    # Folder of the dependencies installed locally.
+    dependencies_path = '.python_packages/lib/site-packages'
+    # Platform of the Azure WebApp runtime.
+    # Dependencies installed locally must be built for it.
+    platform = 'manylinux2014_x86_64'
+    # Folder of the dependencies wheels in the package.
+    wheelhouse_path = 'wheelhouse'
+    # Local cache of the wheelhouses by requirements and runtime.
+    wheelhouse_cache = os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache'),
+        'weblodge',
+        'wheelhouse'
+    )
 
     # Configurable items of the build.
     items = [
@@ -54,17 +118,139 @@ class BuildConfig:
         ),
         ConfigItem(
             name='flask_app',
-            description='The Flask application object.',
+            description='The Flask application object, or the ASGI application object with the asgi app type.',
             default='app'
         ),
+        ConfigItem(
+            name='app_type',
+            description="Type of the application: WSGI as Flask ('wsgi') or ASGI as FastAPI, Starlette or Quart ('asgi').",  # pylint: disable=line-too-long
+            default='wsgi',
+            values_allowed=['wsgi', 'asgi']
+        ),
         ConfigItem(
             name='requirements',
             description='Requirements.txt file path.',
             default='requirements.txt'
-        )
+        ),
+        ConfigItem(
+            name='dependencies',
+            description="Where dependencies are installed: during the deployment on Azure ('remote'), during the build in the package ('local') or during the deployment on Azure from wheels downloaded during the build ('wheelhouse').",  # pylint: disable=line-too-long
+            default='remote',
+            values_allowed=['remote', 'local', 'wheelhouse']
+        ),
+        ConfigItem(
+            name='compression_workers',
+            description='Number of threads compressing the package files. All CPU cores by default.',
+            default='0'
+        ),
+        ConfigItem(
+            name='compression_level',
+            description='Compression level of the package files, from 0 (no compression) to 9 (smallest package).',
+            default='9'
+        ),
+        ConfigItem(
+            name='compression_levels',
+            description="Compression levels by file pattern, the first matching pattern is used. Ex: '*.csv=1,data/*=0'.",  # pylint: disable=line-too-long
+            default=''
+        ),
+        ConfigItem(
+            name='precompile',
+            description='Add the application bytecode, compiled for the Azure runtime, to the package to speed up cold starts.',  # pylint: disable=line-too-long
+            default='false',
+            values_allowed=['false', 'true']
+        ),
+        ConfigItem(
+            name='tree_shaking',
+            description='Package only the modules the entry point can import, the files of their folders and the kept files.',  # pylint: disable=line-too-long
+            default='false',
+            values_allowed=['false', 'true']
+        ),
+        ConfigItem(
+            name='keep',
+            description='Comma separated folders and files always packaged with the tree shaking.',
+            default='templates,static'
+        ),
+        ConfigItem(
+            name='size_budgets',
+            description="Maximum compressed sizes of the package and of the files matching patterns. Ex: 'package=50MB,*.bin=10MB'.",  # pylint: disable=line-too-long
+            default=''
+        ),
+        ConfigItem(
+            name='size_budgets_exceeded',
+            description='Warn or fail the build when a size budget is exceeded.',
+            default='warn',
+            values_allowed=['warn', 'fail']
+        ),
+        ConfigItem(
+            name='tier',
+            description='The application computational power (https://azure.microsoft.com/en-us/pricing/details/app-service/linux/).',  # pylint: disable=line-too-long
+            default='F1'
+        ),
+        ConfigItem(
+            name='gunicorn_workers',
+            description="Number of gunicorn workers. By default ('auto'), set from the tier cores and memory.",
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_threads',
+            description="Number of threads by gunicorn worker. By default ('auto'), 4 with the 'gthread' worker class.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_worker_class',
+            description="Gunicorn worker class. By default ('auto'), 'uvicorn' for ASGI applications, 'gevent' or 'eventlet' when required by the application, 'gthread' otherwise.",  # pylint: disable=line-too-long
+            default=AUTO,
+            values_allowed=[AUTO, 'sync', DEFAULT_WORKER_CLASS, *ASYNC_WORKER_CLASSES.values(), *ASGI_WORKER_CLASSES]
+        ),
+        ConfigItem(
+            name='gunicorn_timeout',
+            description="Seconds before a silent gunicorn worker is restarted. By default ('auto'), 120 seconds.",
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_graceful_timeout',
+            description="Seconds given to a gunicorn worker to finish its requests when it is restarted. By default ('auto'), 30 seconds.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_keepalive',
+            description="Seconds a connection is kept open between two requests. By default ('auto'), 75 seconds for the App Service front end.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_max_requests',
+            description="Requests served by a gunicorn worker before it is recycled, 0 to never recycle it. By default ('auto'), set from the tier memory by worker.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_max_requests_jitter',
+            description="Random requests added to the gunicorn max requests, so the workers are not recycled together. By default ('auto'), 10% of the max requests.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_backlog',
+            description="Connections waiting for a gunicorn worker. By default ('auto'), set from the tier cores.",
+            default=AUTO
+        ),
+        ConfigItem(
+            name='gunicorn_limit_request_line',
+            description="Maximum size of the request line in bytes, 0 for no limit. By default ('auto'), 4094 bytes.",  # pylint: disable=line-too-long
+            default=AUTO
+        ),
+        ConfigItem(
+            name='preload',
+            description='Load the application once before forking the gunicorn workers, which share its memory.',
+            default='false',
+            values_allowed=['false', 'true']
+        ),
+        ConfigItem(
+            name='warm_up',
+            description="Comma separated callables, as 'module:function', and URL paths called by each gunicorn worker before serving requests.",  # pylint: disable=line-too-long
+            default=''
+        ),
     ]
 
-    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-arguments,too-many-locals
     def __init__(
         self,
         src: str,
@@ -72,6 +258,29 @@ class BuildConfig:
         entry_point: str,
         flask_app: str,
         requirements: str,
+        dependencies: str,
+        compression_workers: str,
+        compression_level: str,
+        compression_levels: str,
+        precompile: str,
+        tree_shaking: str,
+        keep: str,
+        size_budgets: str,
+        size_budgets_exceeded: str,
+        tier: str,
+        gunicorn_workers: str,
+        gunicorn_threads: str,
+        gunicorn_worker_class: str,
+        app_type: str,
+        preload: str,
+        warm_up: str,
+        gunicorn_timeout: str,
+        gunicorn_graceful_timeout: str,
+        gunicorn_keepalive: str,
+        gunicorn_max_requests: str,
+        gunicorn_max_requests_jitter: str,
+        gunicorn_backlog: str,
+        gunicorn_limit_request_line: str,
         *_args,
         **_kwargs
     ):
@@ -85,6 +294,97 @@ class BuildConfig:
         self.flask_app = flask_app
         # User requirements file.
         self.requirements = requirements
+        # Where dependencies are installed.
+        self.dependencies = dependencies
+        # Number of compression threads, 0 to use all CPU cores.
+        self.compression_workers = compression_workers
+        # Compression level by default and by file pattern.
+        self.compression_level = compression_level
+        self.compression_levels = compression_levels
+        # Add the bytecode of the application.
+        self.precompile = precompile
+        # Package only the files the application can load, and the kept ones.
+        self.tree_shaking = tree_shaking
+        self.keep = keep
+        # Maximum compressed sizes by pattern, and what to do when they are exceeded.
+        self.size_budgets = size_budgets
+        self.size_budgets_exceeded = size_budgets_exceeded
+        # Tier the application is deployed on, sizing the gunicorn workers.
+        self.tier = tier
+        # Gunicorn settings, 'auto' to set them from the tier.
+        self.gunicorn_workers = gunicorn_workers
+        self.gunicorn_threads = gunicorn_threads
+        self.gunicorn_worker_class = gunicorn_worker_class
+        # WSGI or ASGI application.
+        self.app_type = app_type
+        # Load the application before forking the workers, and warm them up.
+        self.preload = preload
+        self.warm_up = warm_up
+        # Gunicorn timeouts, recycling and limits, 'auto' to set them from the tier.
+        self.gunicorn_timeout = gunicorn_timeout
+        self.gunicorn_graceful_timeout = gunicorn_graceful_timeout
+        self.gunicorn_keepalive = gunicorn_keepalive
+        self.gunicorn_max_requests = gunicorn_max_requests
+        self.gunicorn_max_requests_jitter = gunicorn_max_requests_jitter
+        self.gunicorn_backlog = gunicorn_backlog
+        self.gunicorn_limit_request_line = gunicorn_limit_request_line
+
+    @property
+    def local_dependencies(self) -> bool:
+        """
+        Return True if dependencies are installed in the package.
+        """
+        return self.dependencies == 'local'
+
+    @property
+    def wheelhouse(self) -> bool:
+        """
+        Return True if dependencies wheels are in the package.
+        """
+        return self.dependencies == 'wheelhouse'
+
+    @property
+    def precompiled(self) -> bool:
+        """
+        Return True if the bytecode of the application is in the package.
+        """
+        return self.precompile == 'true'
+
+    @property
+    def shaken(self) -> bool:
+        """
+        Return True if the files the application can not load are not packaged.
+        """
+        return self.tree_shaking == 'true'
+
+    @property
+    def asgi(self) -> bool:
+        """
+        Return True if the application is an ASGI application.
+        """
+        return self.app_type == 'asgi'
+
+    @property
+    def preloaded(self) -> bool:
+        """
+        Return True if the application is loaded before forking the workers.
+        """
+        return self.preload == 'true'
+
+    @property
+    def gunicorn_tuning(self) -> Dict[str, str]:
+        """
+        Return the gunicorn timeouts, recycling and limits by name.
+        """
+        return {
+            'timeout': self.gunicorn_timeout,
+            'graceful_timeout': self.gunicorn_graceful_timeout,
+            'keepalive': self.gunicorn_keepalive,
+            'max_requests': self.gunicorn_max_requests,
+            'max_requests_jitter': self.gunicorn_max_requests_jitter,
+            'backlog': self.gunicorn_backlog,
+            'limit_request_line': self.gunicorn_limit_request_line,
+        }
 
     @property
     def package_path(self) -> str:
@@ -93,25 +393,197 @@ class BuildConfig:
         """
         return os.path.join(self.dist, self.package)
 
+    @property
+    def manifest_path(self) -> str:
+        """
+        Return the manifest path.
+        """
+        return os.path.join(self.dist, self.manifest)
+
+    @property
+    def digest_path(self) -> str:
+        """
+        Return the package digest path.
+        """
+        return os.path.join(self.dist, self.digest)
+
+    @property
+    def composition_path(self) -> str:
+        """
+        Return the package composition path.
+        """
+        return os.path.join(self.dist, self.composition)
+
+    @property
+    def tier_path(self) -> str:
+        """
+        Return the path of the tier the package is sized for.
+        """
+        return os.path.join(self.dist, self.tier_file)
+
 
-def build(config: BuildConfig) -> None:
+# pylint: disable=too-many-locals,too-many-statements
+def build(config: BuildConfig, output: Optional[BinaryIO] = None, tee: bool = False) -> None:
     """
     Build an application to a deployable format.
+    The package is written in the `dist` folder, or in `output` when provided.
+    With `tee`, the package is written in both.
     """
+    start = time.perf_counter()
+    workers = _compression_workers(config)
+    policy = CompressionPolicy(config.compression_level, config.compression_levels)
+    budgets = SizeBudgets(config.size_budgets)
+
     # Create the destination directory.
     os.makedirs(config.dist, exist_ok=True)
 
-    # Zip all required files together.
-    with zipfile.ZipFile(config.package_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        _user_application(config, zipf)
-        _user_requirements(config, zipf)
-        _deployment_config(config, zipf)
-        _startup_file(config, zipf)
+    # The package is written aside, the previous one is read during the build.
+    package_tmp_path = f'{config.package_path}.tmp'
+    write_package = output is None or tee
+    previous = _PreviousBuild(config, policy)
+
+    try:
+        with ExitStack() as stack:
+            outputs = [output] if output is not None else []
+            if write_package:
+                outputs.append(stack.enter_context(open(package_tmp_path, 'wb')))
+            # The package is written in all the outputs.
+            target = outputs[0] if len(outputs) == 1 else Tee(outputs)
+
+            # Zip all required files together.
+            # Files are compressed in parallel and written in order.
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, compresslevel=policy.level) as zipf, \
+                 archive.Writer(zipf, workers, policy.choose) as writer:
+                manifest = _user_application(config, writer, previous)
+                manifest.policy = policy.digest
+                if config.precompiled:
+                    _user_bytecode(config, writer, manifest, previous)
+                _user_requirements(config, writer)
+                if config.local_dependencies:
+                    _user_dependencies(config, writer)
+                if config.wheelhouse:
+                    _user_wheelhouse(config, writer)
+                _deployment_config(config, writer)
+                _startup_file(config, writer)
+                digest = _site_manifest(config, writer, manifest)
+                members = zipf.infolist()
+
+        # The package is not kept above its budgets.
+        composition = Composition.from_members(members)
+        previous_composition = Composition.load(config.composition_path)
+        exceeded = budgets.exceeded(composition)
+        if exceeded and config.size_budgets_exceeded == 'fail':
+            raise PackageSizeBudgetExceeded('\n'.join(exceeded))
+    except BaseException:
+        if os.path.exists(package_tmp_path):
+            os.remove(package_tmp_path)
+        raise
+    finally:
+        previous.close()
+
+    # Without the package file, the manifest of the previous package is kept.
+    if write_package:
+        os.replace(package_tmp_path, config.package_path)
+        manifest.dump(config.manifest_path)
+        Path(config.digest_path).write_text(digest, encoding='utf-8')
+        composition.dump(config.composition_path, [config.dependencies_path])
+        Path(config.tier_path).write_text(config.tier, encoding='utf-8')
+    _summary(members, policy, previous, time.perf_counter() - start)
+    logger.info('Package composition:')
+    for line in composition.report(previous_composition, [config.dependencies_path]):
+        logger.info(line)
+    for budget in exceeded:
+        logger.warning(f'Size budget exceeded: {budget}.')
+    logger.info(f'Package digest: {digest}')
 
 
-def _user_application(config: BuildConfig, zipf: zipfile.ZipFile):
+def _compression_workers(config: BuildConfig) -> int:
+    """
+    Return the number of threads compressing the package files, 0 for all the CPU cores.
+    """
+    try:
+        workers = int(config.compression_workers)
+    except ValueError as exception:
+        raise InvalidCompressionWorkers(config.compression_workers) from exception
+    if workers < 0:
+        raise InvalidCompressionWorkers(config.compression_workers)
+    return workers
+
+
+def _summary(members: List[zipfile.ZipInfo], policy: CompressionPolicy, previous: '_PreviousBuild', duration: float):
+    """
+    Log the package size and what the compression policy saved.
+    """
+    size = sum(m.file_size for m in members)
+    compressed_size = sum(m.compress_size for m in members)
+    logger.info(
+        f'Package of {len(members)} files built in {duration:.1f}s: '
+        f'{_mb(compressed_size)}, {_mb(size - compressed_size)} saved by the compression.'
+    )
+    if policy.stored_files:
+        logger.info(
+            f'{policy.stored_files} already compressed files ({_mb(policy.stored_bytes)}) stored as is, '
+            f'about {policy.time_saved():.1f}s of compression saved.'
+        )
+    if previous.reused:
+        logger.info(f'{previous.reused} files reused from the previous build.')
+
+
+def _mb(size: int) -> str:
+    """
+    Return a size in megabytes.
+    """
+    return f'{size / 1024 / 1024:.1f}MB'
+
+
+class _PreviousBuild:
+    """
+    Package and manifest of the previous build.
+    Unchanged entries are read from it instead of being compressed again.
+    """
+    def __init__(self, config: BuildConfig, policy: CompressionPolicy) -> None:
+        self.manifest = Manifest()
+        self.zipf = None
+        # Number of entries copied from the previous package.
+        self.reused = 0
+
+        if os.path.exists(config.package_path):
+            try:
+                self.zipf = zipfile.ZipFile(config.package_path, 'r')  # pylint: disable=consider-using-with
+                self.manifest = Manifest.load(config.manifest_path)
+                # Files compressed differently can not be reused.
+                if self.manifest.policy != policy.digest:
+                    self.zipf.close()
+                    self.zipf = None
+            except zipfile.BadZipFile:
+                logger.debug('Previous package is not readable, building from scratch.')
+
+    def copy(self, writer: archive.Writer, name: str) -> bool:
+        """
+        Copy the entry `name` of the previous package.
+        Return False if the entry is not in the previous package.
+        """
+        if name not in self:
+            return False
+        writer.copy(self.zipf, self.zipf.getinfo(name))
+        self.reused += 1
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        return self.zipf is not None and name in self.zipf.NameToInfo
+
+    def close(self) -> None:
+        """
+        Close the previous package.
+        """
+        if self.zipf is not None:
+            self.zipf.close()
+
+
+def _user_application(config: BuildConfig, writer: archive.Writer, previous: _PreviousBuild) -> Manifest:
     """
     Create the zip folder.
+    Return the manifest of the application files.
     """
     # The requirements file name.
     # It will be added to the zip folder in a dedicated function.
@@ -123,68 +595,266 @@ def _user_application(config: BuildConfig, zipf: zipfile.ZipFile):
     if not entry_point.exists():
         raise EntryPointFileNotFound()
 
-    # Limited test on the definition of the flask app in the entry point file.
     entry_point_content = entry_point.read_text()
-    if f'{config.flask_app} ' not in entry_point_content and \
+    if config.asgi:
+        asgi.validate(entry_point_content, config.flask_app)
+    # Limited test on the definition of the flask app in the entry point file.
+    elif f'{config.flask_app} ' not in entry_point_content and \
        f'{config.flask_app}=' not in entry_point_content:
         raise FlaskAppNotFound()
 
-    for root_str, _, files in os.walk(config.src):
-        root = Path(root_str)
-        # Skip hidden files and directories.
-        if root.name.startswith('.'):
-            continue
-        # Skip bytecode files.
-        if '__pycache__' in root.name:
-            continue
-        # Skip the build directory.
-        # Path conversion removes unnecessary slashes.
-        if root.name.startswith(Path(config.dist).name):
+    # Ignored directories, as the build directory, are not walked.
+    # Skip the requirements file.
+    files = {
+        name: file_path
+        for file_path, name in walk(config.src, excluded=[config.dist])
+        if name != requirements_filename
+    }
+    if config.shaken:
+        files = _shake(config, files)
+
+    manifest = Manifest()
+    for name, file_path in files.items():
+        entry = previous.manifest.get(name, str(file_path), file_path.stat())
+        manifest.files[name] = entry
+
+        # Unchanged files are copied already compressed.
+        if previous.manifest.unchanged(name, entry) and previous.copy(writer, name):
             continue
-        # Zip the files.
-        for file in files:
-            file_path = root / file
-            relative_to = os.path.relpath(file_path, config.src)
+        writer.write(file_path, name)
+
+    return manifest
+
 
-            # Skip the requirements file.
-            if relative_to == requirements_filename:
-                continue
+def _shake(config: BuildConfig, files: Dict[str, Path]) -> Dict[str, Path]:
+    """
+    Return the files the application can load and the kept files.
+    Modules of the warm-up callables are loaded by the gunicorn configuration file.
+    Report the files dropped.
+    """
+    kept = shake(
+        files,
+        Path(config.entry_point).as_posix(),
+        config.keep.split(','),
+        warm_up_modules(warm_up_targets(config.warm_up, config.asgi))
+    )
+    dropped = [name for name in files if name not in kept]
+    if dropped:
+        size = sum(files[name].stat().st_size for name in dropped)
+        shown = ', '.join(dropped[:_DROPPED_SHOWN]) + (', ...' if len(dropped) > _DROPPED_SHOWN else '')
+        logger.info(f'{len(dropped)} files not loaded by the application dropped, {_mb(size)} saved: {shown}')
+        for name in dropped:
+            logger.debug(f'Dropped: {name}')
+    return {name: path for name, path in files.items() if name in kept}
+
+
+def _user_bytecode(config: BuildConfig, writer: archive.Writer, manifest: Manifest, previous: _PreviousBuild):
+    """
+    Add the bytecode of the application sources to the zip folder.
+    The bytecode of unchanged sources is copied from the previous package.
+    """
+    sources = [name for name in manifest.files if name.endswith('.py')]
+    reusable = {
+        name for name in sources
+        if previous.manifest.unchanged(name, manifest.files[name]) and bytecode.cache_name(name) in previous
+    }
+    compiled = _compile(
+        [(Path(config.src) / name, name) for name in sources if name not in reusable]
+    )
 
-            zipf.write(file_path, relative_to)
+    # Written in the sources order, whether they are compiled or copied.
+    for name in sources:
+        if name in reusable:
+            previous.copy(writer, bytecode.cache_name(name))
+        elif name in compiled:
+            writer.writestr(bytecode.cache_name(name), compiled[name])
 
 
-def _user_requirements(config: BuildConfig, zipf: zipfile.ZipFile):
+def _compile(sources: List[Tuple[Path, str]]) -> Dict[str, bytes]:
+    """
+    Compile the sources for the Azure runtime, warn about the ones that can not be compiled.
+    """
+    compiled, failed = bytecode.compile_sources(sources)
+    if failed:
+        logger.warning(f'{len(failed)} files can not be compiled, they are compiled on Azure: {", ".join(failed)}.')
+    return compiled
+
+
+def _user_requirements(config: BuildConfig, writer: archive.Writer):
     """
     Add the requirements file to the zip folder from the user folder.
+    With a wheelhouse, dependencies are installed from the package wheels only.
+    """
+    if config.wheelhouse:
+        writer.writestr(
+            config.kudu_requirements_path,
+            f'--no-index\n--find-links {config.wheelhouse_path}\n'
+            + _requirements_path(config).read_text(encoding='utf-8')
+        )
+    else:
+        writer.write(_requirements_path(config), config.kudu_requirements_path)
+
+
+def _requirements_path(config: BuildConfig) -> Path:
+    """
+    Return the requirements file path.
     The file can be in the local folder or in the `src` folder.
     """
     if os.path.exists(config.requirements):
-        zipf.write(config.requirements, config.kudu_requirements_path)
-        return
+        return Path(config.requirements)
 
     requirements_in_src = Path(config.src) / config.requirements
     if requirements_in_src.exists():
-        zipf.write(requirements_in_src, config.kudu_requirements_path)
-        return
+        return requirements_in_src
 
     raise RequirementsFileNotFound()
 
 
-def _deployment_config(config: BuildConfig, zipf: zipfile.ZipFile):
+def _user_dependencies(config: BuildConfig, writer: archive.Writer):
+    """
+    Install the dependencies for the Azure WebApp runtime and add them to the zip folder.
+    Only wheels can be installed as nothing can be built for another platform.
+    """
+    with tempfile.TemporaryDirectory() as target:
+        logger.info('Installing dependencies...')
+        installation = subprocess.run(
+            [
+                sys.executable, '-m', 'pip', 'install',
+                '--requirement', str(_requirements_path(config)),
+                '--target', target,
+                *_pip_runtime_args(config),
+                '--no-compile',
+                '--quiet',
+            ],
+            capture_output=True,
+            text=True,
+            check=False
+        )
+        if installation.returncode:
+            raise DependenciesInstallationFailed(installation.stderr)
+
+        sources = []
+        for root_str, dirs, files in os.walk(target):
+            # Sorted for a reproducible package.
+            dirs.sort()
+            for file in sorted(files):
+                file_path = Path(root_str) / file
+                relative_to = os.path.relpath(file_path, target)
+                name = f'{config.dependencies_path}/{Path(relative_to).as_posix()}'
+                writer.write(file_path, name)
+                if file.endswith('.py'):
+                    sources.append((file_path, name))
+
+        # Dependencies are installed without their bytecode.
+        if config.precompiled:
+            for name, data in _compile(sources).items():
+                writer.writestr(bytecode.cache_name(name), data)
+        # Files must be written before the removal of the folder.
+        writer.flush()
+
+
+def _user_wheelhouse(config: BuildConfig, writer: archive.Writer):
+    """
+    Add the wheels of the dependencies for the Azure WebApp runtime to the zip folder.
+    Wheels are downloaded once by requirements and runtime, then taken from the local cache.
+    """
+    requirements_path = _requirements_path(config)
+    digest = hashlib.sha256()
+    for path in _requirements_files(requirements_path):
+        digest.update(path.read_bytes())
+    digest.update(' '.join(_pip_runtime_args(config)).encode())
+    key = digest.hexdigest()
+    wheelhouse = Path(config.wheelhouse_cache) / key
+
+    if wheelhouse.is_dir():
+        logger.info('Dependencies found in the cache.')
+    else:
+        logger.info('Downloading dependencies...')
+        wheelhouse.parent.mkdir(parents=True, exist_ok=True)
+        download = tempfile.mkdtemp(prefix=f'{key}.', dir=wheelhouse.parent)
+        try:
+            installation = subprocess.run(
+                [
+                    sys.executable, '-m', 'pip', 'download',
+                    '--requirement', str(requirements_path),
+                    '--dest', download,
+                    *_pip_runtime_args(config),
+                    '--quiet',
+                ],
+                capture_output=True,
+                text=True,
+                check=False
+            )
+            if installation.returncode:
+                raise DependenciesInstallationFailed(installation.stderr)
+            # The wheelhouse is in the cache only once complete.
+            # Another build may have completed it meanwhile.
+            try:
+                os.rename(download, wheelhouse)
+            except OSError:
+                if not wheelhouse.is_dir():
+                    raise
+        finally:
+            shutil.rmtree(download, ignore_errors=True)
+
+    for wheel in sorted(wheelhouse.iterdir()):
+        writer.write(wheel, f'{config.wheelhouse_path}/{wheel.name}')
+
+
+def _requirements_files(requirements_path: Path) -> List[Path]:
+    """
+    Return the requirements file and the requirements and constraints files it includes, recursively.
+    Included paths are relative to the file including them, missing files are left to pip.
+    """
+    files = []
+    pending = [requirements_path]
+    while pending:
+        path = pending.pop(0).resolve()
+        if path in files or not path.is_file():
+            continue
+        files.append(path)
+        for line in path.read_text(encoding='utf-8').splitlines():
+            match = re.match(r'\s*(?:-r|-c|--requirement|--constraint)\s*=?\s*(\S+)', line)
+            if match:
+                pending.append(path.parent / match.group(1))
+    return files
+
+
+def _pip_runtime_args(config: BuildConfig) -> List[str]:
+    """
+    Return the pip arguments selecting the distributions of the Azure WebApp runtime.
+    Only wheels can be used as nothing can be built for another platform.
+    """
+    return [
+        '--platform', config.platform,
+        '--python-version', PYTHON_VERSION,
+        '--implementation', 'cp',
+        '--only-binary=:all:',
+    ]
+
+
+def _deployment_config(config: BuildConfig, writer: archive.Writer):
     """
     Add the deployment config file to the zip folder.
     """
     # Kudu deployment config file.
-    kudu_config = '''\
+    if config.local_dependencies:
+        kudu_config = '''\
+[config]
+# Packages are already installed in the package.
+SCM_DO_BUILD_DURING_DEPLOYMENT = false
+'''
+    else:
+        kudu_config = '''\
 [config]
 # Packages must be installed using during the deployment build.
 SCM_DO_BUILD_DURING_DEPLOYMENT = true
 '''
     # Add the deployment config file to the zip folder.
-    zipf.writestr(config.kudu_config, kudu_config)
+    writer.writestr(config.kudu_config, kudu_config)
 
 
-def _startup_file(config: BuildConfig, zipf: zipfile.ZipFile):
+def _startup_file(config: BuildConfig, writer: archive.Writer):
     """
     Add the startup file to the zip folder.
     """
@@ -197,9 +867,64 @@ def _startup_file(config: BuildConfig, zipf: zipfile.ZipFile):
     if ':' not in entrypoint:
         entrypoint = f'{entrypoint}:{config.flask_app}'
 
+    # Workers sized for the tier.
+    hardware = get_hardware(config.tier)
+    if hardware is None:
+        logger.warning(f"Unknown tier '{config.tier}', gunicorn is configured for 1 core and 1GB of memory.")
+    requirements = _requirements_path(config).read_text(encoding='utf-8')
+    gunicorn = GunicornSettings.for_tier(
+        hardware,
+        requirements,
+        config.gunicorn_workers,
+        config.gunicorn_threads,
+        config.gunicorn_worker_class,
+        config.asgi
+    )
+    tuning = GunicornTuning.for_tier(hardware, gunicorn.workers, config.gunicorn_tuning)
+    if config.asgi:
+        for warning in asgi.check_requirements(required(requirements)):
+            logger.warning(warning)
+
     # Default application configuration update with the user and entrypoint.
     # https://learn.microsoft.com/en-us/azure/developer/python/configure-python-web-app-on-app-service
-    startup_file_content = f'gunicorn --bind=0.0.0.0 --timeout 600 {entrypoint}'
+    startup_file_content = ' '.join(['gunicorn --bind=0.0.0.0', *gunicorn.options(), *tuning.options()])
+    warm_up = warm_up_targets(config.warm_up, config.asgi)
+    if config.preloaded or warm_up:
+        if config.preloaded and gunicorn.worker_class in ASYNC_WORKER_CLASSES.values():
+            logger.warning(
+                f"The '{gunicorn.worker_class}' workers patch the standard library after the application is preloaded."
+            )
+        writer.writestr(config.gunicorn_config, config_file(config.preloaded, warm_up))
+        startup_file_content += f' --config {config.gunicorn_config}'
+        if config.preloaded:
+            startup_file_content += ' --preload'
+    if config.local_dependencies:
+        # Dependencies are not installed in the WebApp environment.
+        startup_file_content += f' --pythonpath {config.dependencies_path}'
+    startup_file_content += f' {entrypoint}'
 
     # Add the startup file to the zip folder.
-    zipf.writestr(config.startup_file, startup_file_content)
+    writer.writestr(config.startup_file, startup_file_content)
+
+
+def _site_manifest(config: BuildConfig, writer: archive.Writer, manifest: Manifest) -> str:
+    """
+    Add the manifest of the package files to the zip folder.
+    Application files are identified by their hash, known from the manifest of the build.
+    Other files, generated from the application files and the configuration, by their CRC and size.
+    Return the digest of the manifest, which identifies the package content.
+    """
+    writer.flush()
+    site_manifest = json.dumps(
+        {
+            info.filename: (
+                f'sha256:{manifest.files[info.filename].sha256}' if info.filename in manifest.files
+                else f'{info.CRC:08x}:{info.file_size}'
+            )
+            for info in writer.zipf.infolist()
+        },
+        indent=1,
+        sort_keys=True
+    )
+    writer.writestr(config.site_manifest, site_manifest)
+    return content_digest(site_manifest.encode('utf-8'))
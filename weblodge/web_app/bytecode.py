@@ -0,0 +1,87 @@
+"""
+Compile the application sources for the Azure WebApp runtime.
+
+Without bytecode in the package, each new instance compiles the whole application on its
+first request. Sources are compiled by an interpreter of the runtime version, as bytecode
+is specific to a Python version, in unchecked hash-based files: they do not depend on the
+modification time of the sources, which is lost when the package is extracted.
+"""
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from weblodge._azure import PYTHON_VERSION
+
+from .exceptions import BytecodeCompilationFailed
+
+
+# Compile the files listed on the standard input, print the files that can not be compiled.
+_COMPILE_SCRIPT = '''\
+import sys, json, py_compile
+failed = []
+for source, cfile, dfile in json.load(sys.stdin):
+    try:
+        py_compile.compile(
+            source, cfile=cfile, dfile=dfile, doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+        )
+    except (py_compile.PyCompileError, UnicodeDecodeError):
+        failed.append(dfile)
+json.dump(failed, sys.stdout)
+'''
+
+
+def cache_name(name: str) -> str:
+    """
+    Return the name of the bytecode of the source `name` for the runtime.
+    Ex: 'package/module.py' -> 'package/__pycache__/module.cpython-310.pyc'.
+    """
+    folder, _, filename = name.rpartition('/')
+    cached = f"__pycache__/{filename[:-len('.py')]}.cpython-{PYTHON_VERSION.replace('.', '')}.pyc"
+    return f'{folder}/{cached}' if folder else cached
+
+
+def interpreter() -> Optional[str]:
+    """
+    Return the path of a Python interpreter of the runtime version, None if there is none.
+    """
+    if '.'.join(map(str, sys.version_info[:2])) == PYTHON_VERSION:
+        return sys.executable
+    return shutil.which(f'python{PYTHON_VERSION}')
+
+
+def compile_sources(sources: List[Tuple[Path, str]]) -> Tuple[Dict[str, bytes], List[str]]:
+    """
+    Compile the sources, given by path and name in the package.
+    Return the bytecode by source name and the names of the sources that can not be compiled.
+    """
+    if not sources:
+        return {}, []
+
+    executable = interpreter()
+    if executable is None:
+        raise BytecodeCompilationFailed(f'No Python {PYTHON_VERSION} interpreter found.')
+
+    with tempfile.TemporaryDirectory() as target:
+        files = [(str(path), str(Path(target, f'{i}.pyc')), name) for i, (path, name) in enumerate(sources)]
+        compilation = subprocess.run(
+            [executable, '-c', _COMPILE_SCRIPT],
+            input=json.dumps(files),
+            capture_output=True,
+            text=True,
+            check=False
+        )
+        if compilation.returncode:
+            raise BytecodeCompilationFailed(compilation.stderr)
+
+        failed = json.loads(compilation.stdout)
+        bytecode = {
+            name: Path(cfile).read_bytes()
+            for _, cfile, name in files
+            if name not in failed
+        }
+    return bytecode, failed
@@ -0,0 +1,233 @@
+"""
+Composition of a package and size budgets.
+
+The size of the package files is reported by folder, by extension and for the largest
+files, compressed and not, and compared with the previous build. It is stored next to
+the package.
+
+Budgets limit the compressed size of the package or of the files matching a pattern.
+Ex: 'package=50MB,*.bin=10MB'.
+"""
+import os
+import json
+import zipfile
+from fnmatch import fnmatch
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from .exceptions import InvalidSizeBudget
+
+
+# Budget of the whole package.
+PACKAGE_BUDGET = 'package'
+
+# Size units of the budgets.
+_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+@dataclass
+class Size:
+    """
+    Size of a group of files.
+    """
+    # Uncompressed size in bytes.
+    size: int = 0
+    # Compressed size in bytes.
+    compressed: int = 0
+    # Number of files.
+    files: int = 0
+
+    def add(self, size: int, compressed: int) -> None:
+        """
+        Add a file to the group.
+        """
+        self.size += size
+        self.compressed += compressed
+        self.files += 1
+
+
+class Composition:
+    """
+    Size of the package files by folder, by extension and by file.
+    """
+    # Number of groups listed in the report.
+    shown: int = 5
+
+    def __init__(self, files: Dict[str, Tuple[int, int]]) -> None:
+        # Uncompressed and compressed size by file name.
+        self.files = files
+
+    @classmethod
+    def from_members(cls, members: Iterable[zipfile.ZipInfo]) -> 'Composition':
+        """
+        Return the composition of the package members.
+        """
+        return cls({m.filename: (m.file_size, m.compress_size) for m in members})
+
+    @classmethod
+    def load(cls, path: str) -> 'Composition':
+        """
+        Load a composition file.
+        Return an empty composition if the file does not exist or is not readable.
+        """
+        try:
+            content = json.loads(Path(path).read_text(encoding='utf-8'))
+            return cls({name: (size, compressed) for name, (size, compressed) in content['files'].items()})
+        except (OSError, ValueError, TypeError, KeyError):
+            return cls({})
+
+    def dump(self, path: str, nested: Iterable[str] = ()) -> None:
+        """
+        Write the composition file.
+        """
+        content = {
+            'total': self.total.__dict__,
+            'folders': {k: v.__dict__ for k, v in self.by_folder(nested).items()},
+            'extensions': {k: v.__dict__ for k, v in self.by_extension().items()},
+            'files': dict(sorted(self.files.items())),
+        }
+        Path(path).write_text(json.dumps(content, indent=1), encoding='utf-8')
+
+    @property
+    def total(self) -> Size:
+        """
+        Return the size of the package.
+        """
+        total = Size()
+        for size, compressed in self.files.values():
+            total.add(size, compressed)
+        return total
+
+    def by_folder(self, nested: Iterable[str] = ()) -> Dict[str, Size]:
+        """
+        Return the size by top folder, by subfolder of the `nested` folders.
+        Files at the root of the package are grouped in '.'.
+        """
+        def folder(name: str) -> str:
+            for parent in nested:
+                if name.startswith(f'{parent}/'):
+                    return f"{parent}/{name[len(parent) + 1:].split('/')[0]}"
+            return name.split('/')[0] if '/' in name else '.'
+        return self._group(folder)
+
+    def by_extension(self) -> Dict[str, Size]:
+        """
+        Return the size by file extension.
+        """
+        return self._group(lambda name: os.path.splitext(name)[1].lower() or '(none)')
+
+    def report(self, previous: 'Composition', nested: Iterable[str] = ()) -> List[str]:
+        """
+        Return the lines of the composition report, compared with the previous package.
+        """
+        lines = []
+        for title, groups in (('Folders', self.by_folder(nested)), ('Extensions', self.by_extension())):
+            lines.append(f'{title}:')
+            for name, size in _largest(groups.items(), self.shown):
+                lines.append(f'  {name:<40} {_sizes(size.compressed, size.size)} ({size.files} files)')
+        lines.append('Largest files:')
+        for name, (size, compressed) in _largest(self.files.items(), self.shown):
+            lines.append(f'  {name:<40} {_sizes(compressed, size)}')
+
+        if previous.files:
+            total, previous_total = self.total, previous.total
+            lines.append(
+                f'Since the previous build: {_delta(total.compressed - previous_total.compressed)} compressed, '
+                f'{_delta(total.size - previous_total.size)} uncompressed.'
+            )
+            changes = {
+                name: self.files.get(name, (0, 0))[1] - previous.files.get(name, (0, 0))[1]
+                for name in set(self.files) | set(previous.files)
+            }
+            changed = sorted(((n, c) for n, c in changes.items() if c), key=lambda c: (-abs(c[1]), c[0]))
+            for name, change in changed[:self.shown]:
+                status = 'added' if name not in previous.files else 'removed' if name not in self.files else 'changed'
+                lines.append(f'  {name:<40} {_delta(change):>9} ({status})')
+        return lines
+
+    def _group(self, key) -> Dict[str, Size]:
+        """
+        Return the size of the files grouped by `key`.
+        """
+        groups: Dict[str, Size] = {}
+        for name, (size, compressed) in self.files.items():
+            groups.setdefault(key(name), Size()).add(size, compressed)
+        return groups
+
+
+class SizeBudgets:
+    """
+    Maximum compressed sizes of the package and of the files matching patterns.
+    """
+    def __init__(self, budgets: str = '') -> None:
+        # Maximum size in bytes by pattern, the package budget is named 'package'.
+        self.budgets: List[Tuple[str, int]] = []
+        for pattern_size in filter(None, (p.strip() for p in budgets.split(','))):
+            pattern, _, size = pattern_size.rpartition('=')
+            if not pattern:
+                raise InvalidSizeBudget(pattern_size)
+            self.budgets.append((pattern.strip(), to_bytes(size)))
+
+    def exceeded(self, composition: Composition) -> List[str]:
+        """
+        Return the description of the budgets exceeded by the package.
+        """
+        exceeded = []
+        for pattern, budget in self.budgets:
+            if pattern == PACKAGE_BUDGET:
+                size = composition.total.compressed
+            else:
+                size = sum(c for name, (_, c) in composition.files.items() if fnmatch(name, pattern))
+            if size > budget:
+                exceeded.append(f"'{pattern}' is {_human(size)}, above its budget of {_human(budget)}")
+        return exceeded
+
+
+def to_bytes(size: str) -> int:
+    """
+    Convert a size as '50MB' to bytes.
+    """
+    value = size.strip().upper()
+    unit = next((u for u in sorted(_UNITS, key=len, reverse=True) if value.endswith(u)), 'B')
+    try:
+        number = float(value[:-len(unit)] if value.endswith(unit) else value)
+    except ValueError as exception:
+        raise InvalidSizeBudget(size) from exception
+    if number < 0:
+        raise InvalidSizeBudget(size)
+    return int(number * _UNITS[unit])
+
+
+def _largest(items, count: int) -> list:
+    """
+    Return the `count` largest items by compressed size.
+    """
+    def compressed(item) -> int:
+        value = item[1]
+        return value.compressed if isinstance(value, Size) else value[1]
+    return sorted(items, key=compressed, reverse=True)[:count]
+
+
+def _sizes(compressed: int, size: int) -> str:
+    """
+    Return the compressed and uncompressed sizes.
+    """
+    return f'{_human(compressed):>9} ({_human(size)} uncompressed)'
+
+
+def _delta(size: int) -> str:
+    """
+    Return a size change with its sign.
+    """
+    return f"{'+' if size >= 0 else '-'}{_human(abs(size))}"
+
+
+def _human(size: int) -> str:
+    """
+    Return a size in the largest unit below it.
+    """
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= _UNITS[unit]:
+            return f'{size / _UNITS[unit]:.1f}{unit}'
+    return f'{size}B'
@@ -0,0 +1,126 @@
+"""
+Compression policy of the package files.
+
+Already compressed files (images, fonts, archives...) do not shrink when compressed again,
+they are stored as is to save the compression time. Other files are compressed at the
+configured level, which can be customized by file pattern.
+"""
+import os
+import time
+import zlib
+import zipfile
+import threading
+from fnmatch import fnmatch
+from typing import List, Optional, Tuple
+
+from .exceptions import InvalidCompressionLevel
+
+
+# Extensions of files already compressed.
+INCOMPRESSIBLE_EXTENSIONS = {
+    # Images.
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico',
+    # Fonts.
+    '.woff', '.woff2',
+    # Audio and video.
+    '.mp3', '.mp4', '.ogg', '.webm',
+    # Archives.
+    '.gz', '.tgz', '.bz2', '.xz', '.zst', '.br', '.zip', '.whl', '.egg', '.jar', '.7z', '.rar',
+}
+
+
+class CompressionPolicy:
+    """
+    Choose the compression of each file of the package.
+    Statistics on the stored files are kept to be reported in the build summary.
+    """
+    # Files smaller than this size are compressed without trial.
+    trial_min_size: int = 16 * 1024
+    # Bytes compressed during the trial.
+    trial_size: int = 64 * 1024
+    # Files are stored if the trial does not reduce them below this ratio.
+    min_ratio: float = 0.9
+
+    def __init__(self, level: str = '9', levels: str = '') -> None:
+        # Default compression level.
+        self.level = _to_level(level)
+        # Compression levels by file pattern, the first matching pattern is used.
+        # Ex: '*.csv=1,data/*=0'
+        self.levels: List[Tuple[str, int]] = []
+        for pattern_level in filter(None, (p.strip() for p in levels.split(','))):
+            pattern, _, level_str = pattern_level.rpartition('=')
+            if not pattern:
+                raise InvalidCompressionLevel(pattern_level)
+            self.levels.append((pattern.strip(), _to_level(level_str)))
+
+        # Files stored without compression.
+        self.stored_files = 0
+        self.stored_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def digest(self) -> str:
+        """
+        Return a value identifying the policy.
+        Files compressed with another policy can not be reused.
+        """
+        return ','.join([str(self.level)] + [f'{p}={l}' for p, l in self.levels])
+
+    def choose(self, path: str, arcname: str) -> Tuple[int, Optional[int]]:
+        """
+        Return the compression method and level of a file.
+        """
+        for pattern, level in self.levels:
+            if fnmatch(arcname, pattern):
+                return self._stored(path) if level == 0 else (zipfile.ZIP_DEFLATED, level)
+
+        if self.level == 0 or os.path.splitext(arcname)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+            return self._stored(path)
+
+        if os.path.getsize(path) >= self.trial_min_size and not self._compressible(path):
+            return self._stored(path)
+
+        return zipfile.ZIP_DEFLATED, self.level
+
+    def time_saved(self) -> float:
+        """
+        Return an estimation of the compression time saved by the stored files in seconds.
+        """
+        if not self.stored_bytes:
+            return 0.0
+
+        # Measure the compression speed of incompressible data.
+        sample = os.urandom(1024 * 1024)
+        start = time.perf_counter()
+        zlib.compress(sample, self.level or zlib.Z_DEFAULT_COMPRESSION)
+        return self.stored_bytes * (time.perf_counter() - start) / len(sample)
+
+    def _compressible(self, path: str) -> bool:
+        """
+        Compress the beginning of the file quickly and return True if it shrinks enough.
+        """
+        with open(path, 'rb') as file:
+            sample = file.read(self.trial_size)
+        return len(zlib.compress(sample, 1)) < len(sample) * self.min_ratio
+
+    def _stored(self, path: str) -> Tuple[int, None]:
+        """
+        Count a stored file.
+        """
+        with self._lock:
+            self.stored_files += 1
+            self.stored_bytes += os.path.getsize(path)
+        return zipfile.ZIP_STORED, None
+
+
+def _to_level(level: str) -> int:
+    """
+    Convert a compression level and ensure it is valid.
+    """
+    try:
+        value = int(level)
+    except ValueError as exception:
+        raise InvalidCompressionLevel(level) from exception
+    if not 0 <= value <= 9:
+        raise InvalidCompressionLevel(level)
+    return value
@@ -0,0 +1,90 @@
+"""
+Delta between a package and the deployed application.
+
+Each package contains the manifest of its files. Comparing it with the manifest of the
+deployed application gives the files to upload and the files to remove, so a small
+change uploads a small package.
+
+A delta is not possible when the requirements or the deployment configuration changed:
+the application must then be built again on Azure by a full deployment.
+"""
+import io
+import json
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from . import archive
+from .build import BuildConfig
+from .manifest import content_digest
+
+
+# Files requiring a full deployment when they change.
+FULL_DEPLOYMENT_FILES = (BuildConfig.kudu_requirements_path, BuildConfig.kudu_config)
+
+
+@dataclass
+class Delta:
+    """
+    Changes to apply to the deployed application.
+    """
+    # Zipped package of the changed and added files, with the new manifest.
+    package: bytes
+    # Files changed or added.
+    changed: List[str]
+    # Files removed.
+    removed: List[str]
+    # Manifest of the package.
+    manifest: bytes
+
+
+def delta(package_path: str, deployed_manifest: Optional[bytes]) -> Optional[Delta]:
+    """
+    Return the changes between the package and the deployed application.
+    Return None if a full deployment is required.
+    """
+    if deployed_manifest is None:
+        return None
+    try:
+        deployed: Dict[str, str] = json.loads(deployed_manifest)
+    except ValueError:
+        return None
+
+    with zipfile.ZipFile(package_path) as zipf:
+        if BuildConfig.site_manifest not in zipf.NameToInfo:
+            return None
+        manifest = zipf.read(BuildConfig.site_manifest)
+        local: Dict[str, str] = json.loads(manifest)
+
+        if any(local.get(name) != deployed.get(name) for name in FULL_DEPLOYMENT_FILES):
+            return None
+
+        changed = sorted(name for name, signature in local.items() if deployed.get(name) != signature)
+        removed = sorted(set(deployed) - set(local))
+
+        # Members are copied already compressed.
+        package = io.BytesIO()
+        with zipfile.ZipFile(package, 'w') as delta_zipf:
+            for name in changed + [BuildConfig.site_manifest]:
+                info = zipf.getinfo(name)
+                archive.write_raw(delta_zipf, archive.copy_info(info), archive.read_raw(zipf, info))
+
+    return Delta(package.getvalue(), changed, removed, manifest)
+
+
+def package_manifest(package_path: str) -> Optional[bytes]:
+    """
+    Return the manifest of a package, None if the package has no manifest.
+    """
+    with zipfile.ZipFile(package_path) as zipf:
+        if BuildConfig.site_manifest not in zipf.NameToInfo:
+            return None
+        return zipf.read(BuildConfig.site_manifest)
+
+
+def package_digest(package_path: str) -> Optional[str]:
+    """
+    Return the digest of a package content, None if the package has no manifest.
+    """
+    manifest = package_manifest(package_path)
+    return None if manifest is None else content_digest(manifest)
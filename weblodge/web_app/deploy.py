@@ -8,17 +8,31 @@ The infrastructure is composed of:
 
 All that infrastructure is created in the same Azure location and in the same Azure
 Resource Group.
+
+When a deployment slot is provided, the application is deployed on the slot, warmed up,
+then swapped with the production. The production never runs a cold application.
+
+When streamed, the package is uploaded while it is built, without being written on disk.
+
+When the application is already deployed, only the files changed since the last deployment
+are uploaded. The whole package is uploaded if the requirements changed.
 """
 import os
 import random
 import string
 import logging
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
 
 from weblodge.config import Item as ConfigItem
 from weblodge._azure import AzureService, AzureWebApp, AzureLogLevel
 
 from .shared import WEBAPP_TAGS
-from .exceptions import NoMoreFreeApplicationAvailable
+from .build import BuildConfig
+from .exceptions import NoMoreFreeApplicationAvailable, WarmUpFailed
+from .delta import delta, package_digest, package_manifest
+from .manifest import content_digest
+from .stream import PackageStream
 from .utils import set_webapp_env_var
 
 
@@ -71,6 +85,47 @@ class DeploymentConfig:
             description='The file containing the environment variable.',
             default='.env'
         ),
+        ConfigItem(
+            name='dependencies',
+            description="Where dependencies are installed: during the deployment on Azure ('remote'), during the build in the package ('local') or during the deployment on Azure from wheels downloaded during the build ('wheelhouse').",  # pylint: disable=line-too-long
+            default='remote',
+            values_allowed=['remote', 'local', 'wheelhouse']
+        ),
+        ConfigItem(
+            name='package_url',
+            description="URL of the package to run when dependencies are installed locally. The local package is uploaded if not provided.",  # pylint: disable=line-too-long
+            default=''
+        ),
+        ConfigItem(
+            name='slot',
+            description='Deploy on this slot then swap it with the production. Only for Standard and Premium tiers.',  # pylint: disable=line-too-long
+            default=''
+        ),
+        ConfigItem(
+            name='warm_up_paths',
+            description='Comma separated paths requested on the slot before the swap.',
+            default='/'
+        ),
+        ConfigItem(
+            name='warm_up_timeout',
+            description='Maximum time in seconds to wait for the slot to respond.',
+            default='300'
+        ),
+        ConfigItem(
+            name='stream',
+            description='Build the application while uploading it, without writing the package on disk.',
+            attending_value=False
+        ),
+        ConfigItem(
+            name='tee',
+            description='Write the package on disk too when it is streamed.',
+            attending_value=False
+        ),
+        ConfigItem(
+            name='full_deploy',
+            description='Upload the whole application, even if only some files changed.',
+            attending_value=False
+        ),
         ConfigItem(
             name='log_level',
             description='The log level of the application infrastructure.',
@@ -79,7 +134,7 @@ class DeploymentConfig:
         ),
     ]
 
-    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-arguments,too-many-locals,keyword-arg-before-vararg
     def __init__(
             self,
             subdomain,
@@ -89,6 +144,14 @@ class DeploymentConfig:
             dist,
             env_file,
             log_level,
+            dependencies='remote',
+            package_url='',
+            slot='',
+            warm_up_paths='/',
+            warm_up_timeout='300',
+            stream=False,
+            tee=False,
+            full_deploy=False,
             *_args,
             **_kwargs
         ):
@@ -108,6 +171,22 @@ class DeploymentConfig:
         self.env_file = env_file
         # Application log level.
         self.log_level = log_level
+        # Packages with local dependencies are run as is.
+        self.run_from_package = dependencies == 'local'
+        # Package to run instead of the local one.
+        self.package_url = package_url
+        # Slot deployed then swapped with the production.
+        self.slot = slot
+        # Paths requested to warm up the slot.
+        self.warm_up_paths = [p.strip() for p in warm_up_paths.split(',') if p.strip()]
+        # Maximum waiting time of the slot warm up.
+        self.warm_up_timeout = int(warm_up_timeout)
+        # The package is built during the upload.
+        self.stream = stream
+        # The package streamed is written on disk too.
+        self.tee = tee
+        # Upload the whole package even if a delta is possible.
+        self.full_deploy = full_deploy
 
         # Infrastructure tags.
         self.tags = {
@@ -115,9 +194,14 @@ class DeploymentConfig:
         }
 
 
-def deploy(azure_service: AzureService, config: DeploymentConfig) -> AzureWebApp:
+def deploy(
+        azure_service: AzureService,
+        config: DeploymentConfig,
+        package: Optional[Callable[[BinaryIO], None]] = None
+    ) -> AzureWebApp:
     """
     Deploy the application to Azure and return its URL.
+    When streamed, `package` builds the package in the file object provided.
     """
     web_app = azure_service.get_web_app(config.subdomain)
     tags = {**config.tags, **WEBAPP_TAGS}
@@ -143,15 +227,119 @@ def deploy(azure_service: AzureService, config: DeploymentConfig) -> AzureWebApp
     web_app.set_log_level(log_level)
     logger.info('The log level has been set.')
 
-    set_webapp_env_var(web_app, config.env_file, config.env_update_waiting_time)
+    # The application is deployed on the slot if any.
+    target = web_app
+    if config.slot:
+        target = web_app.slot(config.slot)
+        if not target.exists():
+            logger.info(f"Creating the slot '{config.slot}'...")
+            target.create()
+
+    set_webapp_env_var(target, config.env_file, config.env_update_waiting_time)
+
+    target.run_from_package(config.run_from_package, config.package_url)
+    _upload(target, config, package)
 
-    logger.info('Uploading the application...')
-    web_app.deploy(os.path.join(config.dist, config.package))
-    logger.info('The application has been uploaded.')
+    if config.slot:
+        _swap(web_app, target, config)
 
     return web_app
 
 
+def update(
+        azure_service: AzureService,
+        config: DeploymentConfig,
+        package: Optional[Callable[[BinaryIO], None]] = None
+    ) -> AzureWebApp:
+    """
+    Upload the application to the existing WebApp, or to its slot, without updating the infrastructure.
+    A slot is not swapped.
+    """
+    web_app = azure_service.get_web_app(config.subdomain)
+    target = web_app.slot(config.slot) if config.slot else web_app
+    _upload(target, config, package)
+    return web_app
+
+
+def _upload(target: AzureWebApp, config: DeploymentConfig, package: Optional[Callable[[BinaryIO], None]]):
+    """
+    Upload the application, only the files changed when possible.
+    """
+    if config.run_from_package and config.package_url:
+        logger.info(f"The application runs the package '{config.package_url}'.")
+    elif config.stream:
+        logger.info('Building and uploading the application...')
+        with PackageStream(package) as chunks:
+            target.deploy_stream(chunks)
+        logger.info('The application has been uploaded.')
+    else:
+        package_path = os.path.join(config.dist, config.package)
+        _check_tier(config)
+        deployed_manifest = None if config.full_deploy else target.deployed_manifest()
+
+        if deployed_manifest is not None and package_digest(package_path) == content_digest(deployed_manifest):
+            logger.info(
+                'The package is already deployed, its manifest is the same as the deployed one: nothing to upload. '
+                'Use --full-deploy to upload it anyway.'
+            )
+        # A package run as is can not be updated file by file.
+        elif config.full_deploy or config.run_from_package or \
+                not _deploy_delta(target, package_path, deployed_manifest):
+            logger.info('Uploading the application...')
+            target.deploy(package_path, package_manifest(package_path))
+            logger.info('The application has been uploaded.')
+
+
+def _check_tier(config: DeploymentConfig):
+    """
+    Warn if the gunicorn workers of the package are sized for another tier.
+    """
+    tier_path = os.path.join(config.dist, BuildConfig.tier_file)
+    if not os.path.exists(tier_path):
+        return
+    built_tier = Path(tier_path).read_text(encoding='utf-8').strip()
+    if built_tier.lower() != config.tier.lower():
+        logger.warning(
+            f"The gunicorn workers of the package are sized for the tier '{built_tier}', not '{config.tier}'. "
+            f'Build the application with --tier {config.tier} or deploy with --build.'
+        )
+
+
+def _deploy_delta(target: AzureWebApp, package_path: str, deployed_manifest: Optional[bytes]) -> bool:
+    """
+    Upload the files changed since the last deployment.
+    Return False if a full deployment is required.
+    """
+    changes = delta(package_path, deployed_manifest)
+    if changes is None:
+        return False
+
+    if not changes.changed and not changes.removed:
+        logger.info('The application files are unchanged.')
+        return True
+
+    logger.info(f'Uploading {len(changes.changed)} changed files and removing {len(changes.removed)} files...')
+    target.deploy_files(changes.package, changes.removed, changes.manifest)
+    target.restart()
+    logger.info(f'The application has been updated ({len(changes.package)} bytes uploaded).')
+    return True
+
+
+def _swap(web_app: AzureWebApp, slot: AzureWebApp, config: DeploymentConfig):
+    """
+    Warm up the slot then swap it with the production.
+    The production is not updated if the slot does not respond.
+    """
+    logger.info(f"Warming up the slot '{config.slot}'...")
+    if not slot.warm_up(config.warm_up_paths, config.warm_up_timeout):
+        raise WarmUpFailed(
+            f"The slot '{config.slot}' does not respond after {config.warm_up_timeout}s. The production is unchanged."  # pylint: disable=line-too-long
+        )
+    logger.info(f"Swapping the slot '{config.slot}' with the production...")
+    web_app.swap(config.slot)
+    logger.info('The slot has been swapped.')
+
+
 def _set_tier(
         azure_service: AzureService,
         config: DeploymentConfig,
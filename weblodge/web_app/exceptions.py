@@ -25,6 +25,69 @@ class FlaskAppNotFound(BuildException):
     """
 
 
+class NotAnAsgiApplication(BuildException):
+    """
+    The application object in the entry point file is not an ASGI application.
+    Contains the reason.
+    """
+
+
+class DependenciesInstallationFailed(BuildException):
+    """
+    The dependencies can not be installed locally.
+    Contains the installer error output.
+    """
+
+
+class InvalidCompressionWorkers(BuildException):
+    """
+    The number of compression workers is not valid.
+    Contains the invalid value.
+    """
+
+
+class InvalidCompressionLevel(BuildException):
+    """
+    A compression level is not valid.
+    Contains the invalid value.
+    """
+
+
+class BytecodeCompilationFailed(BuildException):
+    """
+    The application sources can not be compiled for the Azure runtime.
+    Contains the reason of the failure.
+    """
+
+
+class InvalidSizeBudget(BuildException):
+    """
+    A size budget is not valid.
+    Contains the invalid value.
+    """
+
+
+class PackageSizeBudgetExceeded(BuildException):
+    """
+    The package exceeds its size budgets.
+    Contains the budgets exceeded.
+    """
+
+
+class InvalidGunicornSetting(BuildException):
+    """
+    A gunicorn setting is not valid.
+    Contains the invalid setting.
+    """
+
+
+class InvalidWarmUp(BuildException):
+    """
+    A warm-up of the workers is not valid.
+    Contains the reason.
+    """
+
+
 class DeploymentException(Exception):
     """
     Exceptions relative to the deployment.
@@ -44,6 +107,18 @@ class InvalidTier(DeploymentException):
     """
 
 
+class SlotsNotSupported(DeploymentException):
+    """
+    The tier does not support deployment slots.
+    """
+
+
+class WarmUpFailed(DeploymentException):
+    """
+    The deployment slot does not respond before the swap.
+    """
+
+
 class AppTierException(Exception):
     """
     Exceptions relative to the app-tier command.
@@ -0,0 +1,319 @@
+"""
+Gunicorn settings of the application.
+
+Gunicorn serves one request at a time by sync worker. The number of workers follows the
+cores of the tier, bounded by its memory, and each worker serves several requests with
+threads, or with greenlets when the application requires gevent or eventlet.
+ASGI applications are served by uvicorn workers.
+Workers are recycled after a number of requests following their memory, and the timeouts
+fit the App Service front end.
+Each setting can be set by the user instead.
+
+An optional configuration file preloads the application in the master process, shares its
+memory with the workers and warms up each worker before it serves requests.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from .exceptions import InvalidGunicornSetting, InvalidWarmUp
+
+
+# Setting computed from the tier.
+AUTO = 'auto'
+
+# Worker classes of the asynchronous libraries, when the application requires them.
+ASYNC_WORKER_CLASSES = {'gevent': 'gevent', 'eventlet': 'eventlet'}
+
+# Worker class by default.
+DEFAULT_WORKER_CLASS = 'gthread'
+
+# Worker classes of the ASGI applications by name.
+ASGI_WORKER_CLASSES = {
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+    'uvicorn-h11': 'uvicorn.workers.UvicornH11Worker',
+}
+
+# Hardware of an unknown tier.
+_DEFAULT_HARDWARE = {'cores': 1, 'ram': 1}
+
+# Warm-up callable, as 'package.module:function'.
+_WARM_UP_CALLABLE = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_]\w*$')
+
+# Gunicorn configuration file, with the constants PRELOAD and WARM_UP.
+_CONFIG_FILE = '''"""
+Gunicorn configuration generated by weblodge.
+"""
+import gc
+import importlib
+from wsgiref.util import setup_testing_defaults
+
+
+# The application is loaded by the master process before the workers are forked.
+PRELOAD = {preload!r}
+
+# Callables, as 'module:function', and URL paths called by each worker before serving.
+WARM_UP = {warm_up!r}
+
+if PRELOAD:
+    # No collection in the master, it would leave holes in the memory pages shared with the workers.
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    """
+    Exclude the objects of the master from the collections of the workers, so the collections
+    do not write in the memory pages they share.
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """
+    Collect the garbage of the worker.
+    """
+    gc.enable()
+
+
+def post_worker_init(worker):
+    """
+    Warm up the worker before it serves requests.
+    """
+    for target in WARM_UP:
+        try:
+            if target.startswith('/'):
+                _request(worker.wsgi, target)
+            else:
+                module, _, name = target.partition(':')
+                getattr(importlib.import_module(module), name)()
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            # The worker serves requests even if its warm-up failed.
+            worker.log.warning(f"Warm-up '{{target}}' failed: {{exception!r}}")
+
+
+def _request(app, path):
+    """
+    Call the WSGI application with a GET request on the path.
+    """
+    environ = {{}}
+    setup_testing_defaults(environ)
+    environ['PATH_INFO'], _, environ['QUERY_STRING'] = path.partition('?')
+    response = app(environ, lambda status, headers, exc_info=None: lambda data: None)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+'''
+
+
+@dataclass(frozen=True)
+class GunicornSettings:
+    """
+    Gunicorn workers of the application.
+    """
+    # Number of worker processes.
+    workers: int
+    # Number of threads by worker, used by the 'gthread' worker class.
+    threads: int
+    # Worker class.
+    worker_class: str
+
+    # Memory used by a worker in GB, to avoid swapping on small tiers.
+    worker_memory = 0.25
+    # Threads by worker with the 'gthread' worker class.
+    threads_by_worker = 4
+    # Folder of the worker heartbeat files, in memory to avoid blocking on a slow disk.
+    worker_tmp_dir = '/dev/shm'
+
+    @classmethod
+    def for_tier(  # pylint: disable=too-many-arguments
+        cls,
+        hardware: Optional[Dict],
+        requirements: str,
+        workers: str = AUTO,
+        threads: str = AUTO,
+        worker_class: str = AUTO,
+        asgi: bool = False
+    ) -> 'GunicornSettings':
+        """
+        Return the settings for the hardware of a tier, with the values set by the user.
+        """
+        hardware = hardware or _DEFAULT_HARDWARE
+        cores, ram = hardware['cores'], hardware['ram']
+
+        if asgi:
+            # An event loop by worker, the threads are not used.
+            worker_class = 'uvicorn' if worker_class == AUTO else worker_class
+            if worker_class not in ASGI_WORKER_CLASSES:
+                raise InvalidGunicornSetting(f'worker_class={worker_class}')
+        elif worker_class == AUTO:
+            worker_class = detect_worker_class(requirements)
+        elif worker_class in ASGI_WORKER_CLASSES:
+            raise InvalidGunicornSetting(f'worker_class={worker_class}')
+
+        if workers == AUTO:
+            # The usual (2 x cores) + 1 workers, as much as the memory allows.
+            workers_count = max(1, min(2 * cores + 1, int(ram / cls.worker_memory)))
+        else:
+            workers_count = _to_int('workers', workers)
+
+        if threads == AUTO:
+            threads_count = cls.threads_by_worker if worker_class == DEFAULT_WORKER_CLASS else 1
+        else:
+            threads_count = _to_int('threads', threads)
+
+        return cls(workers_count, threads_count, worker_class)
+
+    def options(self) -> List[str]:
+        """
+        Return the gunicorn command line options.
+        """
+        worker_class = ASGI_WORKER_CLASSES.get(self.worker_class, self.worker_class)
+        options = [f'--workers {self.workers}', f'--worker-class {worker_class}']
+        if self.threads > 1:
+            options.append(f'--threads {self.threads}')
+        options.append(f'--worker-tmp-dir {self.worker_tmp_dir}')
+        return options
+
+
+@dataclass(frozen=True)
+class GunicornTuning:
+    """
+    Timeouts, recycling and limits of the gunicorn workers.
+    """
+    # Seconds before a silent worker is restarted.
+    timeout: int
+    # Seconds given to a worker to finish its requests when it is restarted.
+    graceful_timeout: int
+    # Seconds a connection is kept open between two requests.
+    keepalive: int
+    # Requests served by a worker before it is recycled, 0 to never recycle it.
+    max_requests: int
+    # Random requests added to `max_requests`, so the workers are not recycled together.
+    max_requests_jitter: int
+    # Connections waiting for a worker.
+    backlog: int
+    # Maximum size of the request line in bytes, 0 for no limit.
+    limit_request_line: int
+
+    # Settings not depending on the tier.
+    # The App Service front end answers after 230 seconds without response, a worker stuck
+    # longer is useless. Its connections to the application are kept open.
+    defaults = {'timeout': 120, 'graceful_timeout': 30, 'keepalive': 75, 'limit_request_line': 4094}
+    # Requests served by a worker by GB of memory of the worker before it is recycled.
+    requests_by_gb = 1000
+    # Bounds of the requests served by a worker before it is recycled.
+    max_requests_bounds = (500, 10000)
+    # Connections waiting by core, the front end retries on another instance when it is full.
+    backlog_by_core = 64
+    # Gunicorn maximum backlog by default.
+    max_backlog = 2048
+
+    @classmethod
+    def for_tier(cls, hardware: Optional[Dict], workers: int, settings: Dict[str, str]) -> 'GunicornTuning':
+        """
+        Return the tuning for the hardware of a tier and its workers, with the values set by the user.
+        Workers with less memory are recycled sooner.
+        """
+        hardware = hardware or _DEFAULT_HARDWARE
+        low, high = cls.max_requests_bounds
+
+        def value(name: str, default: int, minimum: int) -> int:
+            setting = settings.get(name, AUTO)
+            return default if setting == AUTO else _to_int(name, setting, minimum)
+
+        max_requests = value(
+            'max_requests', max(low, min(high, int(cls.requests_by_gb * hardware['ram'] / workers))), 0
+        )
+        return cls(
+            timeout=value('timeout', cls.defaults['timeout'], 1),
+            graceful_timeout=value('graceful_timeout', cls.defaults['graceful_timeout'], 1),
+            keepalive=value('keepalive', cls.defaults['keepalive'], 0),
+            max_requests=max_requests,
+            max_requests_jitter=value('max_requests_jitter', max_requests // 10, 0),
+            backlog=value('backlog', min(cls.max_backlog, cls.backlog_by_core * hardware['cores']), 1),
+            limit_request_line=value('limit_request_line', cls.defaults['limit_request_line'], 0),
+        )
+
+    def options(self) -> List[str]:
+        """
+        Return the gunicorn command line options.
+        """
+        options = [
+            f'--timeout {self.timeout}',
+            f'--graceful-timeout {self.graceful_timeout}',
+            f'--keep-alive {self.keepalive}',
+        ]
+        if self.max_requests:
+            options += [f'--max-requests {self.max_requests}', f'--max-requests-jitter {self.max_requests_jitter}']
+        options += [f'--backlog {self.backlog}', f'--limit-request-line {self.limit_request_line}']
+        return options
+
+
+def warm_up_targets(warm_up: str, asgi: bool = False) -> List[str]:
+    """
+    Return the comma separated warm-up callables, as 'module:function', and URL paths.
+    URL paths are requested to the WSGI application of the worker, without network.
+    """
+    targets = [t.strip() for t in warm_up.split(',') if t.strip()]
+    for target in targets:
+        if target.startswith('/'):
+            if asgi:
+                raise InvalidWarmUp(f"'{target}': URL paths can only warm up WSGI applications")
+        elif not _WARM_UP_CALLABLE.match(target):
+            raise InvalidWarmUp(f"'{target}': it must be a URL path or a callable as 'module:function'")
+    return targets
+
+
+def warm_up_modules(warm_up: List[str]) -> List[str]:
+    """
+    Return the modules of the application the warm-up callables import.
+    They are imported by the gunicorn configuration file, not by the application.
+    """
+    return [target.partition(':')[0] for target in warm_up if not target.startswith('/')]
+
+
+def config_file(preload: bool, warm_up: List[str]) -> str:
+    """
+    Return the content of the gunicorn configuration file.
+    """
+    return _CONFIG_FILE.format(preload=preload, warm_up=warm_up)
+
+
+def detect_worker_class(requirements: str) -> str:
+    """
+    Return the worker class of the asynchronous library required, the default one otherwise.
+    """
+    for name in required(requirements):
+        if name in ASYNC_WORKER_CLASSES:
+            return ASYNC_WORKER_CLASSES[name]
+    return DEFAULT_WORKER_CLASS
+
+
+def required(requirements: str) -> Dict[str, Set[str]]:
+    """
+    Return the extras of the distributions of a requirements file by lowercase name.
+    """
+    distributions = {}
+    for line in requirements.splitlines():
+        # Name of the distribution and its extras, without version or markers.
+        match = re.match(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[([^\]]*)\])?', line.split('#')[0])
+        if match:
+            extras = {e.strip().lower() for e in (match.group(2) or '').split(',') if e.strip()}
+            distributions.setdefault(match.group(1).lower(), set()).update(extras)
+    return distributions
+
+
+def _to_int(name: str, value: str, minimum: int = 1) -> int:
+    """
+    Convert a setting and ensure it is valid.
+    """
+    try:
+        number = int(value)
+    except ValueError as exception:
+        raise InvalidGunicornSetting(f'{name}={value}') from exception
+    if number < minimum:
+        raise InvalidGunicornSetting(f'{name}={value}')
+    return number
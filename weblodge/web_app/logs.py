@@ -1,8 +1,49 @@
 """
-Stream logs from an Azure Web App in the user console.
+Stream logs from Azure Web Apps in the user console.
+
+Logs of several applications can be followed at once, each line is then prefixed by the
+application name. Lines can be filtered by a regular expression, by level and by age.
+
+The server replays its last lines on each connection. The lines received are kept in a
+bounded buffer: after a reconnection, the replayed lines matching the end of the buffer
+are skipped, the following ones are new. The buffer dates the lines without timestamp,
+as the lines of a traceback, so they are filtered by age with their record.
 """
+import re
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from urllib3.exceptions import HTTPError
+
 from weblodge.config import Item as ConfigItem
 from weblodge._azure import AzureService
+from weblodge._azure.exceptions import AzureException
+
+
+logger = logging.getLogger('weblodge')
+
+# Log levels from the most to the least important.
+LEVELS = ['error', 'warning', 'info', 'verbose']
+
+# Words identifying the level of a log line.
+_LEVEL_PATTERNS = [
+    ('error', re.compile(r'\b(ERROR|CRITICAL|FATAL|Error|Critical|Fatal)\b')),
+    ('warning', re.compile(r'\b(WARNING|WARN|Warning)\b')),
+    ('info', re.compile(r'\b(INFO|Information|Info)\b')),
+    ('verbose', re.compile(r'\b(DEBUG|VERBOSE|Debug|Verbose|Trace)\b')),
+]
+
+# ISO timestamp at the beginning of a log line.
+_TIMESTAMP = re.compile(r'^\s*(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})')
+
+# Durations accepted by the `since` option. Ex: 30s, 10m, 2h.
+_DURATION = re.compile(r'^(\d+)([smh])$')
+_DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours'}
 
 
 class LogsConfig():
@@ -12,21 +53,292 @@ class LogsConfig():
     Azure Web App names are unique across the entire Azure platform. Therefore, simply providing
     the name is enough to retrieve the application logs.
     """
+    # Waiting time before the first reconnection in seconds.
+    reconnect_delay: int = 1
+    # Maximum waiting time between two reconnections in seconds.
+    max_reconnect_delay: int = 30
+    # Waiting time for the streams to stop in seconds.
+    stop_timeout: float = 1
+    # Time during which the lines received on a connection can be replayed ones in seconds.
+    replay_window: float = 2
+
     items = [
         ConfigItem(
             name='subdomain',
-            description='The application subdomain.'
-        )
+            description='The application subdomain. Several applications can be followed by separating subdomains with commas.'  # pylint: disable=line-too-long
+        ),
+        ConfigItem(
+            name='log_path',
+            description="Logs selected by the server. Ex: 'application', 'http'. All logs by default.",
+            default=''
+        ),
+        ConfigItem(
+            name='log_filter',
+            description='Only print lines matching this regular expression.',
+            default=''
+        ),
+        ConfigItem(
+            name='log_min_level',
+            description='Only print lines of this level or more important. Lines without level are always printed.',  # pylint: disable=line-too-long
+            default='verbose',
+            values_allowed=LEVELS
+        ),
+        ConfigItem(
+            name='since',
+            description='Only print lines more recent than this duration. Ex: 30s, 10m, 2h.',
+            default=''
+        ),
+        ConfigItem(
+            name='buffer_size',
+            description='Number of lines kept in memory by application.',
+            default='1000'
+        ),
     ]
 
-    def __init__(self, subdomain: str, *_args, **_kwargs) -> None:
-        self.subdomain = subdomain
+    # pylint: disable=too-many-arguments
+    def __init__(
+            self,
+            subdomain: str,
+            log_path: str,
+            log_filter: str,
+            log_min_level: str,
+            since: str,
+            buffer_size: str,
+            *_args,
+            **_kwargs
+        ) -> None:
+        # Applications to follow.
+        self.subdomains = [s.strip() for s in subdomain.split(',') if s.strip()]
+        # Server side logs selection.
+        self.log_path = log_path
+        # Client side filters.
+        self.log_filter = re.compile(log_filter) if log_filter else None
+        self.log_min_level = log_min_level
+        self.since = _to_timedelta(since) if since else None
+        # Lines kept in memory.
+        self.buffer_size = int(buffer_size)
 
 
-def logs(azure_service: AzureService, config: LogsConfig):
+class LogBuffer:
     """
-    Stream logs from the application.
+    Bounded buffer of the last log lines received, with their timestamp.
+
+    Lines without timestamp, as the lines of a traceback, have the timestamp of the
+    previous line.
+    """
+    def __init__(self, size: int) -> None:
+        self._lines: Deque[Tuple[Optional[datetime], str]] = deque(maxlen=size)
+        self._timestamp: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def append(self, line: str) -> Optional[datetime]:
+        """
+        Add a line to the buffer and return its timestamp, None if unknown.
+        The oldest line is dropped if the buffer is full.
+        """
+        self._timestamp = _timestamp(line) or self._timestamp
+        self._lines.append((self._timestamp, line))
+        return self._timestamp
+
+    @property
+    def lines(self) -> List[str]:
+        """
+        Return the lines of the buffer, from the oldest.
+        """
+        return [line for _, line in self._lines]
+
+
+def logs(azure_service: AzureService, config: LogsConfig, output: Callable[[str], None] = print):
+    """
+    Stream logs from the applications.
     This function is blocking and never returns.
     User must run CTRL+C to stop the process.
     """
-    azure_service.get_web_app(config.subdomain).logs()
+    # Lines of all applications.
+    # Readers wait when the output is late, which slows down the streams.
+    lines = queue.Queue(maxsize=config.buffer_size)
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(
+            target=_follow,
+            args=(azure_service, subdomain, config, lines, stop),
+            name=f'logs-{subdomain}',
+            daemon=True
+        )
+        for subdomain in config.subdomains
+    ]
+    for thread in threads:
+        thread.start()
+
+    with_prefix = len(config.subdomains) > 1
+    try:
+        while True:
+            subdomain, line = lines.get()
+            if isinstance(line, Exception):
+                raise line
+            output(f'[{subdomain}] {line}' if with_prefix else line)
+    except KeyboardInterrupt:
+        logger.info('Logs streaming stopped.')
+    finally:
+        # Streams blocked on a read are daemons, they do not prevent the exit.
+        stop.set()
+        for thread in threads:
+            thread.join(config.stop_timeout)
+
+
+def accept(config: LogsConfig, line: str, timestamp: Optional[datetime] = None) -> bool:
+    """
+    Return True if the line must be printed.
+    The `timestamp` of the line is read from the line if not provided.
+    """
+    if config.log_filter and not config.log_filter.search(line):
+        return False
+
+    level = _level(line)
+    if level and LEVELS.index(level) > LEVELS.index(config.log_min_level):
+        return False
+
+    if config.since:
+        timestamp = timestamp or _timestamp(line)
+        if timestamp and timestamp < _now() - config.since:
+            return False
+
+    return True
+
+
+# pylint: disable=too-many-arguments
+def _follow(
+    azure_service: AzureService,
+    subdomain: str,
+    config: LogsConfig,
+    lines: queue.Queue,
+    stop: threading.Event
+):
+    """
+    Read the logs of an application and reconnect when the stream is interrupted, until stopped.
+    Unexpected errors are sent to the reader.
+    """
+    delay = config.reconnect_delay
+    buffer = LogBuffer(config.buffer_size)
+
+    while not stop.is_set():
+        try:
+            web_app = azure_service.get_web_app(subdomain)
+            for line, timestamp in _new_lines(web_app.logs(config.log_path), buffer, config.replay_window):
+                # Connection is working, the next reconnection can be fast.
+                delay = config.reconnect_delay
+                if accept(config, line, timestamp) and not _put(lines, (subdomain, line), stop):
+                    return
+            logger.info(f"Log stream of '{subdomain}' closed, reconnecting in {delay}s...")
+        except (AzureException, HTTPError, OSError) as exception:
+            logger.warning(f"Log stream of '{subdomain}' failed ({exception}), reconnecting in {delay}s...")
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            _put(lines, (subdomain, exception), stop)
+            return
+        stop.wait(delay)
+        delay = min(delay * 2, config.max_reconnect_delay)
+
+
+def _put(lines: queue.Queue, item: Tuple, stop: threading.Event) -> bool:
+    """
+    Send an item to the reader, waiting while it is late.
+    Return False if the streams are stopped before.
+    """
+    while not stop.is_set():
+        try:
+            lines.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _new_lines(
+        stream: Iterable[str],
+        buffer: LogBuffer,
+        window: float
+    ) -> Iterator[Tuple[str, Optional[datetime]]]:
+    """
+    Return the lines not already received with their timestamp.
+
+    The lines replayed by the server on a reconnection are the last ones of the buffer: the
+    first lines of the stream are held while they match a sequence of the buffer. They are
+    skipped up to the longest match ending at the last line received, the others are new.
+    The replay is sent on connection: lines received after `window` seconds, or once the
+    length of the buffer is used up, are new and end the hold.
+    """
+    previous = buffer.lines
+    # Start in `previous` of the sequences matching the held lines.
+    candidates = list(range(len(previous)))
+    # Held lines, and number of them matching the end of `previous`.
+    held: List[str] = []
+    replayed = 0
+    # The stream connects on the first read.
+    deadline = time.monotonic() + window
+
+    for line in stream:
+        if not line:
+            continue
+        if candidates and time.monotonic() > deadline:
+            candidates = []
+            for held_line in held[replayed:]:
+                yield held_line, buffer.append(held_line)
+            held = []
+        if candidates:
+            position = len(held)
+            candidates = [i for i in candidates if previous[i + position] == line]
+            if candidates:
+                held.append(line)
+                if any(i + position + 1 == len(previous) for i in candidates):
+                    replayed = len(held)
+                # Sequences reaching the end of `previous` can not continue.
+                candidates = [i for i in candidates if i + position + 1 < len(previous)]
+                continue
+            for held_line in held[replayed:]:
+                yield held_line, buffer.append(held_line)
+            held = []
+        yield line, buffer.append(line)
+
+    # The stream closed while replaying.
+    for held_line in held[replayed:]:
+        yield held_line, buffer.append(held_line)
+
+
+def _level(line: str) -> Optional[str]:
+    """
+    Return the level of a log line, None if unknown.
+    """
+    for level, pattern in _LEVEL_PATTERNS:
+        if pattern.search(line):
+            return level
+    return None
+
+
+def _timestamp(line: str) -> Optional[datetime]:
+    """
+    Return the UTC timestamp at the beginning of a log line, None if not found.
+    """
+    match = _TIMESTAMP.match(line)
+    if not match:
+        return None
+    return datetime.fromisoformat(match.group(1).replace(' ', 'T')).replace(tzinfo=timezone.utc)
+
+
+def _to_timedelta(duration: str) -> timedelta:
+    """
+    Convert a duration as '10m' to a timedelta.
+    """
+    match = _DURATION.match(duration.strip())
+    if not match:
+        raise ValueError(f"Invalid duration '{duration}'. Expected format: 30s, 10m, 2h.")
+    return timedelta(**{_DURATION_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def _now() -> datetime:
+    """
+    Return the current UTC time.
+    """
+    return datetime.now(timezone.utc)
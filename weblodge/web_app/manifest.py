@@ -0,0 +1,104 @@
+"""
+Manifest of the application files in a package.
+
+The manifest is stored next to the package. It allows a new build to know which files
+changed since the previous one, most of the time without reading them.
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """
+    Application file in the package.
+    """
+    # Size in bytes.
+    size: int
+    # Last modification time in nanoseconds.
+    mtime: int
+    # Hash of the content.
+    sha256: str
+
+
+class Manifest:
+    """
+    Application files in a package by name in the package.
+    """
+    # Format version of the manifest file.
+    version: int = 1
+
+    def __init__(self, files: Optional[Dict[str, FileEntry]] = None, policy: str = '') -> None:
+        self.files: Dict[str, FileEntry] = files or {}
+        # Compression policy of the files.
+        self.policy = policy
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @classmethod
+    def load(cls, path: str) -> 'Manifest':
+        """
+        Load a manifest file.
+        Return an empty manifest if the file does not exist or is not readable.
+        """
+        try:
+            content = json.loads(Path(path).read_text(encoding='utf-8'))
+            if content.get('version') != cls.version:
+                return cls()
+            return cls(
+                {name: FileEntry(**entry) for name, entry in content['files'].items()},
+                content.get('policy', '')
+            )
+        except (OSError, ValueError, TypeError, KeyError):
+            return cls()
+
+    def dump(self, path: str) -> None:
+        """
+        Write the manifest file.
+        """
+        content = {
+            'version': self.version,
+            'policy': self.policy,
+            'files': {name: asdict(entry) for name, entry in sorted(self.files.items())}
+        }
+        Path(path).write_text(json.dumps(content, indent=1), encoding='utf-8')
+
+    def get(self, name: str, path: str, stat: os.stat_result) -> FileEntry:
+        """
+        Return the entry of a file.
+        The file is read only if its size or its modification time changed.
+        """
+        entry = self.files.get(name)
+        if entry and entry.size == stat.st_size and entry.mtime == stat.st_mtime_ns:
+            return entry
+        return FileEntry(size=stat.st_size, mtime=stat.st_mtime_ns, sha256=file_digest(path))
+
+    def unchanged(self, name: str, entry: FileEntry) -> bool:
+        """
+        Return True if the file has the same content in the manifest.
+        """
+        previous = self.files.get(name)
+        return previous is not None and previous.sha256 == entry.sha256
+
+
+def content_digest(content: bytes) -> str:
+    """
+    Return the hash of a content.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    Return the hash of a file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
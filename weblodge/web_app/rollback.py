@@ -0,0 +1,37 @@
+"""
+Restore the previous production of an application deployed with a slot.
+
+After a swap, the slot runs the previous production. Swapping again restores it instantly.
+"""
+from weblodge._azure import AzureService
+from weblodge.config import Item as ConfigItem
+
+
+class RollbackConfig:
+    """
+    Rollback configuration.
+
+    Azure Web App names are unique across the entire Azure platform. Therefore, simply providing
+    the name and the slot used for the deployment is enough to rollback the application.
+    """
+    items = [
+        ConfigItem(
+            name='subdomain',
+            description='The application name to rollback.'
+        ),
+        ConfigItem(
+            name='slot',
+            description='The slot used for the deployment.'
+        )
+    ]
+
+    def __init__(self, subdomain: str, slot: str, *_args, **_kwargs) -> None:
+        self.subdomain = subdomain
+        self.slot = slot
+
+
+def rollback(azure_service: AzureService, config: RollbackConfig) -> None:
+    """
+    Swap back the production with the slot.
+    """
+    azure_service.get_web_app(config.subdomain).swap(config.slot)
@@ -0,0 +1,160 @@
+"""
+Stream a package while it is built.
+
+The build writes the package in a pipe from a dedicated thread, the upload reads the
+chunks from the pipe as they are produced. The pipe holds a limited number of chunks:
+the build waits when the upload is late, so the memory used is bounded.
+"""
+import queue
+import threading
+from typing import BinaryIO, Callable, Iterator, Optional, Sequence
+
+
+class Pipe:
+    """
+    Write-only file object sending its content by chunks to a reader.
+    """
+    # Size of the chunks sent.
+    chunk_size: int = 1024 * 1024
+    # Maximum number of chunks waiting to be read.
+    max_chunks: int = 16
+    # Waiting time before checking if the reader is still there in seconds.
+    _poll_interval: float = 0.5
+
+    def __init__(self) -> None:
+        self._chunks = queue.Queue(maxsize=self.max_chunks)
+        self._buffer = bytearray()
+        self._position = 0
+        # The reader stopped, nothing can be written anymore.
+        self._aborted = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        """
+        Add data to the pipe.
+        """
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.chunk_size:
+            self._put(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+
+    def tell(self) -> int:
+        """
+        Return the number of bytes written.
+        """
+        return self._position
+
+    def flush(self) -> None:
+        """
+        Data are sent by chunks, nothing to flush.
+        """
+
+    def close(self) -> None:
+        """
+        Send the remaining data and notify the reader of the end.
+        """
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        self._put(None)
+
+    def abort(self) -> None:
+        """
+        Stop the writing, the reader does not read anymore.
+        """
+        self._aborted.set()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while (chunk := self._chunks.get()) is not None:
+            yield chunk
+
+    def _put(self, chunk: Optional[bytes]) -> None:
+        """
+        Send a chunk, waiting for the reader if the pipe is full.
+        """
+        while True:
+            if self._aborted.is_set():
+                raise BrokenPipeError('The package reader stopped.')
+            try:
+                self._chunks.put(chunk, timeout=self._poll_interval)
+                return
+            except queue.Full:
+                continue
+
+
+class PackageStream:
+    """
+    Run a package build in a thread and return the package chunks as they are produced.
+
+    Used as a context manager, the build error is raised in place of the reading error:
+    an upload failing because the build failed reports the build error.
+    """
+    def __init__(self, build: Callable[[BinaryIO], None]) -> None:
+        # Build writing the package in the file object provided.
+        self._build = build
+        self._pipe = Pipe()
+        self._thread = threading.Thread(target=self._run, name='package-build', daemon=True)
+        # Error raised by the build.
+        self.error: Optional[BaseException] = None
+
+    def __enter__(self) -> Iterator[bytes]:
+        self._thread.start()
+        return iter(self)
+
+    def __exit__(self, _exc_type, exc_value, _traceback) -> None:
+        # The reader may have stopped before the end of the build.
+        self._pipe.abort()
+        self._thread.join()
+        if self.error is not None and not isinstance(self.error, BrokenPipeError):
+            raise self.error from exc_value
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._pipe
+        if self.error is not None:
+            raise self.error
+
+    def _run(self) -> None:
+        """
+        Build the package in the pipe.
+        """
+        try:
+            self._build(self._pipe)
+        except BaseException as exception:  # pylint: disable=broad-exception-caught
+            self.error = exception
+        finally:
+            try:
+                self._pipe.close()
+            except BrokenPipeError:
+                pass
+
+
+class Tee:
+    """
+    Write-only file object copying its content in several file objects.
+    """
+    def __init__(self, outputs: Sequence[BinaryIO]) -> None:
+        self._outputs = outputs
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        """
+        Write data in all the outputs.
+        """
+        for output in self._outputs:
+            output.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """
+        Return the number of bytes written.
+        """
+        return self._position
+
+    def flush(self) -> None:
+        """
+        Flush all the outputs.
+        """
+        for output in self._outputs:
+            output.flush()
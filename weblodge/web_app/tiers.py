@@ -1,9 +1,9 @@
 """
-Allow to retrieve all available tiers for a given location.
+Allow to retrieve all available tiers for a given location, or to compare them across locations.
 """
 from dataclasses import dataclass
 import logging
-from typing import List, Union
+from typing import Dict, Iterable, List, Tuple, Union
 
 from weblodge.config import Item as ConfigItem
 from weblodge._azure import AzureService, InvalidLocation
@@ -15,7 +15,7 @@ logger = logging.getLogger('weblodge')
 
 
 @dataclass
-class WebAppTier:
+class WebAppTier:  # pylint: disable=too-many-instance-attributes
     """
     Information on the WebApp hardware and price.
     """
@@ -41,6 +41,23 @@ class WebAppTier:
     # Disk size in GB.
     disk: int
 
+    # Number of deployment slots.
+    slots: int = 0
+
+    @property
+    def price_by_core(self) -> float:
+        """
+        Return the price per hour of a core.
+        """
+        return self.price_by_hour / self.cores
+
+    @property
+    def price_by_gb(self) -> float:
+        """
+        Return the price per hour of a GB of RAM.
+        """
+        return self.price_by_hour / self.ram
+
 
 class TiersConfig:
     """
@@ -55,24 +72,60 @@ class TiersConfig:
             description='The physical location of tiers.',
             default='northeurope'
         ),
+        ConfigItem(
+            name='locations',
+            description="Compare the tiers of several locations: 'all' or a comma separated list of locations.",
+            default=''
+        ),
+        ConfigItem(
+            name='offline',
+            description='Use the prices cached by a previous command, without network access.',
+            attending_value=False
+        ),
+        ConfigItem(
+            name='refresh_prices',
+            description='Retrieve the prices even if they are cached.',
+            attending_value=False
+        ),
     ]
 
     # pylint: disable=too-many-arguments
     def __init__(
             self,
             location,
+            locations,
+            offline,
+            refresh_prices,
             *_args,
             **_kwargs
         ):
         # Tiers location.
         self.location = location
+        # Locations compared, 'all' for all of them.
+        self.locations = locations
+        # Use only the cached prices, or never them.
+        self.offline = offline
+        self.refresh_prices = refresh_prices
 
 
 def tiers(azure_service: AzureService, config: TiersConfig) -> List[WebAppTier]:
     """
-    Return all available tiers.
+    Return all available tiers, of the compared locations if any.
     """
     try:
+        if config.locations:
+            # All the locations are retrieved by a single query.
+            locations = None if config.locations.strip() == 'all' else \
+                [location.strip() for location in config.locations.split(',') if location.strip()]
+            skus = [
+                s
+                for location_skus in azure_service.get_skus_by_location(
+                    locations, config.offline, config.refresh_prices
+                ).values()
+                for s in location_skus
+            ]
+        else:
+            skus = azure_service.get_skus(config.location, config.offline, config.refresh_prices)
         return [
             WebAppTier(
                 name=s.name,
@@ -82,8 +135,21 @@ def tiers(azure_service: AzureService, config: TiersConfig) -> List[WebAppTier]:
                 cores=s.cores,
                 ram=s.ram,
                 disk=s.disk,
+                slots=s.slots,
             )
-            for s in azure_service.get_skus(config.location)
+            for s in skus
         ]
     except InvalidLocation:
-        raise CanNotFindTierLocation(f"Can not find any tier for the location '{config.location}'.") from InvalidLocation  # pylint: disable=line-too-long
+        location = config.locations or config.location
+        raise CanNotFindTierLocation(f"Can not find any tier for the location '{location}'.") from InvalidLocation  # pylint: disable=line-too-long
+
+
+def price_index(web_app_tiers: Iterable[WebAppTier]) -> Dict[Tuple[str, str], WebAppTier]:
+    """
+    Return the paid tiers by name and location, from the cheapest by core then by GB of RAM.
+    """
+    paid = sorted(
+        (t for t in web_app_tiers if t.price_by_hour > 0),
+        key=lambda t: (t.price_by_core, t.price_by_gb, t.name, t.location)
+    )
+    return {(t.name, t.location): t for t in paid}
@@ -0,0 +1,149 @@
+"""
+Exclude the files the application can not load from the package.
+
+Starting from the entry point, the imports of each module are read without running it, to
+find all the modules of the application it can import. Other modules are not packaged.
+
+Files other than modules are kept when they are in a kept folder, at the root of the
+application or in a folder of an imported package, where they are probably read by the
+package. Folders without any imported module, as tests or notebooks, are dropped.
+"""
+import ast
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+# Functions importing the module named by their first argument.
+_IMPORT_FUNCTIONS = {'import_module', '__import__'}
+
+
+def shake(files: Dict[str, Path], entry_point: str, keep: Iterable[str], modules: Iterable[str] = ()) -> Set[str]:
+    """
+    Return the names of the files to package among `files`, given by name in the package.
+    Files in the folders or matching the names of `keep` are always packaged.
+    The `modules` are imported by other means than the entry point, as the gunicorn configuration.
+    """
+    imported = reachable(files, entry_point, modules)
+    keep = [k.strip().strip('/') for k in keep if k.strip().strip('/')]
+    # Folders of the imported packages, the root folder holds any application.
+    folders = {name.rpartition('/')[0] for name in imported} - {''}
+
+    kept = set(imported)
+    for name in files:
+        folder = name.rpartition('/')[0]
+        if any(name == k or name.startswith(f'{k}/') for k in keep):
+            kept.add(name)
+        elif name.endswith('.py'):
+            continue
+        elif not folder or any(folder == f or folder.startswith(f'{f}/') for f in folders):
+            kept.add(name)
+    return kept
+
+
+def reachable(files: Dict[str, Path], entry_point: str, roots: Iterable[str] = ()) -> Set[str]:
+    """
+    Return the names of the modules imported, directly or not, by the entry point
+    or by the `roots` modules, given by module name.
+    """
+    modules = {}
+    for name in files:
+        module = _module(name)
+        if module:
+            modules[module] = name
+
+    def files_of(imported: str) -> Iterator[str]:
+        # Parent packages are imported first.
+        parts = imported.split('.')
+        for i in range(1, len(parts) + 1):
+            parent = modules.get('.'.join(parts[:i]))
+            if parent:
+                yield parent
+
+    found = set()
+    to_visit = [entry_point]
+    for root in roots:
+        to_visit.extend(files_of(root))
+    while to_visit:
+        name = to_visit.pop()
+        if name in found or name not in files:
+            continue
+        found.add(name)
+
+        module = _module(name) or ''
+        package = module if name.endswith('/__init__.py') else module.rpartition('.')[0]
+        for imported in imports(files[name], package):
+            to_visit.extend(files_of(imported))
+    return found
+
+
+def imports(path: Path, package: str) -> Iterator[str]:
+    """
+    Return the absolute names of the modules a module may import.
+    A `from package import name` statement may import the module `package.name`.
+    """
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (SyntaxError, ValueError):
+        return
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom):
+            base = _resolve(node.module, node.level, package)
+            if base is None:
+                continue
+            if base:
+                yield base
+            for alias in node.names:
+                if alias.name != '*':
+                    yield f'{base}.{alias.name}' if base else alias.name
+        elif isinstance(node, ast.Call) and (imported := _imported_name(node)):
+            yield imported
+
+
+def _resolve(module: Optional[str], level: int, package: str) -> Optional[str]:
+    """
+    Return the absolute name of an imported module, None if it is outside the application.
+    """
+    if not level:
+        return module
+    parts: List[str] = package.split('.') if package else []
+    if level - 1 > len(parts):
+        return None
+    parts = parts[:len(parts) - (level - 1)]
+    if module:
+        parts.append(module)
+    return '.'.join(parts)
+
+
+def _imported_name(node: ast.Call) -> Optional[str]:
+    """
+    Return the module imported by a call to `importlib.import_module` or `__import__`
+    with a literal name, None for any other call.
+    """
+    func = node.func
+    func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+    if func_name not in _IMPORT_FUNCTIONS or not node.args:
+        return None
+    argument = node.args[0]
+    if isinstance(argument, ast.Constant) and isinstance(argument.value, str) \
+       and argument.value and not argument.value.startswith('.'):
+        return argument.value
+    return None
+
+
+def _module(name: str) -> Optional[str]:
+    """
+    Return the module name of a file, None if it is not a module.
+    Ex: 'package/module.py' -> 'package.module', 'package/__init__.py' -> 'package'.
+    """
+    if not name.endswith('.py'):
+        return None
+    parts = name[:-len('.py')].split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+    return '.'.join(parts)
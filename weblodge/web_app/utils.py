@@ -20,9 +20,11 @@ def set_webapp_env_var(webapp: AzureWebApp, env_file: str, env_update_waiting_ti
     if os.path.exists(env_file):
         logger.info(f"Updating the environment variable with '{env_file}'...")
         env = dotenv_values(env_file)
-        webapp.update_environment(env)
-        logger.info('Environment variable updated.')
-        logger.info('Waiting the application to restart...')
-        time.sleep(env_update_waiting_time)
+        if webapp.update_environment(env):
+            logger.info('Environment variable updated.')
+            logger.info('Waiting the application to restart...')
+            time.sleep(env_update_waiting_time)
+        else:
+            logger.info('Environment variable unchanged.')
     else:
         logger.info('No environment file found.')
@@ -0,0 +1,197 @@
+"""
+Walk the application files to package.
+
+Ignored directories are pruned during the walk, so their content is never read. Files and
+directories are ignored following the `.gitignore` and `.weblodgeignore` files of the
+application, with the `.gitignore` syntax. Hidden directories, bytecode caches, virtual
+environments and installed packages are always ignored.
+"""
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+
+# Files listing the ignored files of their folder.
+IGNORE_FILES = ('.gitignore', '.weblodgeignore')
+
+# Directories never packaged.
+IGNORED_DIRECTORIES = {'__pycache__', 'site-packages'}
+
+# File present at the root of a virtual environment.
+_VENV_MARKER = 'pyvenv.cfg'
+
+
+class _Rule(NamedTuple):
+    """
+    A pattern of an ignore file.
+    """
+    # Folder of the ignore file, relative to the application folder.
+    base: str
+    # Path, relative to `base`, matched by the pattern.
+    regex: Pattern
+    # The pattern re-includes files.
+    negate: bool
+    # The pattern only matches directories.
+    dir_only: bool
+
+
+class IgnoreRules:
+    """
+    Patterns of the ignore files applying to a folder.
+    The last matching pattern decides if a path is ignored.
+    """
+    def __init__(self, rules: Optional[List[_Rule]] = None) -> None:
+        self._rules = rules or []
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def extend(self, base: str, lines: Iterable[str]) -> 'IgnoreRules':
+        """
+        Return new rules including the patterns of an ignore file in the folder `base`.
+        """
+        rules = list(self._rules)
+        for line in lines:
+            rule = _parse(base, line)
+            if rule:
+                rules.append(rule)
+        return IgnoreRules(rules)
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """
+        Return True if the path, relative to the application folder, is ignored.
+        """
+        ignored = False
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base:
+                if not path.startswith(f'{rule.base}/'):
+                    continue
+                relative = path[len(rule.base) + 1:]
+            else:
+                relative = path
+            if rule.regex.fullmatch(relative):
+                ignored = not rule.negate
+        return ignored
+
+
+def walk(src: str, excluded: Iterable[str] = ()) -> Iterator[Tuple[Path, str]]:
+    """
+    Return the files to package with their name in the package.
+    Directories in `excluded` are not walked.
+    """
+    excluded_paths = {os.path.realpath(e) for e in excluded}
+    rules_by_folder = {'': _load(IgnoreRules(), src, '')}
+
+    for root_str, dirs, files in os.walk(src):
+        root = Path(root_str)
+        folder = Path(os.path.relpath(root, src)).as_posix()
+        folder = '' if folder == '.' else folder
+        rules = rules_by_folder.pop(folder)
+
+        # Prune the ignored directories in place, `os.walk` will not enter them.
+        kept = []
+        for name in sorted(dirs):
+            path = f'{folder}/{name}' if folder else name
+            if name.startswith('.') or name in IGNORED_DIRECTORIES:
+                continue
+            if (root / name / _VENV_MARKER).exists():
+                continue
+            if os.path.realpath(root / name) in excluded_paths:
+                continue
+            if rules.ignored(path, is_dir=True):
+                continue
+            kept.append(name)
+            rules_by_folder[path] = _load(rules, root / name, path)
+        dirs[:] = kept
+
+        for name in sorted(files):
+            path = f'{folder}/{name}' if folder else name
+            if not rules.ignored(path, is_dir=False):
+                yield root / name, path
+
+
+def _load(rules: IgnoreRules, folder: Path, base: str) -> IgnoreRules:
+    """
+    Return the rules including the ignore files of a folder.
+    """
+    for ignore_file in IGNORE_FILES:
+        path = Path(folder) / ignore_file
+        if path.is_file():
+            rules = rules.extend(base, path.read_text(encoding='utf-8', errors='replace').splitlines())
+    return rules
+
+
+def _parse(base: str, line: str) -> Optional[_Rule]:
+    """
+    Convert a line of an ignore file to a rule, None if the line has no pattern.
+    """
+    pattern = line.rstrip('\n')
+    # Trailing spaces are ignored unless escaped.
+    if not pattern.endswith('\\ '):
+        pattern = pattern.rstrip()
+    if not pattern or pattern.startswith('#'):
+        return None
+
+    negate = pattern.startswith('!')
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith('\\'):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    if not pattern:
+        return None
+
+    # A pattern with a slash is relative to the ignore file folder.
+    # Otherwise, it matches at any level.
+    if '/' in pattern:
+        pattern = pattern.lstrip('/')
+    else:
+        pattern = f'**/{pattern}'
+
+    return _Rule(base, re.compile(_translate(pattern)), negate, dir_only)
+
+
+def _translate(pattern: str) -> str:
+    """
+    Convert a `.gitignore` pattern to a regular expression.
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            # Any folders, including none.
+            regex += '(?:.*/)?'
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            # Everything inside.
+            regex += '/.*'
+            i += 3
+            continue
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                content = pattern[i + 1:end]
+                if content.startswith('!'):
+                    content = '^' + content[1:]
+                regex += f'[{content}]'
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            regex += re.escape(pattern[i])
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
@@ -0,0 +1,89 @@
+"""
+Watch the application files and run an action when they change.
+
+The files packaged are polled, with the ignored folders pruned, so a poll only reads the
+metadata of the application files. A burst of changes, as a branch checkout or an editor
+saving several files, triggers a single action once the files are stable.
+"""
+import time
+import logging
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .walker import walk
+
+
+logger = logging.getLogger('weblodge')
+
+
+class Watcher:
+    """
+    Detect the changes of the application files.
+    """
+    # Time between two polls in seconds.
+    interval: float = 1.0
+    # Time without change before the changes are reported in seconds.
+    debounce: float = 0.5
+
+    def __init__(self, src: str, excluded: Iterable[str] = ()) -> None:
+        self.src = src
+        self.excluded = list(excluded)
+        self._files = self.snapshot()
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the modification time and the size of the application files by name.
+        """
+        files = {}
+        for path, name in walk(self.src, excluded=self.excluded):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files[name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def wait(self) -> List[str]:
+        """
+        Wait for changes and return the names of the files changed, added or removed.
+        """
+        changed = set()
+        while not changed:
+            time.sleep(self.interval)
+            files = self.snapshot()
+            changed = _diff(self._files, files)
+
+        # Wait for the end of the burst of changes.
+        while True:
+            time.sleep(self.debounce)
+            latest = self.snapshot()
+            more = _diff(files, latest)
+            if not more:
+                break
+            changed |= more
+            files = latest
+
+        self._files = files
+        return sorted(changed)
+
+
+def watch(src: str, excluded: Iterable[str], on_change: Callable[[List[str]], None]) -> None:
+    """
+    Call `on_change` with the files changed after each change, until interrupted.
+    """
+    watcher = Watcher(src, excluded)
+    logger.info(f"Watching '{src}' for changes, execute CTRL+C to stop.")
+    try:
+        while True:
+            changed = watcher.wait()
+            shown = ', '.join(changed[:5]) + (', ...' if len(changed) > 5 else '')
+            logger.info(f'{len(changed)} files changed: {shown}')
+            on_change(changed)
+    except KeyboardInterrupt:
+        logger.info('Stopped watching.')
+
+
+def _diff(before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]) -> set:
+    """
+    Return the names of the files changed, added or removed.
+    """
+    return {name for name in before.keys() | after.keys() if before.get(name) != after.get(name)}
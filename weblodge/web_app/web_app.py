@@ -4,20 +4,28 @@ Web App facade.
 Wrapp all actions related to the Azure Web App.
 """
 import logging
+from functools import partial
 
 from typing import Callable, Iterable, List, Dict, Optional, Tuple
 
+from urllib3.exceptions import HTTPError
+
 from weblodge._azure import AzureService, AzureWebApp
+from weblodge._azure.exceptions import AzureException
 from weblodge.config import Item as ConfigItem
 
 from .build import BuildConfig, build as _build
 from .delete import DeleteConfig, delete as _delete
-from .deploy import DeploymentConfig, deploy as _deploy
-from .exceptions import RequirementsFileNotFound, EntryPointFileNotFound, FlaskAppNotFound, \
-    InvalidTier, WebAppNotSetException
+from .deploy import DeploymentConfig, deploy as _deploy, update as _update
+from .exceptions import BuildException, RequirementsFileNotFound, EntryPointFileNotFound, FlaskAppNotFound, \
+    InvalidTier, WebAppNotSetException, DependenciesInstallationFailed, SlotsNotSupported, \
+    InvalidCompressionLevel, BytecodeCompilationFailed, InvalidSizeBudget, PackageSizeBudgetExceeded, \
+    InvalidGunicornSetting, NotAnAsgiApplication, InvalidWarmUp, InvalidCompressionWorkers
 from .logs import LogsConfig, logs as _logs
+from .rollback import RollbackConfig, rollback as _rollback
 from .github import GitHubConfig, github, GitHubWorkflow
 from .tiers import TiersConfig, tiers as _tiers, WebAppTier
+from .watch import watch as _watch
 
 
 logger = logging.getLogger('weblodge')
@@ -54,17 +62,8 @@ class WebApp:
         logger.info('Building...')
         try:
             _build(build_config)
-        except RequirementsFileNotFound:
-            logger.critical(f"Requirements file '{build_config.requirements}' not found.")
-            logger.critical('Build failed.')
-            return False, {}
-        except EntryPointFileNotFound:
-            logger.critical(f"Entry point file '{build_config.entry_point}' not found.")
-            logger.critical('Build failed.')
-            return False, {}
-        except FlaskAppNotFound:
-            logger.critical(f"Can not find the Flask application '{build_config.flask_app}' in the file '{build_config.entry_point}'.") # pylint: disable=line-too-long
-            logger.critical('Build failed.')
+        except BuildException as build_error:
+            _log_build_error(build_config, build_error)
             return False, {}
 
         logger.info('Successfully built.')
@@ -78,13 +77,74 @@ class WebApp:
         deployment_config = DeploymentConfig(**config)
 
         tier = self._get_tier(config, deployment_config.tier)
+        if deployment_config.slot and not tier.slots:
+            raise SlotsNotSupported(f"The tier '{tier.name}' does not support deployment slots.")
+
+        # The package is built during the upload.
+        package = None
+        build_items = self.config_loader(BuildConfig.items, config)
+        build_config = BuildConfig(**build_items)
+        if deployment_config.stream:
+            config = {**config, **build_items}
+            package = partial(_build, build_config, tee=deployment_config.tee)
 
         logger.info('Deploying...')
-        self._web_app = _deploy(self.azure_service, deployment_config)
+        try:
+            self._web_app = _deploy(self.azure_service, deployment_config, package)
+        except BuildException as build_error:
+            _log_build_error(build_config, build_error)
+            return False, config, tier
         logger.info('Successfully deployed.')
 
         return True, config, tier
 
+    def watch(self, config: Dict[str, str], deploy: bool = False) -> None:
+        """
+        Rebuild the application when its files change, until interrupted.
+        With `deploy`, the application is uploaded after each build, without updating the infrastructure.
+        """
+        build_config = BuildConfig(**self.config_loader(BuildConfig.items, config))
+        deployment_config = DeploymentConfig(**self.config_loader(DeploymentConfig.items, config)) if deploy else None
+
+        def on_change(_changed: List[str]) -> None:
+            # A streamed package is built during the upload.
+            package = None
+            try:
+                if deployment_config and deployment_config.stream:
+                    package = partial(_build, build_config, tee=deployment_config.tee)
+                else:
+                    logger.info('Building...')
+                    _build(build_config)
+                    logger.info('Successfully built.')
+                if deployment_config:
+                    logger.info('Deploying...')
+                    self._web_app = _update(self.azure_service, deployment_config, package)
+                    logger.info('Successfully deployed.')
+            except BuildException as build_error:
+                _log_build_error(build_config, build_error)
+            except (AzureException, HTTPError, OSError) as error:
+                # A failure must not stop the watch, the next change is tried again.
+                logger.error(f'The update failed ({error}), waiting for the next change...')
+
+        _watch(build_config.src, [build_config.dist], on_change)
+
+    def rollback(self, config: Dict[str, str]) -> Tuple[bool, Dict[str, str]]:
+        """
+        Restore the production previously swapped with a slot.
+        """
+        config = self.config_loader(RollbackConfig.items, config)
+        rollback_config = RollbackConfig(**config)
+
+        if not rollback_config.slot:
+            logger.critical('The application has not been deployed with a slot, nothing to rollback.')
+            return False, config
+
+        logger.info(f"Swapping back the slot '{rollback_config.slot}' with the production...")
+        _rollback(self.azure_service, rollback_config)
+        logger.info('Successfully rolled back.')
+
+        return True, config
+
     def url(self) -> Optional[str]:
         """
         Get the URL of the deployed application.
@@ -132,7 +192,7 @@ class WebApp:
         logs_config = LogsConfig(
             **self.config_loader(LogsConfig.items, config)
         )
-        _logs(self.azure_service, logs_config)
+        _logs(self.azure_service, logs_config, output=lambda line: print(line, flush=True))
 
     def exists(self) -> bool:
         """
@@ -185,3 +245,42 @@ class WebApp:
             )
 
         return web_app_tier
+
+
+# pylint: disable=too-many-branches
+def _log_build_error(build_config: BuildConfig, build_error: BuildException) -> None:
+    """
+    Explain to the user why the build failed.
+    """
+    if isinstance(build_error, InvalidCompressionLevel):
+        logger.critical(f"Invalid compression level '{build_error}', levels are between 0 and 9 and set by pattern as '*.csv=1'.")  # pylint: disable=line-too-long
+    elif isinstance(build_error, InvalidCompressionWorkers):
+        logger.critical(f"Invalid number of compression workers '{build_error}', it is 0 for all CPU cores or more.")
+    elif isinstance(build_error, RequirementsFileNotFound):
+        logger.critical(f"Requirements file '{build_config.requirements}' not found.")
+    elif isinstance(build_error, EntryPointFileNotFound):
+        logger.critical(f"Entry point file '{build_config.entry_point}' not found.")
+    elif isinstance(build_error, FlaskAppNotFound) and build_config.asgi:
+        logger.critical(f"Can not find the ASGI application '{build_config.flask_app}' in the file '{build_config.entry_point}'.") # pylint: disable=line-too-long
+    elif isinstance(build_error, NotAnAsgiApplication):
+        logger.critical(f'{build_error} Use the wsgi app type or the ASGI application object.')
+    elif isinstance(build_error, FlaskAppNotFound):
+        logger.critical(f"Can not find the Flask application '{build_config.flask_app}' in the file '{build_config.entry_point}'.") # pylint: disable=line-too-long
+    elif isinstance(build_error, DependenciesInstallationFailed):
+        logger.critical(f'Can not install the dependencies for the Azure runtime:\n{build_error}')
+    elif isinstance(build_error, InvalidSizeBudget):
+        logger.critical(f"Invalid size budget '{build_error}', budgets are set by pattern as 'package=50MB,*.bin=10MB'.")  # pylint: disable=line-too-long
+    elif isinstance(build_error, PackageSizeBudgetExceeded):
+        logger.critical(f'The package exceeds its size budgets:\n{build_error}')
+    elif isinstance(build_error, InvalidGunicornSetting):
+        logger.critical(
+            f"Invalid gunicorn setting '{build_error}', workers and threads must be 'auto' or a positive number, "
+            "ASGI applications require a uvicorn worker class."
+        )
+    elif isinstance(build_error, InvalidWarmUp):
+        logger.critical(f'Invalid warm-up {build_error}.')
+    elif isinstance(build_error, BytecodeCompilationFailed):
+        logger.critical(f'Can not compile the application for the Azure runtime:\n{build_error}')
+    else:
+        logger.critical(build_error)
+    logger.critical('Build failed.')